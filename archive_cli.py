@@ -0,0 +1,85 @@
+"""Query and export the node's local reading archive.
+
+Usage:
+    python archive_cli.py info
+    python archive_cli.py query --start 2024-06-01T00:00 --end 2024-06-02T00:00 \\
+        [--fields bme280.temperature,tsl2591.lux] [--step 600] [--format csv|json] [--output FILE]
+    python archive_cli.py compact
+
+Times are ISO 8601 and taken as UTC unless they carry an offset. Without
+--start the last 24 hours are returned.
+"""
+import argparse
+import csv
+import json
+import math
+import sys
+import time
+from datetime import datetime, timezone
+
+from config import ARCHIVE_DIR, ARCHIVE_PRECISION
+from storage import Archive, parse_precision
+
+def parse_time(value):
+    moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+def _value(value):
+    value = value.item()
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+def write_rows(timestamps, columns, output, fmt):
+    paths = sorted(columns)
+    if fmt == 'json':
+        for i, timestamp in enumerate(timestamps):
+            row = {'timestamp': float(timestamp)}
+            row.update({path: _value(columns[path][i]) for path in paths})
+            output.write(json.dumps(row) + '\n')
+        return
+    writer = csv.writer(output)
+    writer.writerow(['timestamp'] + paths)
+    for i, timestamp in enumerate(timestamps):
+        writer.writerow([datetime.fromtimestamp(timestamp, timezone.utc).isoformat()] +
+                        ['' if _value(columns[path][i]) is None else _value(columns[path][i]) for path in paths])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--archive', default=ARCHIVE_DIR, help='archive directory')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('info', help='list archived days')
+    commands.add_parser('compact', help='merge the blocks of finished days')
+    query = commands.add_parser('query', help='print or export a time range')
+    query.add_argument('--start', type=parse_time)
+    query.add_argument('--end', type=parse_time)
+    query.add_argument('--fields', help='comma-separated field paths, default all')
+    query.add_argument('--step', type=float, help='average into buckets of this many seconds')
+    query.add_argument('--format', choices=('csv', 'json'), default='csv')
+    query.add_argument('--output', help='file to write, default stdout')
+    args = parser.parse_args()
+
+    archive = Archive(args.archive, precision=parse_precision(ARCHIVE_PRECISION))
+    if args.command == 'info':
+        for day in archive.info():
+            print(f"{day['day']}  {day['readings']:>6} readings  {day['blocks']:>3} blocks  {day['bytes'] / 1024:8.1f} KiB")
+        return 0
+    if args.command == 'compact':
+        return 0  # opening the archive compacts every finished day
+
+    end = args.end or time.time()
+    start = args.start or end - 86400
+    fields = args.fields.split(',') if args.fields else None
+    started = time.perf_counter()
+    timestamps, columns = archive.query(start, end, fields=fields, step=args.step)
+    output = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        write_rows(timestamps, columns, output, args.format)
+    finally:
+        if args.output:
+            output.close()
+    print(f"{len(timestamps)} rows in {(time.perf_counter() - started) * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""Compare payload size and encode time of each upload encoding.
+
+Usage: python benchmarks/bench_encoding.py [readings] [batch_size]
+"""
+import random
+import sys
+import time
+from os.path import dirname, abspath
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from sensors import MockSensor
+from uplink.encoding import ENCODINGS, PayloadEncoder, decode_payload
+
+def make_readings(count):
+    random.seed(1)
+    mock = MockSensor()
+    readings = []
+    for i in range(count):
+        reading = mock.get_mock_data()
+        reading['timestamp'] = 1_700_000_000 + 60 * i
+        readings.append(reading)
+    return readings
+
+def bench(encoding, readings, batch_size):
+    encoder = PayloadEncoder(encoding)
+    batches = [readings[i:i + batch_size] for i in range(0, len(readings), batch_size)]
+    if batch_size == 1 and encoder.format == 'json':
+        batches = [batch[0] for batch in batches]  # single readings go out as plain objects
+
+    total_bytes = 0
+    start = time.perf_counter()
+    for batch in batches:
+        body, headers = encoder.encode(batch)
+        total_bytes += len(body)
+    elapsed = time.perf_counter() - start
+
+    decoded = [r for batch in batches for r in decode_payload(*encoder.encode(batch))]
+    assert len(decoded) == len(readings)
+    return total_bytes / len(readings), elapsed / len(readings) * 1e6
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    batch_sizes = [int(sys.argv[2])] if len(sys.argv) > 2 else [1, 50]
+    readings = make_readings(count)
+
+    for batch_size in batch_sizes:
+        print(f"\n{count} readings, batch size {batch_size}")
+        print(f"{'encoding':<16}{'bytes/reading':>15}{'encode us/reading':>20}{'vs json':>10}")
+        baseline = None
+        for encoding in ENCODINGS:
+            size, micros = bench(encoding, readings, batch_size)
+            baseline = baseline or size
+            print(f"{encoding:<16}{size:>15.1f}{micros:>20.1f}{baseline / size:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Measure the per-record cost of the metrics layer.
+
+Usage: python benchmarks/bench_metrics.py [records]
+"""
+import sys
+import time
+from os.path import dirname, abspath
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from metrics import Registry, instrument
+
+class Target:
+    def call(self):
+        pass
+
+def per_call_ns(fn, count):
+    start = time.perf_counter_ns()
+    for _ in range(count):
+        fn()
+    return (time.perf_counter_ns() - start) / count
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    registry = Registry()
+    histogram = registry.histogram('bench_seconds', 'Benchmark histogram')
+
+    start = time.perf_counter_ns()
+    for _ in range(count):
+        histogram.observe(0.0042)
+    observe_ns = (time.perf_counter_ns() - start) / count
+
+    target = Target()
+    plain_ns = per_call_ns(target.call, count)
+    instrument(target, 'call', registry.histogram('call_seconds', 'Instrumented call'))
+    instrumented_ns = per_call_ns(target.call, count)
+
+    print(f"Histogram.observe:        {observe_ns:8.0f} ns")
+    print(f"Instrumented call added:  {instrumented_ns - plain_ns:8.0f} ns (timer + observe)")
+    print(f"Uninstrumented call:      {plain_ns:8.0f} ns")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Startup benchmark: import cost of main.py and time from process start to first reading.
+
+Runs `python -X importtime -c "import main"` and lists the slowest imports,
+then starts fresh interpreters that build the real SensorManager against a
+fake I2C bus and take one reading, timing each phase.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--bus-latency 0.0002]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from os.path import dirname, abspath
+
+ROOT = dirname(dirname(abspath(__file__)))
+
+CHILD = '''
+import sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+from benchmarks.fakes import FakeSMBus, install_fake_gpio
+install_fake_gpio()
+import smbus2
+smbus2.SMBus = lambda bus_number: FakeSMBus({latency!r})
+import main
+imported = time.perf_counter()
+main.USE_MOCK = False
+main.OUTBOX_PATH = 'outbox.db'
+main.STEPPER_JOURNAL_PATH = 'stepper.json'
+main.ARCHIVE_DIR = ''
+manager = main.SensorManager()
+initialised = time.perf_counter()
+manager.read_sensors()
+read = time.perf_counter()
+assert not manager.mock_mode
+print(imported - started, initialised - imported, read - initialised, flush=True)
+'''
+
+def import_times(top):
+    """(total main import in ms, [(cumulative ms, module)] for the slowest top-level imports)."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'],
+                            cwd=ROOT, capture_output=True, text=True, env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'})
+    modules = []
+    pending = []
+    total = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # A module's own imports are listed before it, indented one level deeper
+        if not name.startswith('  '):
+            if name.strip() == 'main':
+                total = int(cumulative) / 1000
+                modules = pending
+            pending = []
+        elif not name.startswith('    '):
+            pending.append((int(cumulative) / 1000, name.strip()))
+    return total, sorted(modules, reverse=True)[:top]
+
+def first_reading(latency):
+    """Wall time from launching the interpreter to the first reading, and the child's phase timings."""
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', CHILD.format(root=ROOT, latency=latency)],
+                                cwd=workdir, capture_output=True, text=True, check=True)
+        total = time.perf_counter() - start
+    imports, init, read = (float(value) for value in result.stdout.split())
+    return total, imports, init, read
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--bus-latency', type=float, default=0.0002, help='seconds per I2C transaction')
+    args = parser.parse_args()
+
+    total, modules = import_times(8)
+    print(f"import main: {total:.1f} ms")
+    for cumulative, name in modules:
+        print(f"  {cumulative:8.1f} ms  {name}")
+
+    runs = [first_reading(args.bus_latency) for _ in range(args.runs)]
+    print(f"process start to first reading (median of {args.runs}):")
+    for label, index in (('total', 0), ('imports', 1), ('SensorManager()', 2), ('first read_sensors()', 3)):
+        print(f"  {label:<22}{statistics.median(run[index] for run in runs) * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark stepper moves: the old fixed 1 ms + 1 ms sleep loop against the
+trapezoidal, deadline-timed motion engine.
+
+Runs against a fake RPi.GPIO that timestamps every step pulse, so it reports
+move time, how long the caller is blocked and step timing jitter.
+
+Usage: python benchmarks/bench_stepper.py
+"""
+import statistics
+import sys
+import time
+from os.path import dirname, abspath
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from benchmarks.fakes import install_fake_gpio
+
+GPIO = install_fake_gpio()
+
+from motor import StepperController
+from motor.motion import SoftwarePulser
+
+def legacy_move(steps):
+    """The pulse loop StepperController used before the motion engine."""
+    for _ in range(steps):
+        GPIO.output(StepperController.STEP_PIN, GPIO.HIGH)
+        time.sleep(0.001)
+        GPIO.output(StepperController.STEP_PIN, GPIO.LOW)
+        time.sleep(0.001)
+
+def jitter(edges, planned):
+    """Standard deviation of the gap between step edges and the planned interval, in microseconds."""
+    errors = [(b - a) - p for a, b, p in zip(edges, edges[1:], planned[1:])]
+    return statistics.pstdev(errors) * 1e6
+
+def report(name, elapsed, blocked, edges, planned):
+    print(f"{name:<22}{elapsed * 1000:>10.1f}{blocked * 1000:>12.2f}{jitter(edges, planned):>14.1f}")
+
+def main():
+    steps = StepperController.TOTAL_STEPS
+    print(f"Full sweep of {steps} steps")
+    print(f"{'':<22}{'move ms':>10}{'blocked ms':>12}{'jitter us':>14}")
+
+    GPIO.edges.clear()
+    start = time.perf_counter()
+    legacy_move(steps)
+    elapsed = time.perf_counter() - start
+    report('legacy sleep loop', elapsed, elapsed, GPIO.edges[StepperController.STEP_PIN], [0.002] * steps)
+
+    stepper = StepperController(mock_mode=False)
+    stepper.pulser = SoftwarePulser(GPIO, stepper.STEP_PIN, stepper.DIR_PIN)
+    GPIO.edges.clear()
+    start = time.perf_counter()
+    future = stepper.move_to_position_async(1.0)
+    blocked = time.perf_counter() - start
+    future.result()
+    elapsed = time.perf_counter() - start
+    report('trapezoidal engine', elapsed, blocked, GPIO.edges[stepper.STEP_PIN], stepper.motion_profile(steps))
+    stepper.cleanup()
+
+    mock = StepperController(mock_mode=True, simulate_motion=True)
+    start = time.perf_counter()
+    mock.move_to_position(1.0)
+    print(f"\nSimulated mock sweep: {(time.perf_counter() - start) * 1000:.1f} ms "
+          f"(legacy loop would take at least {steps * 2} ms)")
+    mock.cleanup()
+
+if __name__ == "__main__":
+    main()
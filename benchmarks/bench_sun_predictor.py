@@ -0,0 +1,47 @@
+"""Microbenchmark for SunPredictor.get_sun_position.
+
+Compares calls per second with the ephemeris cache disabled (astral on every
+call, as before the cache existed), with the per-date LRU cache, and with a
+precomputed yearly table.
+
+Usage: python benchmarks/bench_sun_predictor.py [calls]
+"""
+import logging
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from os.path import dirname, abspath
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from motor import SunPredictor
+from config import LATITUDE, LONGITUDE
+
+def bench(predictor, times):
+    start = time.perf_counter()
+    for t in times:
+        predictor.get_sun_position(t)
+    return len(times) / (time.perf_counter() - start)
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    # Log at INFO into a null handler so message formatting is still paid for
+    logging.basicConfig(level=logging.INFO, handlers=[logging.NullHandler()])
+
+    base = datetime(2025, 6, 21, 4, tzinfo=timezone.utc)
+    times = [base + timedelta(seconds=60 * i) for i in range(calls)]
+
+    uncached = SunPredictor(LATITUDE, LONGITUDE, cache_size=0)
+    cached = SunPredictor(LATITUDE, LONGITUDE)
+    table = SunPredictor(LATITUDE, LONGITUDE)
+    table.build_ephemeris_table(2025)
+
+    results = {
+        'uncached': bench(uncached, times[:max(1, calls // 10)]),
+        'lru cache': bench(cached, times),
+        'year table': bench(table, times),
+    }
+    for name, rate in results.items():
+        print(f"{name:<12}{rate:>14,.0f} calls/s{rate / results['uncached']:>10.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Hardware stand-ins shared by the benchmarks."""
+import sys
+import types
+from time import perf_counter, sleep
+
+def install_fake_gpio():
+    """Install a fake RPi.GPIO module that records when each pin goes high.
+
+    Returns the fake module; its `edges` dict maps pin -> list of perf_counter()
+    timestamps of rising edges.
+    """
+    gpio = types.ModuleType('RPi.GPIO')
+    gpio.BCM = 'BCM'
+    gpio.OUT = 'OUT'
+    gpio.IN = 'IN'
+    gpio.HIGH = 1
+    gpio.LOW = 0
+    gpio.PUD_UP = 'PUD_UP'
+    gpio.edges = {}
+    gpio.levels = {}
+
+    def output(pin, level):
+        if level and not gpio.levels.get(pin):
+            gpio.edges.setdefault(pin, []).append(perf_counter())
+        gpio.levels[pin] = level
+
+    gpio.setmode = lambda mode: None
+    gpio.setup = lambda pin, mode, **kwargs: None
+    gpio.output = output
+    gpio.input = lambda pin: gpio.levels.get(pin, 0)
+    gpio.cleanup = lambda: None
+
+    package = types.ModuleType('RPi')
+    package.GPIO = gpio
+    sys.modules['RPi'] = package
+    sys.modules['RPi.GPIO'] = gpio
+    return gpio
+
+class FakeSMBus:
+    """smbus2.SMBus stand-in returning zeroed registers after a fixed per-transaction latency."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.transactions = 0
+
+    def _transaction(self):
+        self.transactions += 1
+        if self.latency:
+            sleep(self.latency)
+
+    def write_byte_data(self, addr, reg, value):
+        self._transaction()
+
+    def write_i2c_block_data(self, addr, reg, data):
+        self._transaction()
+
+    def read_byte_data(self, addr, reg):
+        self._transaction()
+        return 0
+
+    def read_i2c_block_data(self, addr, reg, length):
+        self._transaction()
+        return [0] * length
+
+    def close(self):
+        pass
@@ -0,0 +1,228 @@
+"""End-to-end benchmark suite for the SensorManager main loop.
+
+Drives the real SensorManager against a fake SMBus (with a configurable
+per-transaction latency), a fake RPi.GPIO and a local HTTP stand-in for
+ENDPOINT_URL, then writes the metrics to a JSON file. Any metric past its
+limit in the thresholds file (a maximum, or a minimum for keys ending in
+_min) fails the run with exit status 1.
+
+Usage: python benchmarks/run_benchmarks.py [--bus-latency 0.0002] [--cycles 50]
+                                            [--output bench_results.json]
+                                            [--thresholds benchmarks/thresholds.json]
+"""
+import argparse
+import json
+import logging
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from os.path import dirname, abspath, join
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from benchmarks.fakes import FakeSMBus, install_fake_gpio
+from benchmarks.standin import IngestStandIn
+
+GPIO = install_fake_gpio()
+
+import main
+import log_setup
+import smbus2
+from sensors import MockSensor
+
+class StopLoop(BaseException):
+    """Raised from inside SensorManager.run to end the measured loop."""
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def configure(args, endpoint, workdir):
+    """Point main's configuration at the stand-ins before a SensorManager is built."""
+    main.USE_MOCK = False
+    main.UPLINK_TRANSPORT = 'http'
+    main.ENDPOINT_URL = endpoint
+    main.READ_INTERVAL = args.interval
+    main.OUTBOX_PATH = join(workdir, 'outbox.db')
+    main.STEPPER_JOURNAL_PATH = join(workdir, 'stepper.json')
+    main.ARCHIVE_DIR = join(workdir, 'archive')
+    main.UPLOAD_LINGER = 0.05
+    main.UPLOAD_QUEUE_SIZE = max(main.UPLOAD_QUEUE_SIZE, args.uploads)
+    smbus2.SMBus = lambda bus_number: FakeSMBus(args.bus_latency)
+
+def bench_read_sensors(manager, cycles):
+    latencies = []
+    for _ in range(cycles):
+        start = time.perf_counter()
+        manager.read_sensors()
+        latencies.append(time.perf_counter() - start)
+    return {
+        'read_sensors_p50_ms': percentile(latencies, 0.5) * 1000,
+        'read_sensors_p95_ms': percentile(latencies, 0.95) * 1000,
+        'bus_transactions_per_cycle': manager.acquisition.last_timing['transactions'],
+        'bus_bytes_per_cycle': manager.acquisition.last_timing['bytes'],
+    }
+
+def bench_loop(manager, cycles, interval):
+    """Run the real main loop for `cycles` iterations and measure its period."""
+    starts = []
+    read_sensors = manager.read_sensors
+
+    def timed_read():
+        starts.append(time.perf_counter())
+        if len(starts) > cycles:
+            raise StopLoop()
+        return read_sensors()
+
+    manager.read_sensors = timed_read
+    try:
+        manager.run()
+    except StopLoop:
+        pass
+    finally:
+        manager.read_sensors = read_sensors
+
+    periods = [b - a for a, b in zip(starts, starts[1:])]
+    errors = [p - interval for p in periods]
+    return {
+        'loop_period_mean_ms': statistics.mean(periods) * 1000,
+        'loop_jitter_ms': statistics.pstdev(errors) * 1000,
+        'loop_overrun_max_ms': max(errors) * 1000,
+    }
+
+def bench_upload(manager, standin, count):
+    """Readings per second through the uploader, outbox and HTTP stand-in."""
+    readings = [MockSensor().get_mock_data() for _ in range(count)]
+    received = standin.readings
+    manager.uploader.start()
+    start = time.perf_counter()
+    for reading in readings:
+        manager.uploader.submit(reading)
+    while standin.readings - received < count and time.perf_counter() - start < 60:
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - start
+    manager.uploader.stop()
+    return {
+        'upload_readings_per_s': (standin.readings - received) / elapsed,
+        'upload_requests': standin.requests,
+    }
+
+def _log_cost(manager, cycles):
+    """(records, seconds) of logging done on this thread over `cycles` reads."""
+    log = logging.Logger._log
+    reader = threading.get_ident()
+    cost = [0, 0.0]
+
+    def timed_log(self, *args, **kwargs):
+        if threading.get_ident() != reader:
+            return log(self, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return log(self, *args, **kwargs)
+        finally:
+            cost[0] += 1
+            cost[1] += time.perf_counter() - start
+
+    logging.Logger._log = timed_log
+    try:
+        for _ in range(cycles):
+            manager.read_sensors()
+    finally:
+        logging.Logger._log = log
+    return cost
+
+def bench_logging(manager, cycles, workdir):
+    """Logging cost paid by the reading loop per cycle at INFO, queued and with a plain FileHandler."""
+    root = logging.getLogger()
+    level, handlers = root.level, root.handlers[:]
+    listener_handlers = main.log_listener.handlers
+    root.setLevel(logging.INFO)
+    # The writer thread keeps only the log file, so the console stays readable
+    main.log_listener.handlers = tuple(h for h in listener_handlers if isinstance(h, logging.FileHandler))
+    try:
+        records, queued = _log_cost(manager, cycles)
+        # What the same cycles cost with the synchronous file handler used before
+        sync = logging.FileHandler(join(workdir, 'sync.log'))
+        sync.setFormatter(logging.Formatter(log_setup.FORMAT))
+        for handler in handlers:
+            root.removeHandler(handler)
+        root.addHandler(sync)
+        _, direct = _log_cost(manager, cycles)
+        root.removeHandler(sync)
+        sync.close()
+    finally:
+        for handler in handlers:
+            root.addHandler(handler)
+        root.setLevel(level)
+        main.log_listener.handlers = listener_handlers
+    return {
+        'log_records_per_cycle': records / cycles,
+        'log_us_per_cycle': queued / cycles * 1e6,
+        'log_us_per_cycle_sync': direct / cycles * 1e6,
+    }
+
+def bench_stepper(manager):
+    stepper = manager.stepper
+    stepper.move_to_position(0.0)
+    start = time.perf_counter()
+    stepper.move_to_position(1.0)
+    return {'stepper_full_sweep_ms': (time.perf_counter() - start) * 1000}
+
+def check_thresholds(results, thresholds):
+    """Return the metrics that break their limits. Keys ending in _min are lower bounds."""
+    failures = []
+    for key, limit in thresholds.items():
+        metric, lower_bound = (key[:-4], True) if key.endswith('_min') else (key, False)
+        if metric not in results:
+            continue
+        value = results[metric]
+        if (value < limit) if lower_bound else (value > limit):
+            failures.append(f"{metric} = {value:.3f} ({'below minimum' if lower_bound else 'above maximum'} {limit})")
+    return failures
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bus-latency', type=float, default=0.0002, help='seconds per I2C transaction')
+    parser.add_argument('--cycles', type=int, default=50, help='sample cycles to measure')
+    parser.add_argument('--interval', type=float, default=0.1, help='main loop READ_INTERVAL in seconds')
+    parser.add_argument('--uploads', type=int, default=2000, help='readings pushed through the uploader')
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--thresholds', default=join(dirname(abspath(__file__)), 'thresholds.json'))
+    args = parser.parse_args()
+
+    with IngestStandIn() as standin, tempfile.TemporaryDirectory() as workdir:
+        configure(args, standin.url, workdir)
+        logging.getLogger().setLevel(logging.WARNING)
+        manager = main.SensorManager()
+        if manager.mock_mode:
+            raise SystemExit("SensorManager fell back to mock mode, the benchmark needs the hardware path")
+
+        results = {'bus_latency_s': args.bus_latency}
+        results.update(bench_read_sensors(manager, args.cycles))
+        results.update(bench_logging(manager, args.cycles, workdir))
+        results.update(bench_stepper(manager))
+        results.update(bench_loop(manager, args.cycles, args.interval))
+
+        manager = main.SensorManager()
+        results.update(bench_upload(manager, standin, args.uploads))
+        manager.stepper.cleanup()
+
+    results['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    with open(args.thresholds) as f:
+        thresholds = json.load(f)
+    failures = check_thresholds(results, thresholds)
+    results['passed'] = not failures
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    for key, value in results.items():
+        print(f"{key:<28}{value}")
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main_benchmark())
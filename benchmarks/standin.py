@@ -0,0 +1,158 @@
+"""Local stand-in for the ingest endpoint, used by the benchmarks and the fleet simulator.
+
+Usage: python benchmarks/standin.py [--port 8080] [--stream-port 9000] [--latency 0.0]
+"""
+import argparse
+import json
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os.path import dirname, abspath
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from uplink import decode_payload
+from uplink.transport import HELLO, WELCOME, DATA, ACK, pack_frame, read_frame, pack_seq, unpack_seq
+
+class IngestStandIn:
+    """HTTP server on localhost that decodes every upload and counts what it received.
+
+    `latency` delays each response, and `fail` makes it answer 503, to mimic a
+    slow or unavailable endpoint.
+    """
+
+    def __init__(self, latency=0.0, port=0):
+        self.latency = latency
+        self.fail = False
+        self.requests = 0
+        self.readings = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if standin.latency:
+                    time.sleep(standin.latency)
+                if standin.fail:
+                    self.send_response(503)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                readings = decode_payload(body, self.headers)
+                with standin._lock:
+                    standin.requests += 1
+                    standin.readings += len(readings)
+                    standin.bytes += len(body)
+                self.send_response(200)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/ingest"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+class StreamStandIn:
+    """TCP server on localhost speaking the uplink stream protocol, see uplink.transport.
+
+    Keeps the highest sequence number accepted from each device, so frames
+    resent after a reconnect are acked but not counted twice. `drop_after`
+    closes a connection without acking once it has received that many DATA
+    frames, to exercise reconnect and resume.
+    """
+
+    def __init__(self, port=0, drop_after=None):
+        self.drop_after = drop_after
+        self.connections = 0
+        self.frames = 0
+        self.duplicates = 0
+        self.readings = 0
+        self.bytes = 0
+        self.received = []
+        self.last_seq = {}
+        self._lock = threading.Lock()
+        standin = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                kind, body = read_frame(self.rfile)
+                if kind != HELLO:
+                    return
+                hello = json.loads(body)
+                device, headers = hello['device_id'], hello['headers']
+                with standin._lock:
+                    standin.connections += 1
+                    self.wfile.write(pack_frame(WELCOME, pack_seq(standin.last_seq.get(device, 0))))
+                received = 0
+                while True:
+                    try:
+                        kind, body = read_frame(self.rfile)
+                    except ConnectionError:
+                        return
+                    if kind != DATA:
+                        return
+                    received += 1
+                    if standin.drop_after is not None and received > standin.drop_after:
+                        return
+                    seq = unpack_seq(body)
+                    with standin._lock:
+                        if seq <= standin.last_seq.get(device, 0):
+                            standin.duplicates += 1
+                        else:
+                            readings = decode_payload(body[8:], headers)
+                            standin.frames += 1
+                            standin.readings += len(readings)
+                            standin.bytes += len(body) + 5
+                            standin.received.extend(readings)
+                            standin.last_seq[device] = seq
+                        self.wfile.write(pack_frame(ACK, pack_seq(standin.last_seq[device])))
+
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"tcp://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the ingest endpoint')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--stream-port', type=int, default=9000, help='port for the stream protocol')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    args = parser.parse_args()
+    with IngestStandIn(latency=args.latency, port=args.port) as standin, \
+            StreamStandIn(port=args.stream_port) as stream:
+        print(f"Accepting uploads at {standin.url} and {stream.url}, Ctrl-C to stop")
+        try:
+            while True:
+                time.sleep(10)
+                print(f"{standin.requests} requests, {standin.readings} readings, {standin.bytes} bytes")
+                print(f"{stream.frames} frames, {stream.readings} readings, {stream.bytes} bytes "
+                      f"over {stream.connections} connections")
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Clocks for the control loop: the real one, and a virtual one for simulations.
+
+The reading loop, the panel scheduler, the sun predictor and the mock sensor
+take a clock instead of calling time.time(), time.sleep() and datetime.now()
+directly. SystemClock is the default. A VirtualClock lets soak_sim.py run a
+year of tracking, sampling and uploading in however long the work itself
+takes.
+"""
+import math
+import threading
+import time
+from datetime import datetime
+
+class SystemClock:
+    """The real clock."""
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def now(self, tz=None):
+        return datetime.now(tz)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def wait(self, event, timeout=None):
+        """event.wait(timeout): True once event is set, False if the timeout passed first."""
+        return event.wait(timeout)
+
+    def attach(self):
+        pass
+
+    def detach(self):
+        pass
+
+class VirtualClock:
+    """Simulated time that jumps straight to the next wake-up instead of waiting for it.
+
+    Threads that wait on the clock must be attached to it: whoever starts such
+    a thread calls attach() first, and the thread calls detach() when it
+    finishes. Attach every thread before starting any of them, or the first
+    one runs ahead on its own. Time stands still while any attached thread is busy. Once they
+    are all waiting, it jumps to the earliest of their deadlines, so runs are
+    repeatable however fast the host is. A thread that an attached thread is
+    blocked on, such as the stepper's move executor, may wait without
+    attaching in its place. Events set from outside a wait are noticed within
+    `poll` seconds of real time.
+    """
+
+    def __init__(self, start=0.0, poll=0.01):
+        self._start = self._now = float(start)
+        self.poll = poll
+        self._attached = 0
+        self._waiters = []  # [deadline, condition] per waiting thread
+        self._lock = threading.Lock()
+
+    def time(self):
+        return self._now
+
+    def monotonic(self):
+        return self._now - self._start
+
+    def now(self, tz=None):
+        return datetime.fromtimestamp(self._now, tz)
+
+    def sleep(self, seconds):
+        self.wait(None, seconds)
+
+    def wait(self, event, timeout=None):
+        """Wait in simulated time until event (None for none) is set or timeout seconds pass."""
+        with self._lock:
+            deadline = math.inf if timeout is None else self._now + max(timeout, 0.0)
+            waiter = [deadline, threading.Condition(self._lock)]
+            self._waiters.append(waiter)
+            try:
+                while not (event is not None and event.is_set()) and self._now < deadline:
+                    self._advance()
+                    if self._now < deadline:
+                        waiter[1].wait(self.poll)
+            finally:
+                self._waiters.remove(waiter)
+        return event is not None and event.is_set()
+
+    def attach(self):
+        with self._lock:
+            self._attached += 1
+
+    def detach(self):
+        with self._lock:
+            self._attached -= 1
+            for _, condition in self._waiters:
+                condition.notify()
+
+    def _advance(self):
+        # Only once every attached thread is waiting; a deadline already due means someone still has to run
+        if len(self._waiters) < self._attached:
+            return
+        earliest = min(deadline for deadline, _ in self._waiters)
+        if self._now < earliest < math.inf:
+            self._now = earliest
+            # Wake only the threads now due, so the others do not race the one running
+            for deadline, condition in self._waiters:
+                if deadline <= earliest:
+                    condition.notify()
@@ -10,12 +10,94 @@ LTR390_ADDR = 0x53
 ICM20948_ADDR = 0x68
 SGP40_ADDR = 0x59
 
+# ICM20948 FIFO streaming
+ICM_STREAM_RATE = float(os.getenv('ICM_STREAM_RATE', '0'))  # Hz; 0 takes one snapshot per READ_INTERVAL
+ICM_STREAM_BUFFER = int(os.getenv('ICM_STREAM_BUFFER', '32768'))  # samples kept between reports
+ICM_ACCEL_THRESHOLD = float(os.getenv('ICM_ACCEL_THRESHOLD', '0.5'))  # g away from the window mean that counts as an event
+ICM_GYRO_THRESHOLD = float(os.getenv('ICM_GYRO_THRESHOLD', '100'))  # degrees/s away from the window mean
+
+# I2C record/replay for profiling off-device
+I2C_TRACE_PATH = os.getenv('I2C_TRACE_PATH', '')  # record every bus transaction to this file
+I2C_REPLAY_PATH = os.getenv('I2C_REPLAY_PATH', '')  # answer bus transactions from this recorded trace instead of hardware
+I2C_REPLAY_REALTIME = os.getenv('I2C_REPLAY_REALTIME', 'false').lower() == 'true'  # replay at recorded speed
+
 # Configuration from environment variables
 ENDPOINT_URL = os.getenv('ENDPOINT_URL', 'https://httpbin.org/post')  # Default to httpbin for testing
+PAYLOAD_ENCODING = os.getenv('PAYLOAD_ENCODING', 'json')  # json, json+gzip, columnar, columnar+gzip or columnar+zstd
+UPLINK_TRANSPORT = os.getenv('UPLINK_TRANSPORT', 'http')  # http (POST to ENDPOINT_URL) or stream (persistent TCP to STREAM_ENDPOINT)
+STREAM_ENDPOINT = os.getenv('STREAM_ENDPOINT', 'tcp://localhost:9000')  # host:port of the streaming ingest server
 READ_INTERVAL = int(os.getenv('READ_INTERVAL', '60'))  # seconds
+SAMPLE_INTERVAL = float(os.getenv('SAMPLE_INTERVAL', str(READ_INTERVAL)))  # seconds; below READ_INTERVAL, reports carry window aggregates
+BUFFER_RETENTION = int(os.getenv('BUFFER_RETENTION', '3600'))  # seconds of samples kept in memory
+ADAPTIVE_SAMPLING = os.getenv('ADAPTIVE_SAMPLING', 'false').lower() == 'true'  # tune each sensor's interval to how fast it changes
+ADAPTIVE_MIN_INTERVAL = float(os.getenv('ADAPTIVE_MIN_INTERVAL', '5'))  # shortest per-sensor interval, seconds
+ADAPTIVE_MAX_INTERVAL = float(os.getenv('ADAPTIVE_MAX_INTERVAL', '600'))  # longest per-sensor interval, seconds
+ADAPTIVE_TWILIGHT = float(os.getenv('ADAPTIVE_TWILIGHT', '1800'))  # light sensors run at the minimum interval this close to sunrise/sunset, seconds
+SENSOR_FAILURE_THRESHOLD = int(os.getenv('SENSOR_FAILURE_THRESHOLD', '3'))  # consecutive failed reads before a sensor is skipped
+SENSOR_PROBE_BACKOFF = float(os.getenv('SENSOR_PROBE_BACKOFF', '30'))  # seconds before re-probing a skipped sensor, doubling per failed probe
+SENSOR_PROBE_MAX_BACKOFF = float(os.getenv('SENSOR_PROBE_MAX_BACKOFF', '1800'))  # longest wait between probes, seconds
+UPLOAD_QUEUE_SIZE = int(os.getenv('UPLOAD_QUEUE_SIZE', '1000'))  # readings held in memory awaiting upload
+UPLOAD_BATCH_SIZE = int(os.getenv('UPLOAD_BATCH_SIZE', '50'))  # max readings per POST
+UPLOAD_LINGER = float(os.getenv('UPLOAD_LINGER', '5'))  # seconds to wait for a batch to fill
+UPLOAD_STOP_TIMEOUT = float(os.getenv('UPLOAD_STOP_TIMEOUT', '10'))  # seconds at shutdown in which new sends may start
+OUTBOX_PATH = os.getenv('OUTBOX_PATH', 'outbox.db')  # on-disk store-and-forward buffer, empty to disable
+OUTBOX_MAX_READINGS = int(os.getenv('OUTBOX_MAX_READINGS', '100000'))  # oldest evicted beyond this
+OUTBOX_MAX_AGE = float(os.getenv('OUTBOX_MAX_AGE', str(7 * 86400)))  # seconds before unsent readings expire
+OUTBOX_SYNC_INTERVAL = float(os.getenv('OUTBOX_SYNC_INTERVAL', '60'))  # max seconds between fsyncs
+OUTBOX_REPLAY_BATCH = int(os.getenv('OUTBOX_REPLAY_BATCH', '500'))  # readings per POST when catching up
+REPORTING_MODE = os.getenv('REPORTING_MODE', 'full')  # 'full' or 'deadband' (only fields that moved past their threshold)
+DEADBAND_THRESHOLDS = os.getenv('DEADBAND_THRESHOLDS', (
+    'bme280.temperature=0.1,bme280.pressure=0.5,bme280.humidity=1,'
+    'tsl2591.visible_light=5%,tsl2591.ir_light=5%,tsl2591.lux=5%,'
+    'ltr390.uv_raw=5%,ltr390.uv_index=0.1,sgp40.voc_raw=2%,sgp40.voc_index=5,'
+    'icm20948.accelerometer.x=0.05,icm20948.accelerometer.y=0.05,icm20948.accelerometer.z=0.05,'
+    'icm20948.gyroscope.x=5,icm20948.gyroscope.y=5,icm20948.gyroscope.z=5'
+))  # field=absolute or field=relative%
+KEYFRAME_INTERVAL = float(os.getenv('KEYFRAME_INTERVAL', '3600'))  # seconds between full readings in deadband mode
 USE_MOCK = os.getenv('USE_MOCK', 'false').lower() == 'false'
 
+# Local history archive
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', 'archive')  # daily compressed segments, empty to disable
+ARCHIVE_BLOCK_SIZE = int(os.getenv('ARCHIVE_BLOCK_SIZE', '60'))  # readings buffered before each write
+ARCHIVE_PRECISION = os.getenv(
+    'ARCHIVE_PRECISION',  # field=step pairs stored as multiples of step, other fields are kept losslessly
+    'bme280.temperature=0.01,bme280.pressure=0.01,bme280.humidity=0.01,tsl2591.lux=0.1,ltr390.uv_index=0.001,'
+    'icm20948.accelerometer.x=0.001,icm20948.accelerometer.y=0.001,icm20948.accelerometer.z=0.001,'
+    'icm20948.gyroscope.x=0.1,icm20948.gyroscope.y=0.1,icm20948.gyroscope.z=0.1'
+)
+
 # Device identification and location
 DEVICE_ID = os.getenv('DEVICE_ID', 'pi-0001')  # Unique identifier for this device
 LATITUDE = float(os.getenv('LATITUDE', '51.5007')) 
-LONGITUDE = float(os.getenv('LONGITUDE', '0.1246'))
\ No newline at end of file
+LONGITUDE = float(os.getenv('LONGITUDE', '0.1246'))
+EPHEMERIS_TABLE_PATH = os.getenv('EPHEMERIS_TABLE_PATH', '')  # precomputed yearly sun times, empty to compute per day
+
+# Panel tracking
+PANEL_UPDATE_MODE = os.getenv('PANEL_UPDATE_MODE', 'scheduled')  # 'scheduled' (move when the target step changes) or 'interval' (every READ_INTERVAL)
+PANEL_STEP_QUANTUM = int(os.getenv('PANEL_STEP_QUANTUM', '1'))  # move in multiples of this many steps when scheduled
+STEPPER_JOURNAL_PATH = os.getenv('STEPPER_JOURNAL_PATH', 'stepper_position.json')  # step count kept across restarts, empty to disable
+HOME_SWITCH_PIN = int(os.getenv('HOME_SWITCH_PIN')) if os.getenv('HOME_SWITCH_PIN') else None  # optional east limit switch (BCM, active low)
+
+# Metrics endpoint (Prometheus text format), disabled unless a port or socket is set
+METRICS_PORT = int(os.getenv('METRICS_PORT')) if os.getenv('METRICS_PORT') else None  # served on 127.0.0.1
+METRICS_SOCKET = os.getenv('METRICS_SOCKET', '')  # Unix socket path
+
+# Logging, written by a background thread
+LOG_FILE = os.getenv('LOG_FILE', 'sensor_app.log')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(5 * 1024 * 1024)))  # rotate the log file beyond this size
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN', '')  # rotate on a schedule instead, e.g. 'midnight' or 'H'
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '5'))  # rotated files kept
+LOG_COMPRESS = os.getenv('LOG_COMPRESS', 'true').lower() == 'true'  # gzip rotated files
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))  # records waiting for the writer; more are dropped
+LOG_RATE_BURST = int(os.getenv('LOG_RATE_BURST', '10'))  # records per call site per window, 0 for no limit
+LOG_RATE_WINDOW = float(os.getenv('LOG_RATE_WINDOW', '60'))  # seconds
+
+# Runtime: 'single' runs everything in this process, 'multiprocess' runs sampling,
+# panel tracking and uploads in separate supervised worker processes
+RUNTIME_MODE = os.getenv('RUNTIME_MODE', 'single')
+RUNTIME_RING_SLOTS = int(os.getenv('RUNTIME_RING_SLOTS', '1024'))  # readings the shared-memory ring holds for the uploader
+RUNTIME_SLOT_SIZE = int(os.getenv('RUNTIME_SLOT_SIZE', '8192'))  # bytes per ring slot, larger readings are dropped
+RUNTIME_PIN_CPUS = os.getenv('RUNTIME_PIN_CPUS', 'true').lower() == 'true'  # one core per worker when the Pi has enough
+RUNTIME_RESTART_BACKOFF = float(os.getenv('RUNTIME_RESTART_BACKOFF', '1'))  # seconds before restarting a crashed worker, doubling
+RUNTIME_RESTART_MAX_BACKOFF = float(os.getenv('RUNTIME_RESTART_MAX_BACKOFF', '60'))  # longest wait before a restart, seconds
@@ -0,0 +1,222 @@
+"""Simulate a fleet of devices posting readings to an ingest endpoint.
+
+Every device runs as a coroutine in one asyncio process. Each device has its
+own DEVICE_ID and coordinates, sends a reading every --interval seconds, and
+is staggered evenly across the interval. Requests go out over a pool of
+keep-alive HTTP/1.1 connections. At the end the simulator reports requests/s
+achieved, latency percentiles, the error rate and how far devices fell behind
+their schedule. A large schedule lag means this process, not the endpoint,
+was the bottleneck.
+
+Usage: python fleet_sim.py --devices 2000 --interval 10 --duration 60
+                           [--endpoint URL] [--encoding json] [--batch 1]
+                           [--connections 200] [--seed 0] [--standin]
+                           [--output fleet_results.json]
+"""
+import argparse
+import asyncio
+import json
+import ssl
+import sys
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from config import ENDPOINT_URL, PAYLOAD_ENCODING
+from sensors.mock_fleet import MockFleet
+from uplink import PayloadEncoder
+
+class HTTPConnectionPool:
+    """Minimal asyncio HTTP/1.1 client that POSTs over at most `size` keep-alive connections."""
+
+    def __init__(self, url, size):
+        parts = urlsplit(url)
+        self.tls = parts.scheme == 'https'
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.tls else 80)
+        self.path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        self.slots = asyncio.Semaphore(size)
+        self.idle = []
+        self.connections = 0
+
+    async def _connect(self):
+        self.connections += 1
+        return await asyncio.open_connection(self.host, self.port, ssl=ssl.create_default_context() if self.tls else None)
+
+    async def post(self, body, headers):
+        """POST body and return the response status."""
+        async with self.slots:
+            reused = bool(self.idle)
+            connection = self.idle.pop() if reused else await self._connect()
+            try:
+                status, keep_alive = await self._exchange(connection, body, headers)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                connection[1].close()
+                if not reused:
+                    raise
+                # The server closed an idle connection, try once more on a fresh one
+                connection = await self._connect()
+                status, keep_alive = await self._exchange(connection, body, headers)
+            except BaseException:
+                connection[1].close()
+                raise
+            if keep_alive:
+                self.idle.append(connection)
+            else:
+                connection[1].close()
+            return status
+
+    async def _exchange(self, connection, body, headers):
+        reader, writer = connection
+        lines = [f"POST {self.path} HTTP/1.1", f"Host: {self.host}", f"Content-Length: {len(body)}"]
+        lines.extend(f"{key}: {value}" for key, value in headers.items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed before a response")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            response_headers[key.strip().lower()] = value.strip()
+
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif 'content-length' in response_headers:
+            await reader.readexactly(int(response_headers['content-length']))
+        else:
+            await reader.read()
+            return status, False
+        return status, response_headers.get('connection', '').lower() != 'close'
+
+    async def close(self):
+        for _, writer in self.idle:
+            writer.close()
+        self.idle = []
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+class FleetStats:
+    def __init__(self):
+        self.latencies = []
+        self.lags = []
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.readings = 0
+
+    def summary(self, elapsed):
+        requests = len(self.latencies)
+        failed = sum(count for status, count in self.statuses.items() if status >= 400) + sum(self.errors.values())
+        return {
+            'requests': requests,
+            'readings': self.readings,
+            'elapsed_s': elapsed,
+            'requests_per_s': requests / elapsed if elapsed else 0.0,
+            'readings_per_s': self.readings / elapsed if elapsed else 0.0,
+            'latency_p50_ms': percentile(self.latencies, 0.5) * 1000,
+            'latency_p90_ms': percentile(self.latencies, 0.9) * 1000,
+            'latency_p99_ms': percentile(self.latencies, 0.99) * 1000,
+            'latency_max_ms': max(self.latencies, default=0.0) * 1000,
+            'error_rate': failed / requests if requests else 0.0,
+            'schedule_lag_p99_ms': percentile(self.lags, 0.99) * 1000,
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+            'errors': dict(self.errors),
+        }
+
+async def run_device(index, fleet, pool, encoder, args, stats, start, deadline):
+    loop = asyncio.get_running_loop()
+    offset = args.interval * index / len(fleet)
+    batch = []
+    tick = 0
+    while True:
+        due = start + offset + tick * args.interval
+        if due >= deadline:
+            break
+        await asyncio.sleep(max(0.0, due - loop.time()))
+        stats.lags.append(loop.time() - due)
+        batch.append(fleet.reading(index, tick, time.time()))
+        tick += 1
+        if len(batch) < args.batch:
+            continue
+
+        body, headers = encoder.encode(batch if args.batch > 1 else batch[0])
+        sent = loop.time()
+        try:
+            status = await asyncio.wait_for(pool.post(body, headers), args.timeout)
+            stats.statuses[status] += 1
+            if status < 400:
+                stats.readings += len(batch)
+        except Exception as e:
+            stats.errors[type(e).__name__] += 1
+        stats.latencies.append(loop.time() - sent)
+        batch = []
+
+async def run_simulation(args):
+    """Run the fleet for args.duration seconds and return the summary."""
+    fleet = MockFleet(args.devices, seed=args.seed)
+    pool = HTTPConnectionPool(args.endpoint, args.connections)
+    encoder = PayloadEncoder(args.encoding)
+    stats = FleetStats()
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    deadline = start + args.duration
+    try:
+        await asyncio.gather(*(run_device(i, fleet, pool, encoder, args, stats, start, deadline)
+                               for i in range(args.devices)))
+    finally:
+        await pool.close()
+    summary = stats.summary(loop.time() - start)
+    summary['connections_opened'] = pool.connections
+    return summary
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--devices', type=int, default=1000)
+    parser.add_argument('--interval', type=float, default=10.0, help='seconds between readings per device')
+    parser.add_argument('--duration', type=float, default=60.0, help='seconds to run')
+    parser.add_argument('--endpoint', default=ENDPOINT_URL)
+    parser.add_argument('--encoding', default=PAYLOAD_ENCODING)
+    parser.add_argument('--batch', type=int, default=1, help='readings per request')
+    parser.add_argument('--connections', type=int, default=200, help='maximum concurrent connections')
+    parser.add_argument('--timeout', type=float, default=10.0, help='seconds before a request counts as failed')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--standin', action='store_true', help='post to an in-process ingest stand-in instead')
+    parser.add_argument('--output', help='also write the summary to this JSON file')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    standin = None
+    if args.standin:
+        from benchmarks.standin import IngestStandIn
+        standin = IngestStandIn().__enter__()
+        args.endpoint = standin.url
+    print(f"Simulating {args.devices} devices every {args.interval}s for {args.duration}s against {args.endpoint}")
+    try:
+        summary = asyncio.run(run_simulation(args))
+    finally:
+        if standin:
+            standin.__exit__(None, None, None)
+    if standin:
+        summary['standin_readings'] = standin.readings
+
+    for key, value in summary.items():
+        print(f"{key:<24}{value:.2f}" if isinstance(value, float) else f"{key:<24}{value}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""Logging for the sensor node: queued, rotated, compressed and rate-limited.
+
+Log calls only build a LogRecord and put it on a queue. Formatting, including
+the %-style arguments of lazily formatted messages, and all file and console
+writes happen on a background listener thread, so a slow SD card never
+blocks the reading loop. The log file is rotated by size, or by time when
+`when` is set, and rotated files are gzip-compressed. A per-call-site rate
+limit keeps a message that fires every cycle (a failing sensor, a full
+upload queue) from flooding the log. Worker processes of the multi-process
+runtime forward their records to the parent's writer, so only one process
+ever writes or rotates the log file.
+"""
+import atexit
+import gzip
+import logging
+import os
+import queue
+import shutil
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
+FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_listeners = []  # started by setup_logging in this process
+_forwarding = False  # set in worker processes by forward_logging
+
+class RateLimitFilter(logging.Filter):
+    """Lets at most `burst` records per `window` seconds through from each call site.
+
+    Call sites are told apart by file and line, so a message that repeats
+    every cycle is limited without affecting others. The first record after
+    a window in which records were held back says how many were suppressed.
+    Records at CRITICAL always pass.
+    """
+
+    def __init__(self, burst=10, window=60.0):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.suppressed = 0
+        self._sites = {}  # (pathname, lineno) -> [window start, count, suppressed]
+        self._lock = threading.Lock()  # records arrive from the uploader and sensor threads too
+
+    def filter(self, record):
+        if record.levelno >= logging.CRITICAL:
+            return True
+        now = record.created
+        with self._lock:
+            site = self._sites.get((record.pathname, record.lineno))
+            if site is None:
+                self._sites[(record.pathname, record.lineno)] = [now, 1, 0]
+                return True
+            if now - site[0] >= self.window:
+                held, site[:] = site[2], [now, 1, 0]
+                if held:
+                    record.msg = f"{record.msg} ({held} similar messages suppressed)"
+                return True
+            if site[1] < self.burst:
+                site[1] += 1
+                return True
+            site[2] += 1
+            self.suppressed += 1
+            return False
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread and never blocks.
+
+    The stdlib QueueHandler formats every record in the caller so it can be
+    pickled. The queue here stays in-process, so records are queued as they
+    are. When the queue is full the record is dropped and counted rather
+    than stalling the caller.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def _gzip_rotator(source, dest):
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+def file_handler(path, max_bytes=5 * 1024 * 1024, backup_count=5, when='', compress=True):
+    """Rotating file handler: by size, or on a TimedRotatingFileHandler schedule such as 'midnight'."""
+    if when:
+        handler = TimedRotatingFileHandler(path, when=when, backupCount=backup_count, delay=True)
+    else:
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+    if compress:
+        handler.namer = lambda name: f"{name}.gz"
+        handler.rotator = _gzip_rotator
+    return handler
+
+def setup_logging(path, level='INFO', max_bytes=5 * 1024 * 1024, backup_count=5, when='', compress=True,
+                  queue_size=10000, rate_burst=10, rate_window=60.0, console=True):
+    """Route the root logger through a background writer. Returns the QueueListener, which is stopped at exit.
+
+    Does nothing, returning None, in a worker process that forwards its records with forward_logging.
+    """
+    if _forwarding:
+        return None
+    formatter = logging.Formatter(FORMAT)
+    handlers = []
+    try:
+        handlers.append(file_handler(path, max_bytes, backup_count, when, compress))
+    except Exception as e:
+        print(f"Failed to open log file {path}: {str(e)}")
+    if console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    queue_handler = DeferredQueueHandler(queue.Queue(queue_size))
+    if rate_burst:
+        queue_handler.addFilter(RateLimitFilter(rate_burst, rate_window))
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        if isinstance(handler, DeferredQueueHandler):  # from an earlier call
+            root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # drains whatever is still queued
+    _listeners.append(listener)
+    return listener
+
+def forward_logging(log_queue, level='INFO'):
+    """In a worker process, send every record to the parent through a multiprocessing queue.
+
+    Replaces any writer set up while the worker's modules were imported.
+    Records are formatted here, tagged with the process name, and written by
+    the parent's writer (see relay_logging), rate limit included.
+    """
+    global _forwarding
+    _forwarding = True
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        if isinstance(handler, DeferredQueueHandler):
+            root.removeHandler(handler)
+    while _listeners:
+        listener = _listeners.pop()
+        atexit.unregister(listener.stop)
+        listener.stop()
+    handler = QueueHandler(log_queue)
+    handler.setFormatter(logging.Formatter('%(processName)s: %(message)s'))
+    root.addHandler(handler)
+    root.setLevel(level)
+
+def relay_logging(log_queue):
+    """In the parent, hand records forwarded by workers to this process's writer. Returns the started QueueListener."""
+    listener = QueueListener(log_queue, *logging.getLogger().handlers)
+    listener.start()
+    return listener
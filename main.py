@@ -1,40 +1,121 @@
-import time
-import json
 import logging
-import requests
-import smbus2
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-from sensors import *
-from motor import SunPredictor, StepperController
-from config import *
-
-# Set up logging to both file and console
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('sensor_app.log'),
-        logging.StreamHandler()
-    ]
+import threading
+from sensors import (AcquisitionEngine, AdaptiveSampler, BME280Sensor, TSL2591Sensor, LTR390Sensor,
+                     ICM20948Sensor, SGP40Sensor, MockSensor, LockedBus, RecordingBus, ReplayBus, SensorHealth, bring_up)
+from motor import SunPredictor, StepperController, PanelScheduler
+from uplink import BackgroundUploader, Outbox, PayloadEncoder, DeadbandFilter, parse_thresholds, create_transport
+from config import (
+    USE_MOCK, DEVICE_ID, LATITUDE, LONGITUDE, READ_INTERVAL, SAMPLE_INTERVAL, BUFFER_RETENTION,
+    ADAPTIVE_SAMPLING, ADAPTIVE_MIN_INTERVAL, ADAPTIVE_MAX_INTERVAL, ADAPTIVE_TWILIGHT,
+    SENSOR_FAILURE_THRESHOLD, SENSOR_PROBE_BACKOFF, SENSOR_PROBE_MAX_BACKOFF,
+    BME280_ADDR, TSL2591_ADDR, LTR390_ADDR, ICM20948_ADDR, SGP40_ADDR,
+    ICM_STREAM_RATE, ICM_STREAM_BUFFER, ICM_ACCEL_THRESHOLD, ICM_GYRO_THRESHOLD,
+    I2C_TRACE_PATH, I2C_REPLAY_PATH, I2C_REPLAY_REALTIME,
+    ENDPOINT_URL, PAYLOAD_ENCODING, UPLINK_TRANSPORT, STREAM_ENDPOINT, UPLOAD_QUEUE_SIZE, UPLOAD_BATCH_SIZE, UPLOAD_LINGER,
+    UPLOAD_STOP_TIMEOUT, OUTBOX_PATH, OUTBOX_MAX_READINGS, OUTBOX_MAX_AGE, OUTBOX_SYNC_INTERVAL, OUTBOX_REPLAY_BATCH,
+    REPORTING_MODE, DEADBAND_THRESHOLDS, KEYFRAME_INTERVAL,
+    ARCHIVE_DIR, ARCHIVE_BLOCK_SIZE, ARCHIVE_PRECISION,
+    EPHEMERIS_TABLE_PATH, PANEL_UPDATE_MODE, PANEL_STEP_QUANTUM, STEPPER_JOURNAL_PATH, HOME_SWITCH_PIN,
+    METRICS_PORT, METRICS_SOCKET, RUNTIME_MODE,
+    LOG_FILE, LOG_LEVEL, LOG_MAX_BYTES, LOG_ROTATE_WHEN, LOG_BACKUP_COUNT, LOG_COMPRESS, LOG_QUEUE_SIZE,
+    LOG_RATE_BURST, LOG_RATE_WINDOW
 )
+from clock import SystemClock
+from log_setup import setup_logging
+# requests, smbus2, the metrics server and NumPy-backed storage are imported on first use,
+# so a freshly powered node gets to its first reading sooner
+
+# Log to both file and console from a background writer thread
+log_listener = setup_logging(
+    LOG_FILE,
+    level=LOG_LEVEL,
+    max_bytes=LOG_MAX_BYTES,
+    backup_count=LOG_BACKUP_COUNT,
+    when=LOG_ROTATE_WHEN,
+    compress=LOG_COMPRESS,
+    queue_size=LOG_QUEUE_SIZE,
+    rate_burst=LOG_RATE_BURST,
+    rate_window=LOG_RATE_WINDOW
+)
+
+def setup_outbox():
+    if not OUTBOX_PATH:
+        return None
+    try:
+        return Outbox(
+            OUTBOX_PATH,
+            max_readings=OUTBOX_MAX_READINGS,
+            max_age=OUTBOX_MAX_AGE,
+            sync_batch=UPLOAD_BATCH_SIZE,
+            sync_interval=OUTBOX_SYNC_INTERVAL
+        )
+    except Exception as e:
+        logging.error(f"Failed to open outbox {OUTBOX_PATH}, readings will not be buffered: {str(e)}")
+        return None
+
+def setup_uplink(send=None):
+    """The configured (encoder, transport, uploader). The uploader sends batches with send, or the transport."""
+    encoder = PayloadEncoder(PAYLOAD_ENCODING)
+    transport = create_transport(UPLINK_TRANSPORT, encoder, ENDPOINT_URL, STREAM_ENDPOINT, DEVICE_ID)
+    uploader = BackgroundUploader(
+        send or transport.send,
+        max_queue=UPLOAD_QUEUE_SIZE,
+        max_batch=UPLOAD_BATCH_SIZE,
+        linger=UPLOAD_LINGER,
+        outbox=setup_outbox(),
+        replay_batch=OUTBOX_REPLAY_BATCH,
+        send_timeout=transport.max_send_time
+    )
+    return encoder, transport, uploader
 
 class SensorManager:
-    def __init__(self):
+    def __init__(self, sink=None, motor=True, stop_event=None, clock=None):
+        """sink, when given, receives every reading instead of this manager's own uploader, and
+        motor=False leaves the stepper to another process (see runtime.run_multiprocess).
+        clock replaces the system clock, e.g. with soak_sim.py's VirtualClock."""
         self.mock_mode = USE_MOCK
-        self.session = self._setup_requests_session()
+        self.clock = clock or SystemClock()
+        self.stop_event = stop_event or threading.Event()  # run() returns once this is set
+        self.encoder = self.transport = self.uploader = None
+        if sink is None:
+            self.encoder, self.transport, self.uploader = setup_uplink(self.send_data)
+            sink = self.uploader.submit
+        self.sink = sink
+        self.stepper = None
+        self.deadband = None
+        if REPORTING_MODE == 'deadband':
+            self.deadband = DeadbandFilter(parse_thresholds(DEADBAND_THRESHOLDS), KEYFRAME_INTERVAL)
         self.active_sensors = {}
+        self.devices = {}  # name -> (driver class, address) of every sensor the board should have
+        self.health = None
+        self.icm_stream = None
+        self.buffer = self._setup_buffer()
+        self.archive = self._setup_archive()
 
         if not self.mock_mode:
             try:
-                self.bus = smbus2.SMBus(1)  # Use I2C bus 1
+                if I2C_REPLAY_PATH:
+                    self.bus = ReplayBus(I2C_REPLAY_PATH, realtime=I2C_REPLAY_REALTIME)
+                else:
+                    import smbus2
+                    self.bus = smbus2.SMBus(1)  # Use I2C bus 1
+                if I2C_TRACE_PATH:
+                    self.bus = RecordingBus(self.bus, I2C_TRACE_PATH)
+                # The reading loop, the ICM20948 FIFO drain and sensor re-probes share the bus
+                self.bus = LockedBus(self.bus)
                 # Initialize stepper and sun predictor first
-                self.stepper = StepperController(mock_mode=False)
-                self.sun_predictor = SunPredictor(LATITUDE, LONGITUDE)
+                if motor:
+                    self.stepper = StepperController(
+                        mock_mode=False,
+                        journal_path=STEPPER_JOURNAL_PATH or None,
+                        home_switch_pin=HOME_SWITCH_PIN,
+                        clock=self.clock
+                    )
+                self.sun_predictor = SunPredictor(LATITUDE, LONGITUDE, table_path=EPHEMERIS_TABLE_PATH, clock=self.clock)
                 logging.info("Sun tracking system initialized")
                 
-                # Try to initialize each sensor independently
-                sensor_classes = {
+                # Initialize each sensor independently, waiting out their settle times together
+                self.devices = {
                     'bme280': (BME280Sensor, BME280_ADDR),
                     'tsl2591': (TSL2591Sensor, TSL2591_ADDR),
                     'ltr390': (LTR390Sensor, LTR390_ADDR),
@@ -42,55 +123,229 @@ class SensorManager:
                     'sgp40': (SGP40Sensor, SGP40_ADDR)
                 }
 
-                for name, (sensor_class, addr) in sensor_classes.items():
-                    try:
-                        self.active_sensors[name] = sensor_class(self.bus, addr)
+                sensors, failed = bring_up(self.bus, self.devices)
+                for name in self.devices:
+                    if name in sensors:
+                        self.active_sensors[name] = sensors[name]
                         logging.info(f"Initialized {name} sensor")
-                    except Exception as e:
-                        logging.warning(f"Failed to initialize {name}: {str(e)}")
+                    else:
+                        logging.warning(f"Failed to initialize {name}: {str(failed[name])}")
 
                 if not self.active_sensors:
                     raise Exception("No sensors could be initialized")
+
+                self.icm_stream = self._setup_icm_stream()
+
+                # Sensors that failed to come up, or fail later, are re-probed in the background
+                self.health = SensorHealth(
+                    {name: (lambda name=name: self._probe_sensor(name)) for name in self.devices},
+                    failure_threshold=SENSOR_FAILURE_THRESHOLD,
+                    backoff=SENSOR_PROBE_BACKOFF,
+                    max_backoff=SENSOR_PROBE_MAX_BACKOFF
+                )
+                for name, error in failed.items():
+                    self.health.mark_down(name, error)
+
+                self.acquisition = AcquisitionEngine(self.active_sensors, health=self.health)
                 
             except Exception as e:
                 logging.error(f"Critical hardware initialization failed: {str(e)}")
                 self.mock_mode = True
 
         if self.mock_mode:
-            self.mock_sensor = MockSensor()
-            self.stepper = StepperController(mock_mode=True)
-            self.sun_predictor = SunPredictor(LATITUDE, LONGITUDE)
+            self.mock_sensor = MockSensor(self.clock)
+            self.stepper = StepperController(mock_mode=True, clock=self.clock) if motor else None
+            self.sun_predictor = SunPredictor(LATITUDE, LONGITUDE, table_path=EPHEMERIS_TABLE_PATH, clock=self.clock)
             logging.info("Mock mode initialized")
 
-    def _setup_requests_session(self):
-        session = requests.Session()
-        retry_strategy = Retry(
-            total=3,  # number of retries
-            backoff_factor=1,  # wait 1, 2, 4 seconds between retries
-            status_forcelist=[408, 429, 500, 502, 503, 504]  # HTTP status codes to retry on
+        self.sampler = self._setup_sampler()
+        self.metrics_server = self._setup_metrics()
+
+    def _setup_buffer(self):
+        """Keep recent samples in memory when sampling runs faster than reporting."""
+        if SAMPLE_INTERVAL >= READ_INTERVAL:
+            return None
+        try:
+            from storage import ReadingBuffer
+            return ReadingBuffer(max(BUFFER_RETENTION, READ_INTERVAL), SAMPLE_INTERVAL)
+        except Exception as e:
+            logging.error(f"Failed to create reading buffer, reporting every sample: {str(e)}")
+            return None
+
+    def _setup_archive(self):
+        if not ARCHIVE_DIR:
+            return None
+        try:
+            from storage import Archive, parse_precision
+            return Archive(ARCHIVE_DIR, block_size=ARCHIVE_BLOCK_SIZE, precision=parse_precision(ARCHIVE_PRECISION))
+        except Exception as e:
+            logging.warning(f"Local archive unavailable, history will not be kept: {str(e)}")
+            return None
+
+    def _archive(self, data):
+        try:
+            self.archive.append(data)
+        except Exception as e:
+            logging.error(f"Failed to archive reading: {str(e)}")
+
+    def _probe_sensor(self, name):
+        """Build and initialise a fresh driver for a sensor that is down. Raises if it still does not answer.
+
+        Runs on the probe thread; every transaction goes through the LockedBus. A
+        recovered ICM20948 is handed to its stream on the reading thread (see AcquisitionEngine).
+        """
+        sensor_class, address = self.devices[name]
+        return sensor_class(self.bus, address)
+
+    def _setup_sampler(self):
+        """Per-sensor adaptive intervals, when enabled, in place of one fixed interval for all."""
+        if not ADAPTIVE_SAMPLING:
+            return None
+        names = MockSensor.SENSORS if self.mock_mode else list(self.devices)
+        return AdaptiveSampler(
+            names,
+            parse_thresholds(DEADBAND_THRESHOLDS),
+            min_interval=ADAPTIVE_MIN_INTERVAL,
+            max_interval=ADAPTIVE_MAX_INTERVAL,
+            initial_interval=SAMPLE_INTERVAL if self.buffer is not None else READ_INTERVAL,
+            sun_predictor=self.sun_predictor,
+            twilight=ADAPTIVE_TWILIGHT
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        return session
+
+    def _read_adaptive(self):
+        """Read only the sensors the sampler says are due.
+
+        Returns (reading, fresh). The reading carries every sensor, the ones
+        that were not due with their last value, and is what gets uploaded.
+        fresh holds only the values actually read, for the buffer and the
+        archive, or is None when nothing was due.
+        """
+        now = self.clock.time()
+        due = self.sampler.due(now)
+        if due:
+            data = self.read_sensors(due)
+        else:
+            data = {'timestamp': now, 'device_id': DEVICE_ID,
+                    'location': {'latitude': LATITUDE, 'longitude': LONGITUDE}}
+        readings = {name: data.pop(name) for name in self.sampler.intervals if name in data}
+        readings = {name: readings[name] for name in due if name in readings}
+        fresh = {**data, **readings} if due else None
+        # Sensors that were not due carry their last reading
+        data.update(self.sampler.update(readings, now))
+        return data, fresh
+
+    def _sleep_time(self, next_report):
+        if self.sampler is None:
+            return READ_INTERVAL if self.buffer is None else SAMPLE_INTERVAL
+        wait = self.sampler.next_due() - self.clock.time()
+        if self.buffer is not None:
+            wait = min(wait, next_report - self.clock.monotonic())
+        return max(wait, 0.0)
+
+    def _setup_icm_stream(self):
+        """Swap the ICM20948 snapshot reader for FIFO streaming when a stream rate is set."""
+        if not ICM_STREAM_RATE or 'icm20948' not in self.active_sensors:
+            return None
+        try:
+            from sensors.icm20948_stream import ICM20948Stream
+            stream = ICM20948Stream(
+                self.active_sensors['icm20948'],
+                rate=ICM_STREAM_RATE,
+                capacity=ICM_STREAM_BUFFER,
+                accel_threshold=ICM_ACCEL_THRESHOLD,
+                gyro_threshold=ICM_GYRO_THRESHOLD
+            )
+            self.active_sensors['icm20948'] = stream
+            return stream
+        except Exception as e:
+            logging.warning(f"ICM20948 streaming unavailable, using snapshots: {str(e)}")
+            return None
+
+    def _setup_metrics(self):
+        """Instrument the hot paths and serve them as Prometheus text. Nothing is wrapped when metrics are off."""
+        if not (METRICS_PORT or METRICS_SOCKET):
+            return None
+        try:
+            from metrics import Registry, MetricsServer, instrument
+            registry = Registry()
+            for name, sensor in self.active_sensors.items():
+                instrument(sensor, 'collect', registry.histogram(
+                    'sensor_read_seconds', 'Time to read a sensor', {'sensor': name}))
+                registry.observe('sensor_read_failures_total', 'Failed sensor reads',
+                                 lambda name=name: self.acquisition.failures.get(name, 0),
+                                 kind='counter', labels={'sensor': name})
+            instrument(self.sun_predictor, 'get_sun_position', registry.histogram(
+                'sun_position_seconds', 'Time to compute the sun position'))
+            if self.stepper is not None:
+                instrument(self.stepper, '_move', registry.histogram(
+                    'stepper_move_seconds', 'Time taken by each panel move'))
+                registry.observe('stepper_steps_total', 'Steps moved by the panel stepper',
+                                 lambda: self.stepper.steps_moved, kind='counter')
+
+            if self.uploader is not None:
+                instrument(self.uploader, 'send_batch', registry.histogram(
+                    'send_data_seconds', 'Time to POST one upload batch'))
+                registry.observe('upload_retries_total', 'HTTP retries or stream reconnects made while uploading',
+                                 lambda: self.transport.retries, kind='counter')
+                registry.observe('upload_failures_total', 'Upload batches that failed',
+                                 lambda: self.uploader.failures, kind='counter')
+                registry.observe('uploaded_readings_total', 'Readings accepted by the endpoint',
+                                 lambda: self.uploader.sent, kind='counter')
+                registry.observe('upload_dropped_total', 'Readings dropped from a full upload queue',
+                                 lambda: self.uploader.dropped, kind='counter')
+                registry.observe('upload_queue_depth', 'Readings waiting in the upload queue',
+                                 lambda: self.uploader.queue.qsize())
+                if self.uploader.outbox is not None:
+                    registry.observe('outbox_depth', 'Readings buffered in the outbox',
+                                     lambda: self.uploader.outbox.count)
+            if self.health is not None:
+                for name in self.devices:
+                    registry.observe('sensor_up', 'Whether a sensor is being read (0 while its breaker is open)',
+                                     lambda name=name: 0 if self.health.is_down(name) else 1,
+                                     labels={'sensor': name})
+                    registry.observe('sensor_recoveries_total', 'Times a down sensor came back after a probe',
+                                     lambda name=name: self.health.recoveries[name], kind='counter',
+                                     labels={'sensor': name})
+            if self.sampler is not None:
+                for name in self.sampler.intervals:
+                    registry.observe('sample_interval_seconds', 'Current adaptive sampling interval',
+                                     lambda name=name: self.sampler.intervals[name], labels={'sensor': name})
+                    registry.observe('sensor_samples_total', 'Samples taken by the adaptive sampler',
+                                     lambda name=name: self.sampler.reads[name], kind='counter',
+                                     labels={'sensor': name})
+
+            server = MetricsServer(registry, port=METRICS_PORT, socket_path=METRICS_SOCKET)
+            server.start()
+            return server
+        except Exception as e:
+            logging.error(f"Failed to start metrics endpoint: {str(e)}")
+            return None
 
     def update_panel_position(self):
         """Update the solar panel position based on sun prediction."""
         try:
             if not self.mock_mode:
                 position = self.sun_predictor.get_sun_position()
-                self.stepper.move_to_position(position)
-                logging.info(f"Updated panel position to {position:.2%} of east-west range")
+                # The move runs in the background; the callback reports how it went
+                self.stepper.move_to_position_async(position, callback=self._panel_move_done)
+        except Exception as e:
+            logging.error(f"Failed to update panel position: {str(e)}")
+
+    def _panel_move_done(self, future):
+        try:
+            steps = future.result()
+            logging.info("Updated panel position to %.2f%% of east-west range", steps / self.stepper.TOTAL_STEPS * 100)
         except Exception as e:
             logging.error(f"Failed to update panel position: {str(e)}")
 
-    def read_sensors(self):
+    def read_sensors(self, names=None):
+        """Read every sensor, or only those in names (in mock mode every sensor is always read)."""
         try:
             if self.mock_mode:
                 return self.mock_sensor.get_mock_data()
 
             data = {
-                'timestamp': time.time(),
+                'timestamp': self.clock.time(),
                 'device_id': DEVICE_ID,
                 'location': {
                     'latitude': LATITUDE,
@@ -98,63 +353,116 @@ class SensorManager:
                 }
             }
             
-            # Read from successfully initialized sensors
-            for name, sensor in self.active_sensors.items():
-                try:
-                    data[name] = sensor.read()
-                except Exception as e:
-                    logging.error(f"Error reading {name}: {str(e)}")
-                    data[name] = None
-                    
+            # Read from successfully initialized sensors, overlapping conversions
+            data.update(self.acquisition.run_cycle(names))
             return data
         except Exception as e:
             logging.error(f"Error reading sensors: {str(e)}")
             raise
 
     def send_data(self, data):
-        try:
-            response = self.session.post(
-                ENDPOINT_URL,
-                json=data,
-                headers={'Content-Type': 'application/json'},
-                timeout=10  # increased timeout to 10 seconds
-            )
-            response.raise_for_status()
-            logging.info(f"Data sent successfully to {ENDPOINT_URL}")
-            return True
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Failed to send data to endpoint: {str(e)}")
-            return False
+        """Upload a reading, or a list of readings, over the configured transport."""
+        return self.transport.send(data)
 
     def run(self):
         logging.info(f"Starting sensor readings ({'mock' if self.mock_mode else 'hardware'} mode)")
-        logging.info(f"Sending data to: {ENDPOINT_URL}")
-        logging.info(f"Reading interval: {READ_INTERVAL} seconds")
+        if self.transport is not None:
+            logging.info(f"Sending data to: {self.transport.url} ({self.encoder.encoding} payloads)")
+        logging.info(f"Reading interval: {READ_INTERVAL} seconds ({REPORTING_MODE} reporting)")
+        if self.sampler is not None:
+            logging.info(f"Adaptive sampling between {ADAPTIVE_MIN_INTERVAL} and {ADAPTIVE_MAX_INTERVAL} seconds per sensor")
+        elif self.buffer is not None:
+            logging.info(f"Sampling every {SAMPLE_INTERVAL} seconds, reporting window aggregates")
 
-        # Set initial position on startup
-        try:
-            self.update_panel_position()
-            logging.info("Initial panel position set")
-        except Exception as e:
-            logging.error(f"Failed to set initial panel position: {str(e)}")
+        # Uploads run on their own thread so a slow endpoint never stalls the loop
+        if self.uploader is not None:
+            self.uploader.start()
+        if self.icm_stream:
+            self.icm_stream.start()
+        if self.health is not None:
+            self.health.start()
+
+        # Panel moves either follow the precomputed sun schedule on their own thread
+        # or are re-evaluated on every loop iteration. Without a stepper another
+        # process drives the panel.
+        scheduler = None
+        if self.stepper is not None and PANEL_UPDATE_MODE == 'scheduled':
+            if not self.mock_mode:
+                scheduler = PanelScheduler(self.sun_predictor, self.stepper, quantum=PANEL_STEP_QUANTUM, clock=self.clock)
+                scheduler.start()
+                logging.info(f"Panel moves scheduled every {PANEL_STEP_QUANTUM} step(s) of sun travel")
+        elif self.stepper is not None:
+            # Set initial position on startup
+            try:
+                self.update_panel_position()
+                logging.info("Initial panel position set")
+            except Exception as e:
+                logging.error(f"Failed to set initial panel position: {str(e)}")
 
+        # With a reading buffer, sensors are sampled every SAMPLE_INTERVAL and a
+        # report of the window's aggregates goes out every READ_INTERVAL
+        next_report = self.clock.monotonic()
         try:
-            while True:
+            while not self.stop_event.is_set():
                 try:
+                    reporting = self.buffer is None or self.clock.monotonic() >= next_report
+
                     # Update solar panel position
-                    self.update_panel_position()
+                    if reporting and self.stepper is not None and PANEL_UPDATE_MODE != 'scheduled':
+                        self.update_panel_position()
 
-                    # Read and send sensor data
-                    data = self.read_sensors()
-                    self.send_data(data)
-                    time.sleep(READ_INTERVAL)
+                    # Read sensor data and queue it for upload
+                    if self.sampler is not None:
+                        data, fresh = self._read_adaptive()
+                    else:
+                        data = fresh = self.read_sensors()
+                    # Held values are only carried forward in uploads; the buffer and the archive keep what was read
+                    record = fresh
+                    if self.buffer is not None:
+                        if fresh is not None:
+                            self.buffer.append(fresh)
+                        if reporting:
+                            next_report = max(next_report + READ_INTERVAL, self.clock.monotonic())
+                            data = record = self.buffer.report(data, READ_INTERVAL)
+                        else:
+                            data = record = None
+                    if data is not None and self.health is not None:
+                        data['health'] = self.health.report()
+                        if record is not None:
+                            record['health'] = data['health']
+                    if record is not None and self.archive is not None:
+                        self._archive(record)
+                    if data is not None and self.deadband:
+                        data = self.deadband.apply(data)  # None when nothing moved
+                    if data is not None:
+                        self.sink(data)
+                    self.clock.wait(self.stop_event, self._sleep_time(next_report))
                 except Exception as e:
                     logging.error(f"Error in main loop: {str(e)}")
-                    time.sleep(5)  # Wait before retrying
+                    self.clock.wait(self.stop_event, 5)  # Wait before retrying
         finally:
+            if scheduler:
+                scheduler.stop()
+            if self.metrics_server:
+                self.metrics_server.stop()
+            if self.health is not None:
+                self.health.stop()
+            if self.icm_stream:
+                self.icm_stream.stop()
+            if self.uploader is not None:
+                self.uploader.stop(UPLOAD_STOP_TIMEOUT)
+                self.transport.close()
+            if self.archive is not None:
+                self.archive.close()
             if not self.mock_mode:
-                self.stepper.cleanup()  # Ensure proper cleanup of GPIO
+                if self.stepper is not None:
+                    self.stepper.cleanup()  # Ensure proper cleanup of GPIO
+                self.bus.close()  # Also flushes an I2C trace being recorded
 
 if __name__ == "__main__":
-    manager = SensorManager()
-    manager.run()
+    if RUNTIME_MODE == 'multiprocess':
+        from runtime import run_multiprocess
+        run_multiprocess()
+    else:
+        manager = SensorManager()
+        manager.run()
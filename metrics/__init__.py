@@ -0,0 +1,4 @@
+from .registry import Registry, Histogram, Counter, instrument
+from .exporter import MetricsServer
+
+__all__ = ['Registry', 'Histogram', 'Counter', 'instrument', 'MetricsServer']
@@ -0,0 +1,52 @@
+import logging
+import os
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class MetricsServer:
+    """Serves a Registry as Prometheus text on a local TCP port and/or a Unix socket."""
+
+    def __init__(self, registry, port=None, socket_path=None, host='127.0.0.1'):
+        self.servers = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def address_string(self):
+                return str(self.client_address)
+
+            def log_message(self, format, *args):
+                pass
+
+        if port:
+            server = ThreadingHTTPServer((host, port), Handler)
+            server.daemon_threads = True
+            self.servers.append(server)
+            logging.info(f"Serving metrics on http://{host}:{port}/metrics")
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            self.servers.append(_UnixHTTPServer(socket_path, Handler))
+            logging.info(f"Serving metrics on unix socket {socket_path}")
+
+    def start(self):
+        for server in self.servers:
+            threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+
+    def stop(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,120 @@
+import functools
+from bisect import bisect_left
+from time import perf_counter
+
+# Latency buckets in seconds, from 50 us to 30 s
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in items) + '}'
+
+class Histogram:
+    """Fixed-bucket latency histogram. observe() is a bisect and three increments.
+
+    Updates are not locked; under the GIL a concurrent observe can at worst
+    lose a count, which is acceptable for monitoring.
+    """
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f"{self.name}_bucket{_format_labels(self.labels, ('le', bound))} {cumulative}"
+        yield f"{self.name}_bucket{_format_labels(self.labels, ('le', '+Inf'))} {self.count}"
+        yield f"{self.name}_sum{_format_labels(self.labels)} {self.sum}"
+        yield f"{self.name}_count{_format_labels(self.labels)} {self.count}"
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def samples(self):
+        yield f"{self.name}{_format_labels(self.labels)} {self.value}"
+
+class Observed:
+    """Counter or gauge whose value is read from a callback at scrape time, so it costs nothing in between."""
+
+    def __init__(self, name, help, kind, callback, labels=()):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.callback = callback
+        self.labels = labels
+
+    def samples(self):
+        yield f"{self.name}{_format_labels(self.labels)} {self.callback()}"
+
+class Registry:
+    """Holds every metric of the process and renders them as Prometheus text."""
+
+    def __init__(self):
+        self._families = {}  # name -> (kind, help, [metrics])
+
+    def _add(self, kind, metric):
+        family = self._families.setdefault(metric.name, (kind, metric.help, []))
+        family[2].append(metric)
+        return metric
+
+    def histogram(self, name, help, labels=None):
+        return self._add('histogram', Histogram(name, help, tuple((labels or {}).items())))
+
+    def counter(self, name, help, labels=None):
+        return self._add('counter', Counter(name, help, tuple((labels or {}).items())))
+
+    def observe(self, name, help, callback, kind='gauge', labels=None):
+        return self._add(kind, Observed(name, help, kind, callback, tuple((labels or {}).items())))
+
+    def render(self):
+        lines = []
+        for name, (kind, help, metrics) in self._families.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for metric in metrics:
+                try:
+                    lines.extend(metric.samples())
+                except Exception:
+                    pass  # a failing callback should not break the whole scrape
+        return '\n'.join(lines) + '\n'
+
+def instrument(obj, method_name, histogram):
+    """Replace obj.method_name with a wrapper recording each call's duration.
+
+    Instrumentation is applied only when metrics are enabled, so uninstrumented
+    code paths carry no overhead at all.
+    """
+    method = getattr(obj, method_name)
+    observe = histogram.observe
+
+    @functools.wraps(method)
+    def timed(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            observe(perf_counter() - start)
+
+    setattr(obj, method_name, timed)
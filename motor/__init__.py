@@ -1,4 +1,5 @@
 from .sun_predictor import SunPredictor
 from .stepper_controller import StepperController
+from .panel_scheduler import PanelScheduler
 
-__all__ = ['SunPredictor', 'StepperController']
+__all__ = ['SunPredictor', 'StepperController', 'PanelScheduler']
@@ -0,0 +1,107 @@
+import logging
+import math
+from time import perf_counter, sleep
+
+# Finish each software-timed wait by spinning for this long rather than sleeping,
+# so step edges do not inherit scheduler wake-up latency
+SPIN_MARGIN = 0.0005
+
+def trapezoidal_profile(steps, start_rate, max_rate, acceleration):
+    """Return the interval in seconds before each of `steps` steps.
+
+    The rate ramps from start_rate up to max_rate (steps/s) at a constant
+    acceleration (steps/s^2) and back down symmetrically, so short moves get a
+    triangular profile that never reaches max_rate.
+    """
+    intervals = []
+    ramp = min(steps // 2, int(math.ceil((max_rate ** 2 - start_rate ** 2) / (2 * acceleration))))
+    for i in range(steps):
+        from_edge = min(i, steps - 1 - i)
+        if from_edge < ramp:
+            rate = math.sqrt(start_rate ** 2 + 2 * acceleration * from_edge)
+        else:
+            rate = max_rate
+        intervals.append(1.0 / min(rate, max_rate))
+    return intervals
+
+def wait_until(deadline):
+    """Sleep, then spin, until perf_counter() reaches deadline."""
+    remaining = deadline - perf_counter()
+    if remaining > SPIN_MARGIN:
+        sleep(remaining - SPIN_MARGIN)
+    while perf_counter() < deadline:
+        pass
+
+class SoftwarePulser:
+    """Emits a step pulse train from RPi.GPIO against precomputed absolute deadlines.
+
+    Deadlines are fixed up front from the timing buffer, so a late wake-up only
+    delays one edge instead of pushing back every step after it.
+    """
+
+    def __init__(self, gpio, step_pin, dir_pin):
+        self.gpio = gpio
+        self.step_pin = step_pin
+        self.dir_pin = dir_pin
+
+    def run(self, intervals, forward):
+        gpio = self.gpio
+        gpio.output(self.dir_pin, gpio.HIGH if forward else gpio.LOW)
+        deadline = perf_counter()
+        for interval in intervals:
+            gpio.output(self.step_pin, gpio.HIGH)
+            wait_until(deadline + interval / 2)
+            gpio.output(self.step_pin, gpio.LOW)
+            deadline += interval
+            wait_until(deadline)
+
+class PigpioPulser:
+    """Plays the pulse train as a pigpio DMA waveform, so step timing is hardware-timed.
+
+    Needs the pigpio daemon (pigpiod) to be running.
+    """
+
+    def __init__(self, step_pin, dir_pin):
+        import pigpio
+        self.pigpio = pigpio
+        self.pi = pigpio.pi()
+        if not self.pi.connected:
+            raise RuntimeError("pigpio daemon is not running")
+        self.step_pin = step_pin
+        self.dir_pin = dir_pin
+        self.pi.set_mode(step_pin, pigpio.OUTPUT)
+        self.pi.set_mode(dir_pin, pigpio.OUTPUT)
+
+    def run(self, intervals, forward):
+        pigpio = self.pigpio
+        self.pi.write(self.dir_pin, 1 if forward else 0)
+        step_mask = 1 << self.step_pin
+        pulses = []
+        for interval in intervals:
+            period = max(2, int(interval * 1e6))
+            pulses.append(pigpio.pulse(step_mask, 0, period // 2))
+            pulses.append(pigpio.pulse(0, step_mask, period - period // 2))
+
+        self.pi.wave_clear()
+        self.pi.wave_add_generic(pulses)
+        wave = self.pi.wave_create()
+        try:
+            self.pi.wave_send_once(wave)
+            sleep(sum(intervals))
+            while self.pi.wave_tx_busy():
+                sleep(0.001)
+        finally:
+            self.pi.wave_delete(wave)
+
+    def close(self):
+        self.pi.stop()
+
+def create_pulser(gpio, step_pin, dir_pin):
+    """Prefer hardware-timed pigpio waveforms, falling back to software timing."""
+    try:
+        pulser = PigpioPulser(step_pin, dir_pin)
+        logging.info("Stepper pulses hardware-timed by pigpio")
+        return pulser
+    except Exception as e:
+        logging.info(f"pigpio unavailable ({str(e)}), stepper pulses software-timed")
+        return SoftwarePulser(gpio, step_pin, dir_pin)
@@ -0,0 +1,98 @@
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+import logging
+import threading
+
+from clock import SystemClock
+
+class PanelScheduler:
+    """Moves the panel exactly when its target step changes, instead of polling.
+
+    For each day the instants at which the linear sunrise-to-sunset target
+    crosses a multiple of `quantum` steps are precomputed from the
+    SunPredictor's sun times. A background thread sleeps until the next
+    instant and issues that move, independently of sensor sampling. The last
+    event of a day returns the panel east at sunset, so there are no motor
+    wakeups at night.
+    """
+
+    def __init__(self, sun_predictor, stepper, quantum=1, clock=None):
+        self.sun_predictor = sun_predictor
+        self.stepper = stepper
+        self.clock = clock or SystemClock()
+        self.quantum = max(1, quantum)
+        self._day_events = (None, [], [])  # (date, times, step targets)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='panel-scheduler', daemon=True)
+        self.moves = 0
+
+    def events_for_day(self, day):
+        """Return ([event times], [target steps]) for a local date."""
+        if self._day_events[0] == day:
+            return self._day_events[1], self._day_events[2]
+
+        total = self.stepper.TOTAL_STEPS
+        sunrise, _, sunset = self.sun_predictor.get_sun_times(day)
+        day_length = sunset - sunrise
+        targets = list(range(self.quantum, total, self.quantum))
+        times = [sunrise + day_length * steps / total for steps in targets]
+        # Back to east for the next morning
+        times.append(sunset)
+        targets.append(0)
+
+        self._day_events = (day, times, targets)
+        return times, targets
+
+    def target_steps(self, now):
+        """Step target at a given epoch time, rounded down to the quantum."""
+        position = self.sun_predictor.get_sun_position(datetime.fromtimestamp(now, timezone.utc))
+        steps = int(position * self.stepper.TOTAL_STEPS)
+        return steps - steps % self.quantum
+
+    def next_event(self, now):
+        """Return (time, target steps) of the first event after `now`."""
+        day = datetime.fromtimestamp(now, self.sun_predictor.timezone).date()
+        for _ in range(3):
+            times, targets = self.events_for_day(day)
+            index = bisect_right(times, now)
+            if index < len(times):
+                return times[index], targets[index]
+            day += timedelta(days=1)
+        raise RuntimeError(f"No panel events found after {day}")
+
+    def start(self):
+        self.clock.attach()
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def _move(self, steps):
+        try:
+            self.stepper.move_to_steps_async(steps).result()
+            self.moves += 1
+            logging.info("Updated panel position to %.2f%% of east-west range", steps / self.stepper.TOTAL_STEPS * 100)
+        except Exception as e:
+            logging.error(f"Failed to update panel position: {str(e)}")
+
+    def _run(self):
+        try:
+            # Line up with the sun on startup, then only wake for scheduled moves
+            self._move(self.target_steps(self.clock.time()))
+            while not self._stop.is_set():
+                try:
+                    when, steps = self.next_event(self.clock.time())
+                    logging.debug("Next panel move to %d steps at %s", steps,
+                                  datetime.fromtimestamp(when, self.sun_predictor.timezone))
+                    # Re-check the clock after waking in case the wall clock was adjusted
+                    while not self._stop.is_set() and self.clock.time() < when:
+                        self.clock.wait(self._stop, min(when - self.clock.time(), 3600))
+                    if not self._stop.is_set():
+                        self._move(steps)
+                except Exception as e:
+                    logging.error(f"Error in panel scheduler: {str(e)}")
+                    self.clock.wait(self._stop, 60)
+        finally:
+            self.clock.detach()
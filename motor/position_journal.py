@@ -0,0 +1,44 @@
+import json
+import logging
+import os
+
+class PositionJournal:
+    """Keeps the stepper's step count in a small file so it survives restarts.
+
+    Each save writes a temporary file, fsyncs it and renames it over the
+    journal, so a power cut leaves either the old or the new record and never
+    a torn one. A move is journalled as in progress before the first pulse; if
+    the process dies mid-move the restored record says so and the true
+    position is unknown.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._last = None
+
+    def load(self):
+        """Return (position, clean) from the journal, or (None, False) if there is none."""
+        try:
+            with open(self.path) as f:
+                record = json.load(f)
+            self._last = record
+            return int(record['position']), not record.get('moving', False)
+        except FileNotFoundError:
+            return None, False
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable stepper journal {self.path}: {str(e)}")
+            return None, False
+
+    def save(self, position, moving=False, target=None):
+        record = {'position': position, 'moving': moving}
+        if moving:
+            record['target'] = target
+        if record == self._last:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(record, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._last = record
@@ -0,0 +1,54 @@
+"""Vectorised solar position equations (NOAA solar calculator) for batches of timestamps.
+
+Accurate to well under a degree for dates within a few centuries of 2000,
+which is far finer than one stepper step.
+"""
+import numpy as np
+
+# Sun elevation at sunrise/sunset, allowing for refraction and the solar disc
+SUNRISE_ELEVATION = -0.833
+
+def _solar_terms(timestamps):
+    """Declination and equation of time (minutes) for epoch-second timestamps."""
+    jc = (np.asarray(timestamps, dtype=np.float64) / 86400.0 + 2440587.5 - 2451545.0) / 36525.0
+    mean_long = np.radians((280.46646 + jc * (36000.76983 + jc * 0.0003032)) % 360)
+    mean_anom = np.radians(357.52911 + jc * (35999.05029 - 0.0001537 * jc))
+    eccent = 0.016708634 - jc * (0.000042037 + 0.0000001267 * jc)
+    centre = (np.sin(mean_anom) * (1.914602 - jc * (0.004817 + 0.000014 * jc))
+              + np.sin(2 * mean_anom) * (0.019993 - 0.000101 * jc)
+              + np.sin(3 * mean_anom) * 0.000289)
+    omega = np.radians(125.04 - 1934.136 * jc)
+    apparent_long = np.radians(np.degrees(mean_long) + centre - 0.00569 - 0.00478 * np.sin(omega))
+    mean_obliq = 23 + (26 + (21.448 - jc * (46.815 + jc * (0.00059 - jc * 0.001813))) / 60) / 60
+    obliq = np.radians(mean_obliq + 0.00256 * np.cos(omega))
+
+    declination = np.arcsin(np.sin(obliq) * np.sin(apparent_long))
+    y = np.tan(obliq / 2) ** 2
+    eq_time = 4 * np.degrees(
+        y * np.sin(2 * mean_long)
+        - 2 * eccent * np.sin(mean_anom)
+        + 4 * eccent * y * np.sin(mean_anom) * np.cos(2 * mean_long)
+        - 0.5 * y * y * np.sin(4 * mean_long)
+        - 1.25 * eccent * eccent * np.sin(2 * mean_anom)
+    )
+    return declination, eq_time
+
+def solar_position(timestamps, latitude, longitude):
+    """Return (azimuth, elevation) in degrees for an array of epoch-second timestamps.
+
+    Azimuth is measured clockwise from north (90 = east, 270 = west).
+    Elevation is geometric, without atmospheric refraction.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    declination, eq_time = _solar_terms(timestamps)
+    lat = np.radians(latitude)
+
+    minutes = (timestamps % 86400.0) / 60.0
+    true_solar_time = (minutes + eq_time + 4 * longitude) % 1440
+    hour_angle = np.radians(true_solar_time / 4 - 180)
+
+    elevation = np.arcsin(np.sin(lat) * np.sin(declination)
+                          + np.cos(lat) * np.cos(declination) * np.cos(hour_angle))
+    azimuth = np.degrees(np.arctan2(np.sin(hour_angle),
+                                    np.cos(hour_angle) * np.sin(lat) - np.tan(declination) * np.cos(lat))) + 180
+    return azimuth % 360, np.degrees(elevation)
@@ -1,7 +1,11 @@
-import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
+from clock import SystemClock
+from .motion import create_pulser, trapezoidal_profile
+from .position_journal import PositionJournal
+
 class StepperController:
     # PiStep2 HAT pin definitions
     DIR_PIN = 20    # Direction GPIO Pin
@@ -13,9 +17,25 @@ class StepperController:
     GEAR_RATIO = 16.128      # Exact 1/16.128 reduction gear ratio
     TOTAL_STEPS = int(STEPS_PER_REV * GEAR_RATIO)  # 516.096 steps rounded to 516
 
-    def __init__(self, mock_mode: bool = False):
+    # Trapezoidal motion profile, in steps/s and steps/s^2
+    START_RATE = 300
+    MAX_RATE = 1200
+    ACCELERATION = 3000
+
+    # Homing: the east limit switch is searched for at most this far past the full range
+    HOMING_MARGIN = 20
+
+    def __init__(self, mock_mode: bool = False, simulate_motion: bool = False,
+                 journal_path: Optional[str] = None, home_switch_pin: Optional[int] = None, clock=None):
         self.current_position = 0  # 0 = east, TOTAL_STEPS = west
+        self.steps_moved = 0  # total steps pulsed since start
         self.mock_mode = mock_mode
+        self.simulate_motion = simulate_motion  # In mock mode, take as long as a real move would
+        self.clock = clock or SystemClock()  # what simulated moves take their time on
+        self.home_switch_pin = home_switch_pin  # Optional active-low limit switch at the east end
+        self.pulser = None
+        # Moves run one at a time, in order, on a background thread
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='stepper')
         if not self.mock_mode:
             try:
                 self.setup_gpio()
@@ -23,6 +43,10 @@ class StepperController:
                 logging.error(f"Failed to initialize GPIO: {str(e)}")
                 self.mock_mode = True
 
+        self.journal = PositionJournal(journal_path) if journal_path else None
+        if self.journal:
+            self.restore_position()
+
     def setup_gpio(self):
         """Initialize GPIO pins for stepper control."""
         try:
@@ -32,60 +56,141 @@ class StepperController:
             GPIO.setup(self.STEP_PIN, GPIO.OUT)
             GPIO.setup(self.ENABLE_PIN, GPIO.OUT)
 
+            if self.home_switch_pin is not None:
+                GPIO.setup(self.home_switch_pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+
             # Enable the stepper driver
             GPIO.output(self.ENABLE_PIN, GPIO.LOW)
+            self.pulser = create_pulser(GPIO, self.STEP_PIN, self.DIR_PIN)
 
         except Exception as e:
             logging.error(f"Failed to initialize GPIO: {str(e)}")
             raise
 
+    def restore_position(self):
+        """Pick up the step count journalled before the last shutdown, homing only if it cannot be trusted."""
+        position, clean = self.journal.load()
+        if position is not None and clean:
+            self.current_position = position
+            logging.info(f"Restored panel position from journal: {position} steps")
+            return
+        if self.can_home():
+            logging.warning("Stepper journal missing or interrupted mid-move, homing panel")
+            try:
+                self.home()
+                return
+            except Exception as e:
+                logging.error(f"Failed to home panel: {str(e)}")
+        if position is not None:
+            # Interrupted mid-move and no switch to check against: the start is the best guess
+            self.current_position = position
+            logging.warning(f"Stepper journal shows an interrupted move, assuming {position} steps")
+        else:
+            logging.info("No stepper journal found, assuming panel is at east")
+        self.journal.save(self.current_position)
+
+    def can_home(self):
+        return not self.mock_mode and self.home_switch_pin is not None
+
+    def at_home(self):
+        import RPi.GPIO as GPIO
+        return GPIO.input(self.home_switch_pin) == GPIO.LOW
+
+    def home(self):
+        """Step east until the limit switch closes, then call that position 0."""
+        interval = [1.0 / self.START_RATE]
+        for steps in range(self.TOTAL_STEPS + self.HOMING_MARGIN):
+            if self.at_home():
+                break
+            self.pulser.run(interval, forward=False)
+        else:
+            raise RuntimeError("Home switch not reached, check the panel for obstructions")
+        logging.info(f"Panel homed after {steps} steps")
+        self.current_position = 0
+        if self.journal:
+            self.journal.save(0)
+
+    def motion_profile(self, steps: int):
+        """Precomputed step timing buffer for a move of `steps` steps."""
+        return trapezoidal_profile(steps, self.START_RATE, self.MAX_RATE, self.ACCELERATION)
+
+    def move_to_position_async(self, target_position: float, callback=None):
+        """
+        Start a move to a relative position (0.0 = east, 1.0 = west) in the background.
+        Returns a Future that resolves to the new position in steps; callback, if
+        given, is called with that Future once the move completes.
+        """
+        # Convert relative position to steps
+        return self.move_to_steps_async(int(target_position * self.TOTAL_STEPS), callback)
+
+    def move_to_steps_async(self, target_steps: int, callback=None):
+        """Like move_to_position_async, with the target given as a step count from east."""
+        future = self._executor.submit(self._move, target_steps)
+        if callback:
+            future.add_done_callback(callback)
+        return future
+
     def move_to_position(self, target_position: float):
         """
-        Move to a relative position (0.0 = east, 1.0 = west)
+        Move to a relative position (0.0 = east, 1.0 = west), blocking until done
         """
-        if self.mock_mode:
-            logging.info(f"Mock stepper moved to position: {target_position:.2%}")
-            return
+        return self.move_to_position_async(target_position).result()
 
-        try:
-            import RPi.GPIO as GPIO
-            # Convert relative position to steps
-            target_steps = int(target_position * self.TOTAL_STEPS)
+    def _move(self, target_steps: int):
+        # Determine direction and steps needed
+        steps_to_move = target_steps - self.current_position
 
-            # Determine direction and steps needed
-            steps_to_move = target_steps - self.current_position
+        if self.mock_mode:
+            if self.simulate_motion and steps_to_move:
+                self.clock.sleep(sum(self.motion_profile(abs(steps_to_move))))
+            self.current_position = target_steps
+            self.steps_moved += abs(steps_to_move)
+            if self.journal:
+                self.journal.save(self.current_position)
+            logging.info("Mock stepper moved to position: %.2f%%", target_steps / self.TOTAL_STEPS * 100)
+            return self.current_position
 
+        try:
             if steps_to_move == 0:
-                logging.info("Panel already at target position")
-                return
+                logging.debug("Panel already at target position")
+                return self.current_position
 
-            # Set direction
-            GPIO.output(self.DIR_PIN, GPIO.HIGH if steps_to_move > 0 else GPIO.LOW)
             direction = "west" if steps_to_move > 0 else "east"
-            logging.info(f"Moving panel {direction}: {abs(steps_to_move)} steps")
+            logging.info("Moving panel %s: %d steps", direction, abs(steps_to_move))
 
-            # Move the required number of steps
-            for _ in range(abs(steps_to_move)):
-                GPIO.output(self.STEP_PIN, GPIO.HIGH)
-                time.sleep(0.001)  # 1ms delay
-                GPIO.output(self.STEP_PIN, GPIO.LOW)
-                time.sleep(0.001)  # 1ms delay
+            if self.journal:
+                self.journal.save(self.current_position, moving=True, target=target_steps)
+
+            # Play the precomputed pulse train for the whole move
+            self.pulser.run(self.motion_profile(abs(steps_to_move)), forward=steps_to_move > 0)
 
             self.current_position = target_steps
-            logging.info(f"Panel movement complete. Current position: {(self.current_position / self.TOTAL_STEPS):.2%}")
+            self.steps_moved += abs(steps_to_move)
+            if self.journal:
+                self.journal.save(self.current_position)
+
+            # Each return to east doubles as a check that no steps were missed
+            if target_steps == 0 and self.can_home() and not self.at_home():
+                logging.warning("Panel not at home switch after returning east, re-homing")
+                self.home()
+            logging.info("Panel movement complete. Current position: %.2f%%", self.current_position / self.TOTAL_STEPS * 100)
+            return self.current_position
 
         except Exception as e:
             logging.error(f"Error moving stepper: {str(e)}")
             raise
 
     def cleanup(self):
-        """Clean up GPIO on shutdown."""
+        """Finish queued moves, then clean up GPIO on shutdown."""
+        self._executor.shutdown(wait=True)
         if self.mock_mode:
             return
 
         try:
             import RPi.GPIO as GPIO
+            if hasattr(self.pulser, 'close'):
+                self.pulser.close()
             GPIO.output(self.ENABLE_PIN, GPIO.HIGH)  # Disable the driver
             GPIO.cleanup()
         except Exception as e:
-            logging.error(f"Error during GPIO cleanup: {str(e)}")
\ No newline at end of file
+            logging.error(f"Error during GPIO cleanup: {str(e)}")
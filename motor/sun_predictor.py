@@ -1,27 +1,34 @@
-from datetime import datetime, timezone, timedelta
+from collections import OrderedDict
+from datetime import date, datetime, timezone, timedelta
+import importlib.util
+import json
 import logging
+import os
 from zoneinfo import ZoneInfo
 
+from clock import SystemClock
+
 class SunPredictor:
-    def __init__(self, latitude, longitude):
+    def __init__(self, latitude, longitude, cache_size=32, table_path=None, clock=None):
         self.latitude = latitude
         self.longitude = longitude
+        self.clock = clock or SystemClock()
+        # Per-date (sunrise, noon, sunset) epoch seconds, least recently used first
+        self.cache_size = cache_size
+        self._ephemeris = OrderedDict()
+        self._table = {}
+        # Local day covering the previous call, as (start, end, date), to skip timezone conversion
+        self._day = (0.0, 0.0, None)
+        self.timezone = ZoneInfo("Europe/London")
+        self._location = None
         try:
-            from astral import LocationInfo
-            from astral.sun import sun
-            self.timezone = ZoneInfo("Europe/London")
+            # Astral is only imported when sun times are first computed, to keep it off the startup path
+            if importlib.util.find_spec('astral') is None:
+                raise ImportError("No module named 'astral'")
 
             if not (-90 <= latitude <= 90) or not (-180 <= longitude <= 180):
                 raise ValueError(f"Invalid coordinates: lat={latitude}, lon={longitude}")
 
-            self.location = LocationInfo(
-                'SensorLocation',  # Name is required but not used
-                'Region',         # Region is required but not used
-                timezone="Europe/London",  # Using GMT timezone
-                latitude=latitude,
-                longitude=longitude
-            )
-            self.sun_calc = sun
             self.use_mock = False
             logging.info(f"Initialized SunPredictor in production mode using Astral (lat={latitude}, lon={longitude})")
         except ImportError as e:
@@ -34,70 +41,184 @@ class SunPredictor:
             logging.error(f"Unexpected error initializing SunPredictor: {str(e)}")
             self.use_mock = True
 
-    def get_sun_position(self, current_time=None):
-        """Calculate current sun position relative to the panel's range."""
-        try:
-            current_time = current_time or datetime.now(timezone.utc)
-            # Convert input time to sensor's local timezone
-            local_time = current_time.astimezone(self.timezone)
-            logging.info(f"Calculating sun position for time: {local_time.strftime('%H:%M:%S %Z')}")
-
-            if self.use_mock:
-                # Mock implementation using fixed sunrise/sunset times
-                mock_base = local_time.replace(hour=0, minute=0, second=0, microsecond=0)
-                mock_sunrise = mock_base.replace(hour=6)  # 6 AM sunrise
-                mock_sunset = mock_base.replace(hour=18)  # 6 PM sunset
-
-                logging.info(f"Mock sun times - Sunrise: {mock_sunrise.strftime('%H:%M:%S')}, Sunset: {mock_sunset.strftime('%H:%M:%S')}")
-
-                # Before sunrise or after sunset - return east position
-                if local_time < mock_sunrise or local_time >= mock_sunset:
-                    logging.info("Outside daylight hours: Panel positioned for morning (east)")
-                    return 0.0  # East position
-
-                # Calculate position as percentage of daylight hours
-                day_duration = (mock_sunset - mock_sunrise).total_seconds()
-                time_since_sunrise = (local_time - mock_sunrise).total_seconds()
-                position = min(1.0, max(0.0, time_since_sunrise / day_duration))
-                logging.info(f"Mock sun position calculated: {position:.2%} of east-west range ({time_since_sunrise/3600:.1f} hours since sunrise)")
-                return position
-
-            # Get sun information for today using astral
-            s = self.sun_calc(self.location.observer, date=local_time.date())
-
-            # Convert all times to GMT for consistent comparison
-            sunrise_time = s['sunrise'].astimezone(self.timezone)
-            solar_noon = s['noon'].astimezone(self.timezone)
-            sunset_time = s['sunset'].astimezone(self.timezone)
-            
-            # Ensure local_time is in the same timezone
-            local_time = local_time.astimezone(self.timezone)
-
-            # Handle case where sunset is on the next day
-            if sunset_time < sunrise_time:
-                sunset_time += timedelta(days=1)
-
-            day_length = (sunset_time - sunrise_time).total_seconds() / 3600
-
-            logging.info(f"Astronomical calculations for {local_time.strftime('%Y-%m-%d')}:")
+        if table_path and not self.use_mock:
+            self.load_ephemeris_table(table_path)
+
+    @property
+    def location(self):
+        if self._location is None:
+            from astral import LocationInfo
+            self._location = LocationInfo(
+                'SensorLocation',  # Name is required but not used
+                'Region',         # Region is required but not used
+                timezone="Europe/London",  # Using GMT timezone
+                latitude=self.latitude,
+                longitude=self.longitude
+            )
+        return self._location
+
+    @property
+    def sun_calc(self):
+        from astral.sun import sun
+        return sun
+
+    def _compute_sun_times(self, day):
+        """Sunrise, solar noon and sunset for a local date as epoch seconds."""
+        if self.use_mock:
+            # Mock implementation using fixed sunrise/sunset times
+            mock_base = datetime(day.year, day.month, day.day, tzinfo=self.timezone)
+            return (mock_base.replace(hour=6).timestamp(),    # 6 AM sunrise
+                    mock_base.replace(hour=12).timestamp(),
+                    mock_base.replace(hour=18).timestamp())   # 6 PM sunset
+
+        # Get sun information for the day using astral
+        s = self.sun_calc(self.location.observer, date=day)
+        sunrise_time = s['sunrise']
+        sunset_time = s['sunset']
+
+        # Handle case where sunset is on the next day
+        if sunset_time < sunrise_time:
+            sunset_time += timedelta(days=1)
+        return sunrise_time.timestamp(), s['noon'].timestamp(), sunset_time.timestamp()
+
+    def get_sun_times(self, day):
+        """Return (sunrise, noon, sunset) epoch seconds for a local date, from cache when possible."""
+        times = self._table.get(day)
+        if times is not None:
+            return times
+
+        times = self._ephemeris.get(day)
+        if times is not None:
+            self._ephemeris.move_to_end(day)
+            return times
+
+        times = self._compute_sun_times(day)
+        sunrise_time, solar_noon, sunset_time = (datetime.fromtimestamp(t, self.timezone) for t in times)
+        if self.use_mock:
+            logging.info(f"Mock sun times - Sunrise: {sunrise_time.strftime('%H:%M:%S')}, Sunset: {sunset_time.strftime('%H:%M:%S')}")
+        else:
+            logging.info(f"Astronomical calculations for {day.strftime('%Y-%m-%d')}:")
             logging.info(f"Sunrise: {sunrise_time.strftime('%H:%M:%S %Z')}")
             logging.info(f"Solar noon: {solar_noon.strftime('%H:%M:%S %Z')}")
             logging.info(f"Sunset: {sunset_time.strftime('%H:%M:%S %Z')}")
-            logging.info(f"Day length: {day_length:.1f} hours")
+            logging.info(f"Day length: {(times[2] - times[0]) / 3600:.1f} hours")
+
+        if self.cache_size > 0:
+            self._ephemeris[day] = times
+            if len(self._ephemeris) > self.cache_size:
+                self._ephemeris.popitem(last=False)
+        return times
+
+    def build_ephemeris_table(self, year=None, path=None):
+        """Precompute sun times for every day of a year, optionally saving them to path."""
+        year = year or self.clock.now(self.timezone).year
+        day = date(year, 1, 1)
+        table = {}
+        while day.year == year:
+            table[day] = self._compute_sun_times(day)
+            day += timedelta(days=1)
+        self._table = table
+        logging.info(f"Built ephemeris table for {year} ({len(table)} days)")
+
+        if path:
+            data = {
+                'latitude': self.latitude,
+                'longitude': self.longitude,
+                'days': {d.isoformat(): list(times) for d, times in table.items()}
+            }
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        return table
+
+    def load_ephemeris_table(self, path):
+        """Load a table saved by build_ephemeris_table, building it if it is missing, stale or for another site."""
+        year = self.clock.now(self.timezone).year
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if (data['latitude'], data['longitude']) != (self.latitude, self.longitude):
+                raise ValueError("table was built for a different location")
+            table = {date.fromisoformat(d): tuple(times) for d, times in data['days'].items()}
+            if date(year, 1, 1) not in table:
+                raise ValueError(f"table does not cover {year}")
+            self._table = table
+            logging.info(f"Loaded ephemeris table from {path} ({len(table)} days)")
+        except FileNotFoundError:
+            self.build_ephemeris_table(year, path)
+        except Exception as e:
+            logging.warning(f"Rebuilding ephemeris table {path}: {str(e)}")
+            self.build_ephemeris_table(year, path)
+
+    def get_sun_positions(self, timestamps, mode='linear'):
+        """Batch counterpart of get_sun_position for backtesting and planning. Needs NumPy.
+
+        timestamps is an array of epoch seconds. Returns an (n, 3) float array of
+        panel position (0.0 = east, 1.0 = west), solar azimuth and solar elevation
+        in degrees. mode selects how the panel position is derived:
+          'linear'  - the live tracking rule: linear from sunrise to sunset,
+                      east outside daylight (matches get_sun_position)
+          'azimuth' - follows the sun's azimuth from due east (90) to due west (270),
+                      east while the sun is below the horizon
+        """
+        import numpy as np
+        from .solar_geometry import SUNRISE_ELEVATION, solar_position
+
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        azimuth, elevation = solar_position(timestamps, self.latitude, self.longitude)
+
+        if mode == 'linear':
+            # One ephemeris entry per local date covered, looked up by day start
+            tz = self.timezone
+            first = datetime.fromtimestamp(float(timestamps.min()), tz).date()
+            last = datetime.fromtimestamp(float(timestamps.max()), tz).date()
+            days = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+            day_starts = np.array([datetime(d.year, d.month, d.day, tzinfo=tz).timestamp() for d in days])
+            sun_times = np.array([self._table.get(d) or self._compute_sun_times(d) for d in days])
+
+            index = np.searchsorted(day_starts, timestamps, side='right') - 1
+            sunrise = sun_times[index, 0]
+            sunset = sun_times[index, 2]
+            position = np.clip((timestamps - sunrise) / (sunset - sunrise), 0.0, 1.0)
+            after_sunset = timestamps >= sunset if self.use_mock else timestamps > sunset
+            position[(timestamps < sunrise) | after_sunset] = 0.0
+        elif mode == 'azimuth':
+            position = np.clip((azimuth - 90.0) / 180.0, 0.0, 1.0)
+            position[elevation < SUNRISE_ELEVATION] = 0.0
+        else:
+            raise ValueError(f"Unknown sun position mode: {mode}")
+
+        return np.column_stack((position, azimuth, elevation))
 
-            # Check if we're in the current day's daylight period
-            if local_time < sunrise_time or local_time > sunset_time:
-                logging.info("Outside daylight hours: Panel positioned for morning (east)")
+    def get_sun_position(self, current_time=None):
+        """Calculate current sun position relative to the panel's range."""
+        try:
+            current_time = current_time or self.clock.now(timezone.utc)
+            now = current_time.timestamp()
+
+            # Find the local date, converting timezones only when the day changes
+            day_start, day_end, day = self._day
+            if not day_start <= now < day_end:
+                day = current_time.astimezone(self.timezone).date()
+                start = datetime(day.year, day.month, day.day, tzinfo=self.timezone)
+                self._day = (start.timestamp(), (start + timedelta(days=1)).timestamp(), day)
+            logging.debug("Calculating sun position for time: %s", current_time)
+
+            sunrise, _, sunset = self.get_sun_times(day)
+
+            # Before sunrise or after sunset - return east position
+            after_sunset = now >= sunset if self.use_mock else now > sunset
+            if now < sunrise or after_sunset:
+                logging.debug("Outside daylight hours: Panel positioned for morning (east)")
                 return 0.0
 
-            # Calculate position as percentage of daylight hours, ensuring all times are in the same timezone
-            day_duration = (sunset_time - sunrise_time).total_seconds()
-            time_since_sunrise = (local_time - sunrise_time).total_seconds()
-            position = min(1.0, max(0.0, time_since_sunrise / day_duration))
-
-            logging.info(f"Sun position calculated: {position:.2%} of east-west range ({time_since_sunrise/3600:.1f} hours since sunrise)")
+            # Calculate position as percentage of daylight hours
+            position = min(1.0, max(0.0, (now - sunrise) / (sunset - sunrise)))
+            logging.debug("Sun position calculated: %.2f%% of east-west range (%.1f hours since sunrise)",
+                          position * 100, (now - sunrise) / 3600)
             return position
 
         except Exception as e:
             logging.error(f"Error calculating sun position: {str(e)}")
-            return 0.5  # Default to middle position on error
\ No newline at end of file
+            return 0.5  # Default to middle position on error
@@ -0,0 +1,5 @@
+from .shared_ring import SharedRing
+from .supervisor import Supervisor
+from .workers import run_multiprocess
+
+__all__ = ['SharedRing', 'Supervisor', 'run_multiprocess']
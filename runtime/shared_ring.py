@@ -0,0 +1,88 @@
+import struct
+from multiprocessing import shared_memory
+
+# Header: readings pushed, readings consumed, readings dropped (all running totals)
+_HEADER = struct.Struct('<QQQ')
+_LENGTH = struct.Struct('<I')
+
+class SharedRing:
+    """Fixed-slot ring of byte strings in shared memory, for one producer and one consumer process.
+
+    Each slot holds one message of up to slot_size - 4 bytes. The producer
+    copies a message into the next slot and then publishes it by advancing
+    the head; the consumer copies out everything between its tail and the
+    head and then advances the tail. Only those header updates happen under
+    the lock, so neither side ever waits on the other's copying. When the
+    ring is full the producer drops the oldest message, like the uploader's
+    in-memory queue. A consumer copying a slot that was overwritten meanwhile
+    notices from the tail the producer moved and discards the copy.
+
+    The creating process owns the block and unlinks it; other processes
+    attach to it by name, passing the same lock.
+    """
+
+    def __init__(self, lock, slots=1024, slot_size=8192, name=None):
+        self.lock = lock
+        self.slots = slots
+        self.slot_size = slot_size
+        self.owner = name is None
+        size = _HEADER.size + slots * slot_size
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            _HEADER.pack_into(self.shm.buf, 0, 0, 0, 0)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+
+    def _offset(self, index):
+        return _HEADER.size + (index % self.slots) * self.slot_size
+
+    def push(self, message):
+        """Append a message. Raises ValueError if it does not fit in a slot."""
+        if len(message) > self.slot_size - _LENGTH.size:
+            raise ValueError(f"message of {len(message)} bytes does not fit a {self.slot_size} byte slot")
+        buf = self.shm.buf
+        with self.lock:
+            head, tail, dropped = _HEADER.unpack_from(buf, 0)
+            if head - tail >= self.slots:
+                # Full: give up the oldest message so its slot can be reused
+                _HEADER.pack_into(buf, 0, head, tail + 1, dropped + 1)
+        offset = self._offset(head)
+        _LENGTH.pack_into(buf, offset, len(message))
+        buf[offset + _LENGTH.size:offset + _LENGTH.size + len(message)] = message
+        with self.lock:
+            _, tail, dropped = _HEADER.unpack_from(buf, 0)
+            _HEADER.pack_into(buf, 0, head + 1, tail, dropped)
+
+    def pop(self, limit=None):
+        """Remove and return up to limit messages (all waiting ones by default), oldest first."""
+        buf = self.shm.buf
+        with self.lock:
+            head, tail, _ = _HEADER.unpack_from(buf, 0)
+        end = head if limit is None else min(head, tail + limit)
+        copies = []
+        for index in range(tail, end):
+            offset = self._offset(index)
+            (length,) = _LENGTH.unpack_from(buf, offset)
+            length = min(length, self.slot_size - _LENGTH.size)
+            copies.append((index, bytes(buf[offset + _LENGTH.size:offset + _LENGTH.size + length])))
+        with self.lock:
+            head, current, dropped = _HEADER.unpack_from(buf, 0)
+            _HEADER.pack_into(buf, 0, head, max(current, end), dropped)
+        # Anything the producer dropped while it was being copied may be torn
+        return [message for index, message in copies if index >= current]
+
+    def __len__(self):
+        with self.lock:
+            head, tail, _ = _HEADER.unpack_from(self.shm.buf, 0)
+        return head - tail
+
+    @property
+    def dropped(self):
+        with self.lock:
+            return _HEADER.unpack_from(self.shm.buf, 0)[2]
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
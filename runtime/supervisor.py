@@ -0,0 +1,120 @@
+import logging
+import os
+import signal
+import time
+
+class Supervisor:
+    """Runs worker processes and restarts any that exit before they are told to stop.
+
+    Each worker is a module-level function called as target(stop_event, *args)
+    in its own (spawned) process, and should return once stop_event is set.
+    Log records from workers are forwarded to the parent through log_queue. A worker
+    that dies is restarted after `backoff` seconds, doubling for every crash
+    in a row up to max_backoff; one that stayed up for stable_after seconds
+    starts again from `backoff`. Workers can be pinned to a CPU each. On
+    shutdown, workers get stop_timeout seconds to finish before they are terminated.
+    """
+
+    def __init__(self, context, log_queue=None, log_level='INFO', backoff=1.0, max_backoff=60.0, stable_after=60.0,
+                 stop_timeout=10.0):
+        self.context = context
+        self.log_queue = log_queue
+        self.log_level = log_level
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.stop_timeout = stop_timeout
+        self.stop_event = context.Event()
+        self.workers = {}  # name -> dict(target, args, cpu, process, started, wait, restart_at)
+        self.restarts = {}
+
+    def add(self, name, target, args=(), cpu=None):
+        self.workers[name] = {'target': target, 'args': args, 'cpu': cpu, 'process': None,
+                              'started': 0.0, 'wait': self.backoff, 'restart_at': None}
+        self.restarts[name] = 0
+
+    def _spawn(self, name):
+        worker = self.workers[name]
+        process = self.context.Process(
+            target=_worker_main,
+            args=(worker['target'], self.stop_event, worker['args'], worker['cpu'], self.log_queue, self.log_level),
+            name=name,
+            daemon=False
+        )
+        process.start()
+        worker['process'] = process
+        worker['started'] = time.monotonic()
+        worker['restart_at'] = None
+        logging.info(f"Started {name} worker (pid {process.pid}{'' if worker['cpu'] is None else ', cpu ' + str(worker['cpu'])})")
+
+    def start(self):
+        for name in self.workers:
+            self._spawn(name)
+
+    def check(self, now=None):
+        """Restart workers that have died and whose backoff has passed. Called periodically by run()."""
+        now = time.monotonic() if now is None else now
+        for name, worker in self.workers.items():
+            process = worker['process']
+            if process is None or process.is_alive() or self.stop_event.is_set():
+                continue
+            if worker['restart_at'] is None:
+                if now - worker['started'] >= self.stable_after:
+                    worker['wait'] = self.backoff
+                worker['restart_at'] = now + worker['wait']
+                logging.error(f"{name} worker exited with code {process.exitcode}, "
+                              f"restarting in {worker['wait']:.0f} seconds")
+                worker['wait'] = min(worker['wait'] * 2, self.max_backoff)
+            elif now >= worker['restart_at']:
+                self.restarts[name] += 1
+                self._spawn(name)
+
+    def run(self, interval=0.5):
+        """Start the workers and supervise them until interrupted (Ctrl-C or SIGTERM)."""
+        signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+        self.start()
+        try:
+            while True:
+                time.sleep(interval)
+                self.check()
+        except KeyboardInterrupt:
+            logging.info("Stopping workers")
+        finally:
+            self.stop()
+
+    def stop(self, timeout=None):
+        """Ask every worker to stop, waiting up to timeout (default stop_timeout) seconds before terminating stragglers."""
+        if timeout is None:
+            timeout = self.stop_timeout
+        self.stop_event.set()
+        deadline = time.monotonic() + timeout
+        for name, worker in self.workers.items():
+            process = worker['process']
+            if process is None:
+                continue
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logging.warning(f"{name} worker did not stop in time, terminating it")
+                process.terminate()
+                process.join()
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+def _worker_main(target, stop_event, args, cpu, log_queue, log_level):
+    # Ctrl-C reaches the whole process group; the supervisor decides when workers stop.
+    # SIGTERM (from terminate() or the service manager) unwinds the worker so its cleanup runs.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+    if log_queue is not None:
+        from log_setup import forward_logging
+        forward_logging(log_queue, log_level)
+    if cpu is not None:
+        try:
+            os.sched_setaffinity(0, {cpu})
+        except (AttributeError, OSError) as e:
+            logging.warning(f"Could not pin worker to cpu {cpu}: {str(e)}")
+    try:
+        target(stop_event, *args)
+    except KeyboardInterrupt:
+        pass
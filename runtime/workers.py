@@ -0,0 +1,136 @@
+import gc
+import json
+import logging
+import os
+import queue
+import signal
+import multiprocessing
+
+from config import (
+    USE_MOCK, LATITUDE, LONGITUDE, READ_INTERVAL, LOG_LEVEL, UPLINK_TRANSPORT, UPLOAD_STOP_TIMEOUT,
+    EPHEMERIS_TABLE_PATH, PANEL_UPDATE_MODE, PANEL_STEP_QUANTUM, STEPPER_JOURNAL_PATH, HOME_SWITCH_PIN,
+    RUNTIME_RING_SLOTS, RUNTIME_SLOT_SIZE, RUNTIME_PIN_CPUS, RUNTIME_RESTART_BACKOFF, RUNTIME_RESTART_MAX_BACKOFF
+)
+from log_setup import relay_logging
+from .shared_ring import SharedRing
+from .supervisor import Supervisor
+
+# Each worker's core when the Pi has enough of them; core 0 is left to the kernel and the supervisor
+CPUS = {'sampler': 1, 'motor': 2, 'uploader': 3}
+
+def sampler_worker(stop, ring_name, lock, slots, slot_size):
+    """Read the sensors on the usual schedule and publish every reading to the ring."""
+    from main import SensorManager
+    ring = SharedRing(lock, slots, slot_size, name=ring_name)
+
+    def publish(data):
+        try:
+            ring.push(json.dumps(data, separators=(',', ':')).encode())
+        except ValueError as e:
+            logging.error(f"Dropped reading: {str(e)}")
+
+    try:
+        manager = SensorManager(sink=publish, motor=False, stop_event=stop)
+        # Everything built so far lives for the whole run; keep the collector from rescanning it
+        gc.freeze()
+        manager.run()
+    finally:
+        ring.close()
+
+def uploader_worker(stop, ring_name, lock, slots, slot_size, poll=0.2):
+    """Take readings off the ring and upload them, with the outbox and retries of the single-process mode."""
+    from main import setup_uplink
+    ring = SharedRing(lock, slots, slot_size, name=ring_name)
+    _, transport, uploader = setup_uplink()
+    gc.freeze()
+    uploader.start()
+    try:
+        while not stop.is_set():
+            for message in ring.pop():
+                uploader.submit(json.loads(message))
+            stop.wait(poll)
+        for message in ring.pop():
+            uploader.submit(json.loads(message))
+    finally:
+        uploader.stop(UPLOAD_STOP_TIMEOUT)
+        transport.close()
+        ring.close()
+
+def motor_worker(stop, commands):
+    """Keep the panel on the sun, and carry out ('move', position) and ('home',) commands."""
+    from motor import SunPredictor, StepperController, PanelScheduler
+    stepper = StepperController(
+        mock_mode=USE_MOCK,
+        journal_path=STEPPER_JOURNAL_PATH or None,
+        home_switch_pin=HOME_SWITCH_PIN
+    )
+    sun_predictor = SunPredictor(LATITUDE, LONGITUDE, table_path=EPHEMERIS_TABLE_PATH)
+    # As in single-process mode, the panel only tracks the sun on real hardware
+    tracking = not stepper.mock_mode
+    scheduler = None
+    if tracking and PANEL_UPDATE_MODE == 'scheduled':
+        scheduler = PanelScheduler(sun_predictor, stepper, quantum=PANEL_STEP_QUANTUM)
+        scheduler.start()
+    gc.freeze()
+    try:
+        while not stop.is_set():
+            if tracking and scheduler is None:
+                _run_command(stepper, ('move', sun_predictor.get_sun_position()))
+            try:
+                command = commands.get(timeout=READ_INTERVAL if tracking and scheduler is None else 1.0)
+            except queue.Empty:
+                continue
+            _run_command(stepper, command)
+    finally:
+        if scheduler:
+            scheduler.stop()
+        stepper.cleanup()
+
+def _run_command(stepper, command):
+    try:
+        if command[0] == 'move':
+            steps = stepper.move_to_position(command[1])
+            logging.info("Updated panel position to %.2f%% of east-west range", steps / stepper.TOTAL_STEPS * 100)
+        elif command[0] == 'home':
+            if stepper.can_home():
+                stepper.home()
+            else:
+                logging.warning("Panel has no home switch, ignoring home command")
+        else:
+            logging.warning(f"Unknown motor command {command!r}")
+    except Exception as e:
+        logging.error(f"Failed to run motor command {command!r}: {str(e)}")
+
+def run_multiprocess():
+    """Run sampling, panel tracking and uploads as supervised worker processes until interrupted.
+
+    Readings travel from the sampler to the uploader through a SharedRing;
+    the motor worker takes commands from a queue (SIGUSR1 sends it home).
+    """
+    context = multiprocessing.get_context('spawn')
+    log_queue = context.Queue()
+    log_relay = relay_logging(log_queue)
+    lock = context.Lock()
+    ring = SharedRing(lock, RUNTIME_RING_SLOTS, RUNTIME_SLOT_SIZE)
+    commands = context.Queue()
+    # The uploader finishes the send under way at shutdown, so it is not terminated with an outbox transaction open
+    from uplink import max_send_time
+    supervisor = Supervisor(context, log_queue=log_queue, log_level=LOG_LEVEL, backoff=RUNTIME_RESTART_BACKOFF,
+                            max_backoff=RUNTIME_RESTART_MAX_BACKOFF,
+                            stop_timeout=UPLOAD_STOP_TIMEOUT + max_send_time(UPLINK_TRANSPORT) + 5)
+    pin = RUNTIME_PIN_CPUS and (os.cpu_count() or 1) >= len(CPUS) + 1
+    ring_args = (ring.name, lock, RUNTIME_RING_SLOTS, RUNTIME_SLOT_SIZE)
+    supervisor.add('sampler', sampler_worker, ring_args, cpu=CPUS['sampler'] if pin else None)
+    supervisor.add('motor', motor_worker, (commands,), cpu=CPUS['motor'] if pin else None)
+    supervisor.add('uploader', uploader_worker, ring_args, cpu=CPUS['uploader'] if pin else None)
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: commands.put(('home',)))
+
+    logging.info(f"Starting multi-process runtime ({'one core per worker' if pin else 'unpinned'})")
+    try:
+        supervisor.run()
+    finally:
+        if ring.dropped:
+            logging.warning(f"{ring.dropped} readings were dropped from a full ring")
+        ring.close()
+        log_relay.stop()
@@ -4,6 +4,12 @@ from .ltr390 import LTR390Sensor
 from .icm20948 import ICM20948Sensor
 from .sgp40 import SGP40Sensor
 from .mock import MockSensor
+from .acquisition import AcquisitionEngine
+from .startup import bring_up
+from .adaptive import AdaptiveSampler
+from .health import SensorHealth
+from .trace_bus import RecordingBus, ReplayBus
+from .locked_bus import LockedBus
 
 __all__ = [
     'BME280Sensor',
@@ -11,5 +17,12 @@ __all__ = [
     'LTR390Sensor',
     'ICM20948Sensor',
     'SGP40Sensor',
-    'MockSensor'
+    'MockSensor',
+    'AcquisitionEngine',
+    'bring_up',
+    'AdaptiveSampler',
+    'SensorHealth',
+    'RecordingBus',
+    'ReplayBus',
+    'LockedBus'
 ]
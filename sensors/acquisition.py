@@ -0,0 +1,108 @@
+import logging
+from time import perf_counter, sleep
+
+
+class AcquisitionEngine:
+    """Reads a set of sensors on a shared I2C bus with their conversions overlapped.
+
+    Every sensor read is split into a trigger phase, which starts a measurement,
+    and a collect phase, which fetches the result. All triggers are issued up
+    front, longest conversion first, and each sensor is collected as soon as its
+    conversion is ready. Sensors with no conversion wait are therefore read while
+    slow ones (the SGP40) are still converting, so a cycle takes roughly as long
+    as the slowest conversion instead of the sum of all reads.
+    """
+
+    def __init__(self, sensors, health=None):
+        self.sensors = sensors  # name -> sensor, shared with the caller
+        self.health = health  # optional SensorHealth; sensors it reports down are skipped
+        self.last_timing = None
+        self.failures = {}  # name -> failed reads so far
+
+    def bus_counts(self):
+        """Total (transactions, bytes) issued through the sensors' read planners so far."""
+        planners = [sensor.planner for sensor in self.sensors.values() if hasattr(sensor, 'planner')]
+        return sum(p.transactions for p in planners), sum(p.bytes for p in planners)
+
+    def _failed(self, name, error, results):
+        logging.error("Error reading %s: %s", name, error)
+        results[name] = None
+        self.failures[name] = self.failures.get(name, 0) + 1
+        if self.health is not None:
+            self.health.record_failure(name, error)
+
+    def _rejoin(self, name, sensor):
+        current = self.sensors.get(name)
+        if not hasattr(current, 'reattach'):
+            self.sensors[name] = sensor
+            return
+        # A stream (ICM20948Stream) keeps its buffered samples and reconfigures the fresh driver
+        try:
+            current.reattach(sensor)
+        except Exception as e:
+            self.health.mark_down(name, e)
+
+    def run_cycle(self, names=None):
+        """Read every sensor once, or only those in names. Returns a dict of name -> reading (None on error)."""
+        transactions_before, bytes_before = self.bus_counts()
+        cycle_start = perf_counter()
+        results = {}
+        timing = {}
+        pending = []
+
+        if self.health is not None:
+            # Sensors the prober brought back rejoin here, on the reading thread
+            for name, sensor in self.health.take_recovered().items():
+                self._rejoin(name, sensor)
+        sensors = [(name, sensor) for name, sensor in self.sensors.items() if names is None or name in names]
+        if self.health is not None:
+            # Sensors with an open breaker are skipped and read as None until a probe succeeds
+            for name, _ in sensors:
+                if self.health.is_down(name):
+                    results[name] = None
+            sensors = [(name, sensor) for name, sensor in sensors if name not in results]
+
+        # Issue triggers so the longest conversions start first
+        order = sorted(sensors, key=lambda item: -getattr(item[1], 'CONVERSION_TIME', 0.0))
+        for name, sensor in order:
+            started = perf_counter()
+            try:
+                sensor.trigger()
+            except Exception as e:
+                self._failed(name, e, results)
+                continue
+            ready_at = started + getattr(sensor, 'CONVERSION_TIME', 0.0)
+            pending.append((ready_at, name, sensor))
+
+        # Collect in order of readiness, waiting only when nothing else is ready
+        pending.sort(key=lambda item: item[0])
+        idle = 0.0
+        for ready_at, name, sensor in pending:
+            delay = ready_at - perf_counter()
+            if delay > 0:
+                sleep(delay)
+                idle += delay
+            started = perf_counter()
+            try:
+                results[name] = sensor.collect()
+                if self.health is not None:
+                    self.health.record_success(name)
+            except Exception as e:
+                self._failed(name, e, results)
+            timing[name] = perf_counter() - started
+
+        total = perf_counter() - cycle_start
+        transactions, bus_bytes = self.bus_counts()
+        self.last_timing = {
+            'cycle': total,
+            'idle': idle,
+            'sensors': timing,
+            'transactions': transactions - transactions_before,
+            'bytes': bus_bytes - bytes_before
+        }
+        # Runs every cycle, so the message is only formatted if a handler writes it
+        logging.info("Sensor cycle took %.1f ms (%.1f ms waiting on conversions, %d bus transactions, %d bytes)",
+                     total * 1000, idle * 1000, self.last_timing['transactions'], self.last_timing['bytes'])
+
+        # Keep the caller's sensor order in the returned readings
+        return {name: results[name] for name in self.sensors if name in results}
@@ -0,0 +1,105 @@
+import logging
+from datetime import datetime
+
+from uplink.encoding import flatten_reading
+
+class AdaptiveSampler:
+    """Picks each sensor's sampling interval from how fast its readings are changing.
+
+    A field's rate of change is measured in deadband widths per second, using
+    the same thresholds as deadband reporting: max(absolute, relative * |value|),
+    so a change of one threshold is what counts as significant. The sampler
+    keeps a smoothed rate per sensor (its fastest field) and aims to sample
+    about once per threshold's worth of change. The interval shrinks straight
+    away when a sensor speeds up and at most doubles per sample when it calms
+    down, always staying between min_interval and max_interval. Noise shows up
+    as change too, so a sensor jittering past its threshold keeps a short
+    interval until the jitter settles or the threshold is widened.
+
+    Around sunrise and sunset, within `twilight` seconds of either as given by
+    sun_predictor, the boost_sensors (the light sensors) are sampled at
+    min_interval regardless, since light levels swing fastest then.
+
+    Sensors that are not due keep their last reading in the merged reading
+    returned by update(), so every reading still has every sensor.
+    """
+
+    def __init__(self, sensors, thresholds, min_interval, max_interval, initial_interval=None,
+                 sun_predictor=None, twilight=1800, boost_sensors=('tsl2591', 'ltr390'), smoothing=0.5):
+        self.thresholds = thresholds
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.sun_predictor = sun_predictor
+        self.twilight = twilight
+        self.boost_sensors = set(boost_sensors)
+        self.smoothing = smoothing
+        initial = min(max(initial_interval or min_interval, min_interval), max_interval)
+        self.intervals = {name: initial for name in sensors}
+        self.activity = {name: 0.0 for name in sensors}  # smoothed thresholds crossed per second
+        self.reads = {name: 0 for name in sensors}
+        self._due = {name: 0.0 for name in sensors}
+        self._last = {}  # name -> (timestamp, flat fields)
+        self._held = {}  # name -> last reading
+
+    def due(self, now):
+        """Names of the sensors due a sample at epoch time now."""
+        return [name for name, due in self._due.items() if due <= now]
+
+    def next_due(self):
+        """Epoch time the next sensor falls due."""
+        return min(self._due.values(), default=0.0)
+
+    def update(self, readings, now):
+        """Adapt the intervals of the sensors in readings and return them merged with the held ones."""
+        boosted = self._in_twilight(now)
+        for name, reading in readings.items():
+            if name not in self.intervals:
+                continue
+            self.reads[name] += 1
+            if reading is not None:
+                self._adapt(name, reading, now)
+                self._held[name] = reading
+            interval = self.intervals[name]
+            if boosted and name in self.boost_sensors:
+                interval = self.min_interval
+            self._due[name] = now + interval
+
+        merged = {name: self._held.get(name) for name in self.intervals if name not in readings}
+        merged.update(readings)
+        return merged
+
+    def _adapt(self, name, reading, now):
+        flat = flatten_reading({name: reading})
+        last = self._last.get(name)
+        self._last[name] = (now, flat)
+        if last is None or now <= last[0]:
+            return
+
+        elapsed = now - last[0]
+        rate = 0.0
+        for path, value in flat.items():
+            previous = last[1].get(path)
+            threshold = self.thresholds.get(path)
+            if threshold is None or not isinstance(value, (int, float)) or not isinstance(previous, (int, float)):
+                continue
+            absolute, relative = threshold
+            band = max(absolute, relative * abs(value))
+            if band > 0:
+                rate = max(rate, abs(value - previous) / band / elapsed)
+
+        activity = self.activity[name] + self.smoothing * (rate - self.activity[name])
+        self.activity[name] = activity
+        target = 1.0 / activity if activity > 0 else self.max_interval
+        interval = min(target, self.intervals[name] * 2)
+        self.intervals[name] = min(max(interval, self.min_interval), self.max_interval)
+
+    def _in_twilight(self, now):
+        if self.sun_predictor is None or not self.twilight:
+            return False
+        try:
+            day = datetime.fromtimestamp(now, self.sun_predictor.timezone).date()
+            sunrise, _, sunset = self.sun_predictor.get_sun_times(day)
+            return abs(now - sunrise) <= self.twilight or abs(now - sunset) <= self.twilight
+        except Exception as e:
+            logging.error(f"Failed to get sun times for adaptive sampling: {str(e)}")
+            return False
@@ -1,28 +1,51 @@
-import smbus2
 from time import sleep
+from .read_planner import ReadPlanner
 
 class BME280Sensor:
-    def __init__(self, bus, address):
+    # Measures continuously, so no conversion wait is needed
+    CONVERSION_TIME = 0.0
+    # Ready as soon as it is configured
+    SETTLE_TIME = 0.0
+
+    def __init__(self, bus, address, settle=True):
         self.bus = bus
         self.address = address
+        self.planner = ReadPlanner(bus, address)
         try:
             self.initialize()
+            # With settle=False the caller waits SETTLE_TIME and calls settled(), see sensors.bring_up
+            if settle:
+                sleep(self.SETTLE_TIME)
+                self.settled()
         except Exception as e:
             raise Exception(f"Failed to initialize BME280: {str(e)}")
 
     def initialize(self):
         # Initialize BME280
-        self.bus.write_byte_data(self.address, 0xF2, 0x01)  # humidity oversampling x1
-        self.bus.write_byte_data(self.address, 0xF4, 0x27)  # temperature/pressure oversampling x1, normal mode
-        self.bus.write_byte_data(self.address, 0xF5, 0xA0)  # 500ms standby time, filter off
+        self.planner.write_byte(0xF2, 0x01)  # humidity oversampling x1
+        self.planner.write_byte(0xF4, 0x27)  # temperature/pressure oversampling x1, normal mode
+        self.planner.write_byte(0xF5, 0xA0)  # 500ms standby time, filter off
+
+        # Chip ID and calibration data never change, so read them once
+        self.chip_id = self.planner.cache_static(0xD0, 1)[0]
+        self.calibration = self.planner.cache_static(0x88, 24)
+
+    def settled(self):
+        # Nothing to read back once the device has settled
+        pass
 
     def read(self):
+        self.trigger()
+        return self.collect()
+
+    def trigger(self):
+        # Sensor runs continuously in normal mode, nothing to start
+        pass
+
+    def collect(self):
         try:
-            # Read calibration data
-            data = self.bus.read_i2c_block_data(self.address, 0x88, 24)
-            
-            # Read temperature
-            data = self.bus.read_i2c_block_data(self.address, 0xF7, 8)
+            # Read pressure, temperature and humidity data in one burst
+            data, = self.planner.read((0xF7, 8))
             temp_raw = (data[3] << 12) | (data[4] << 4) | (data[5] >> 4)
             temperature = self.compensate_temperature(temp_raw)
 
@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+
+OK, FAILING, DOWN = 'ok', 'failing', 'down'
+
+class SensorHealth:
+    """Per-sensor circuit breakers, with broken sensors re-probed on a background thread.
+
+    A sensor is 'ok' until a read fails, then 'failing'. After
+    failure_threshold consecutive failures its breaker opens and it is 'down':
+    the AcquisitionEngine skips it, so a dead device no longer costs every
+    cycle a bus timeout, an exception and a log line. Sensors that never came
+    up at startup start out down. While a sensor is down the probe thread
+    calls its probe (which builds and initialises a fresh driver) after
+    `backoff` seconds, doubling the wait after every failed probe up to
+    max_backoff. A sensor that probes cleanly is handed back to the engine
+    through take_recovered() and is 'ok' again.
+    """
+
+    def __init__(self, probes, failure_threshold=3, backoff=30.0, max_backoff=1800.0):
+        self.probes = probes  # name -> callable returning a ready sensor, raising if it is not there
+        self.failure_threshold = failure_threshold
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.states = {name: OK for name in probes}
+        self.failures = {name: 0 for name in probes}  # consecutive failed reads
+        self.recoveries = {name: 0 for name in probes}
+        self._wait = {}  # name -> current backoff
+        self._next_probe = {}  # name -> monotonic time of the next probe
+        self._recovered = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record_success(self, name):
+        if self.states.get(name) == FAILING:
+            self.states[name] = OK
+        self.failures[name] = 0
+
+    def record_failure(self, name, error):
+        """Count a failed read. Returns True when this failure opened the sensor's breaker."""
+        if name not in self.states or self.states[name] == DOWN:
+            return False
+        self.failures[name] += 1
+        if self.failures[name] < self.failure_threshold:
+            self.states[name] = FAILING
+            return False
+        self.mark_down(name, error)
+        return True
+
+    def mark_down(self, name, error):
+        """Open a sensor's breaker and schedule its first probe."""
+        with self._lock:
+            self.states[name] = DOWN
+            self._wait[name] = self.backoff
+            self._next_probe[name] = time.monotonic() + self.backoff
+        logging.warning(f"{name} is down ({str(error)}), skipping it and re-probing in {self.backoff:.0f} seconds")
+        self._wake.set()
+
+    def is_down(self, name):
+        return self.states.get(name) == DOWN
+
+    def report(self):
+        """Health of every sensor, published with each reading."""
+        return dict(self.states)
+
+    def take_recovered(self):
+        """Sensors that probed cleanly since the last call, as {name: sensor}. Called from the reading loop."""
+        with self._lock:
+            recovered, self._recovered = self._recovered, {}
+        for name in recovered:
+            self.states[name] = OK
+            self.failures[name] = 0
+            self.recoveries[name] += 1
+        return recovered
+
+    def probe_due(self, now=None):
+        """Probe every down sensor whose backoff has elapsed. Returns the names that came back."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            due = [name for name, at in self._next_probe.items() if at <= now]
+        recovered = []
+        for name in due:
+            try:
+                sensor = self.probes[name]()
+            except Exception as e:
+                with self._lock:
+                    self._wait[name] = min(self._wait[name] * 2, self.max_backoff)
+                    self._next_probe[name] = now + self._wait[name]
+                logging.info(f"{name} still down ({str(e)}), next probe in {self._wait[name]:.0f} seconds")
+                continue
+            with self._lock:
+                del self._next_probe[name]
+                del self._wait[name]
+                self._recovered[name] = sensor
+            logging.info(f"{name} is responding again")
+            recovered.append(name)
+        return recovered
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='sensor-health', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                next_probe = min(self._next_probe.values(), default=None)
+            timeout = None if next_probe is None else max(0.0, next_probe - time.monotonic())
+            self._wake.wait(timeout)
+            self._wake.clear()
+            if not self._stop.is_set():
+                self.probe_due()
@@ -1,35 +1,54 @@
-import smbus2
 from time import sleep
+from .read_planner import ReadPlanner
 
 class ICM20948Sensor:
-    def __init__(self, bus, address):
+    # Measures continuously, so no conversion wait is needed
+    CONVERSION_TIME = 0.0
+    # Time the device needs after configuration before its first valid reading
+    SETTLE_TIME = 0.1
+
+    def __init__(self, bus, address, settle=True):
         self.bus = bus
         self.address = address
+        self.planner = ReadPlanner(bus, address)
         try:
             self.initialize()
+            # With settle=False the caller waits SETTLE_TIME and calls settled(), see sensors.bring_up
+            if settle:
+                sleep(self.SETTLE_TIME)
+                self.settled()
         except Exception as e:
             raise Exception(f"Failed to initialize ICM20948: {str(e)}")
 
     def initialize(self):
         # Wake up the device
-        self.bus.write_byte_data(self.address, 0x06, 0x00)
+        self.planner.write_byte(0x06, 0x00)
         # Configure accelerometer and gyroscope
-        self.bus.write_byte_data(self.address, 0x07, 0x00)
-        sleep(0.1)
+        self.planner.write_byte(0x07, 0x00)
+
+    def settled(self):
+        # WHO_AM_I never changes, so read it once the device is awake
+        self.chip_id = self.planner.cache_static(0x00, 1)[0]
 
     def read(self):
+        self.trigger()
+        return self.collect()
+
+    def trigger(self):
+        # Sensor runs continuously with accel/gyro enabled, nothing to start
+        pass
+
+    def collect(self):
         try:
-            # Read accelerometer data
-            data = self.bus.read_i2c_block_data(self.address, 0x2D, 6)
-            accel_x = (data[0] << 8) | data[1]
-            accel_y = (data[2] << 8) | data[3]
-            accel_z = (data[4] << 8) | data[5]
-
-            # Read gyroscope data
-            data = self.bus.read_i2c_block_data(self.address, 0x33, 6)
-            gyro_x = (data[0] << 8) | data[1]
-            gyro_y = (data[2] << 8) | data[3]
-            gyro_z = (data[4] << 8) | data[5]
+            # Accelerometer and gyroscope registers are contiguous, so this is one burst
+            accel, gyro = self.planner.read((0x2D, 6), (0x33, 6))
+            accel_x = (accel[0] << 8) | accel[1]
+            accel_y = (accel[2] << 8) | accel[3]
+            accel_z = (accel[4] << 8) | accel[5]
+
+            gyro_x = (gyro[0] << 8) | gyro[1]
+            gyro_y = (gyro[2] << 8) | gyro[3]
+            gyro_z = (gyro[4] << 8) | gyro[5]
 
             return {
                 'accelerometer': {
@@ -0,0 +1,229 @@
+import logging
+import threading
+import time
+
+import numpy as np
+
+# ICM-20948 registers (user bank 0 unless noted)
+REG_BANK_SEL = 0x7F
+USER_CTRL = 0x03
+FIFO_EN_1 = 0x66
+FIFO_EN_2 = 0x67
+FIFO_RST = 0x68
+FIFO_MODE = 0x69
+FIFO_COUNTH = 0x70
+FIFO_R_W = 0x72
+GYRO_SMPLRT_DIV = 0x00     # bank 2
+ACCEL_SMPLRT_DIV_1 = 0x10  # bank 2
+
+FIFO_SIZE = 512
+RECORD_SIZE = 12  # accel x/y/z then gyro x/y/z, big-endian int16
+BASE_RATE = 1125.0  # Hz, output data rate before the sample rate dividers
+
+AXES = ('x', 'y', 'z')
+# Same full-scale ranges as ICM20948Sensor.convert_accel/convert_gyro
+SCALE = np.array([4.0 / 32768.0] * 3 + [2000.0 / 32768.0] * 3, dtype=np.float32)
+
+class SampleRing:
+    """Fixed-size ring of float32 sample rows backed by a single NumPy array."""
+
+    def __init__(self, capacity, width):
+        self.capacity = capacity
+        self.data = np.zeros((capacity, width), dtype=np.float32)
+        self.total = 0  # rows ever written
+
+    def extend(self, rows):
+        rows = np.asarray(rows, dtype=np.float32)
+        count = len(rows)
+        if count > self.capacity:
+            self.total += count - self.capacity
+            rows = rows[-self.capacity:]
+            count = self.capacity
+        start = self.total % self.capacity
+        first = min(count, self.capacity - start)
+        self.data[start:start + first] = rows[:first]
+        self.data[:count - first] = rows[first:]
+        self.total += count
+
+    def since(self, total):
+        """Rows written after the ring held `total` rows, oldest first (at most capacity of them)."""
+        count = min(self.total - total, self.capacity)
+        if count <= 0:
+            return self.data[:0].copy()
+        end = self.total % self.capacity
+        start = (self.total - count) % self.capacity
+        if start < end:
+            return self.data[start:end].copy()
+        return np.concatenate((self.data[start:], self.data[:end]))
+
+class ICM20948Stream:
+    """Streams ICM-20948 accel/gyro samples from the FIFO and reports per-window summaries.
+
+    A background thread drains the FIFO every drain_interval seconds into a
+    SampleRing. collect() summarises everything captured since the previous
+    collect: per-axis mean (reported in the usual accelerometer/gyroscope
+    fields), min, max, RMS, peak-to-peak and the number of excursions past
+    the threshold from the window mean, so vibration between READ_INTERVAL
+    snapshots shows up without uploading the raw samples. It has the same
+    trigger/collect interface as the sensor drivers and can replace
+    ICM20948Sensor in the AcquisitionEngine.
+    """
+
+    CONVERSION_TIME = 0.0
+
+    def __init__(self, sensor, rate=500.0, capacity=32768, accel_threshold=0.5,
+                 gyro_threshold=100.0, drain_interval=0.02):
+        self.sensor = sensor
+        self.planner = sensor.planner
+        self.divider = max(0, min(255, round(BASE_RATE / rate) - 1))
+        self.rate = BASE_RATE / (1 + self.divider)
+        self.ring = SampleRing(capacity, 6)
+        self.thresholds = np.array([accel_threshold] * 3 + [gyro_threshold] * 3, dtype=np.float32)
+        self.drain_interval = drain_interval
+        self.overflows = 0
+        self._reported = 0
+        self._window_start = time.time()
+        self._lock = threading.Lock()
+        self._draining = threading.Lock()  # held by drain(), so reattach() can pause the drain thread
+        self._stop = threading.Event()
+        self._thread = None
+        try:
+            self.configure_fifo()
+        except Exception as e:
+            raise Exception(f"Failed to configure ICM20948 FIFO: {str(e)}")
+
+    def configure_fifo(self):
+        # Nothing else may touch the device while it is switched to bank 2
+        with self.planner.lock:
+            # Sample rate dividers live in bank 2
+            self.planner.write_byte(REG_BANK_SEL, 0x20)
+            self.planner.write_byte(GYRO_SMPLRT_DIV, self.divider)
+            self.planner.write_block(ACCEL_SMPLRT_DIV_1, [self.divider >> 8, self.divider & 0xFF])
+            self.planner.write_byte(REG_BANK_SEL, 0x00)
+            # Accel and gyro x/y/z into the FIFO, no auxiliary sensors, stream mode
+            self.planner.write_byte(FIFO_EN_1, 0x00)
+            self.planner.write_byte(FIFO_EN_2, 0x1E)
+            self.planner.write_byte(FIFO_MODE, 0x00)
+            self.reset_fifo()
+            self.planner.write_byte(USER_CTRL, 0x40)
+        logging.info(f"ICM20948 FIFO streaming at {self.rate:.0f} Hz")
+
+    def reattach(self, sensor):
+        """Carry on streaming from a freshly initialised sensor, e.g. after the device was re-probed.
+
+        The drain thread is held off until the FIFO has been reconfigured.
+        """
+        with self._draining:
+            with self._lock:
+                self.sensor = sensor
+                self.planner = sensor.planner
+            self.configure_fifo()
+
+    def reset_fifo(self):
+        with self.planner.lock:
+            self.planner.write_byte(FIFO_RST, 0x1F)
+            self.planner.write_byte(FIFO_RST, 0x00)
+
+    def drain(self):
+        """Move every complete sample in the FIFO into the ring. Returns the number of samples."""
+        with self._draining:
+            return self._drain()
+
+    def _drain(self):
+        high, low = self.planner.read((FIFO_COUNTH, 2))[0]
+        count = ((high & 0x1F) << 8) | low
+        if count > FIFO_SIZE - RECORD_SIZE:
+            # Stream mode overwrites the oldest bytes when full, which loses record alignment
+            self.reset_fifo()
+            self.overflows += 1
+            logging.warning("ICM20948 FIFO overflowed, samples were lost")
+            return 0
+        samples = count // RECORD_SIZE
+        if not samples:
+            return 0
+        data = self.planner.read_stream(FIFO_R_W, samples * RECORD_SIZE, chunk=2 * RECORD_SIZE)
+        rows = np.frombuffer(bytes(data), dtype='>i2').reshape(-1, 6) * SCALE
+        with self._lock:
+            self.ring.extend(rows)
+        return samples
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='icm20948-stream', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.drain_interval):
+            try:
+                self.drain()
+            except Exception as e:
+                logging.error(f"Error draining ICM20948 FIFO: {str(e)}")
+
+    def read(self):
+        self.trigger()
+        return self.collect()
+
+    def trigger(self):
+        # The FIFO fills continuously, nothing to start
+        pass
+
+    def collect(self):
+        try:
+            if self._thread is None:
+                self.drain()
+            now = time.time()
+            with self._lock:
+                samples = self.ring.since(self._reported)
+                lost = self.ring.total - self._reported - len(samples)
+                self._reported = self.ring.total
+            window_start, self._window_start = self._window_start, now
+            if not len(samples):
+                # Nothing streamed this window, fall back to a register snapshot
+                accel, gyro = self.planner.read((0x2D, 6), (0x33, 6))
+                samples = np.frombuffer(bytes(accel + gyro), dtype='>i2').reshape(1, 6) * SCALE
+            return self.summarize(samples, window_start, now, lost)
+        except Exception as e:
+            raise Exception(f"Failed to read ICM20948 stream: {str(e)}")
+
+    def summarize(self, samples, start, end, lost=0):
+        """Per-axis window statistics in a fixed shape, so deadband and columnar encoding see stable fields."""
+        mean = samples.mean(axis=0)
+        low = samples.min(axis=0)
+        high = samples.max(axis=0)
+        rms = np.sqrt((samples.astype(np.float64) ** 2).mean(axis=0))
+        # An event is each excursion past the threshold from the window mean
+        outside = np.abs(samples - mean) > self.thresholds
+        rising = outside & ~np.vstack((np.zeros((1, 6), dtype=bool), outside[:-1]))
+        crossings = rising.sum(axis=0)
+        first = np.flatnonzero(rising.any(axis=1))
+
+        reading = {'accelerometer': {}, 'gyroscope': {}}
+        window = {
+            'samples': int(len(samples)),
+            'lost': int(lost),
+            'seconds': end - start,
+            'events': int(crossings.sum()),
+            'first_event': start + first[0] * (end - start) / len(samples) if len(first) else None,
+            'accelerometer': {},
+            'gyroscope': {}
+        }
+        for column in range(6):
+            group = 'accelerometer' if column < 3 else 'gyroscope'
+            axis = AXES[column % 3]
+            reading[group][axis] = float(mean[column])
+            window[group][axis] = {
+                'min': float(low[column]),
+                'max': float(high[column]),
+                'rms': float(rms[column]),
+                'p2p': float(high[column] - low[column]),
+                'crossings': int(crossings[column])
+            }
+        reading['window'] = window
+        return reading
@@ -0,0 +1,38 @@
+import threading
+
+class LockedBus:
+    """Drop-in SMBus wrapper that lets one thread at a time use the bus.
+
+    smbus2 addresses a device with one ioctl and transfers with another, so
+    two threads sharing a bus (the reading loop, the ICM20948 FIFO drain and
+    the sensor re-probe thread) can send a transfer to the wrong device.
+    Every call holds `lock` for its whole transaction. The lock is
+    re-entrant, so a driver can also hold it across a sequence of
+    transactions that must not be interleaved, such as a register bank switch
+    (see ReadPlanner.lock).
+    """
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.lock = threading.RLock()
+
+    def write_byte_data(self, addr, reg, value):
+        with self.lock:
+            self.bus.write_byte_data(addr, reg, value)
+
+    def write_i2c_block_data(self, addr, reg, data):
+        with self.lock:
+            self.bus.write_i2c_block_data(addr, reg, data)
+
+    def read_byte_data(self, addr, reg):
+        with self.lock:
+            return self.bus.read_byte_data(addr, reg)
+
+    def read_i2c_block_data(self, addr, reg, length):
+        with self.lock:
+            return self.bus.read_i2c_block_data(addr, reg, length)
+
+    def close(self):
+        with self.lock:
+            if hasattr(self.bus, 'close'):
+                self.bus.close()
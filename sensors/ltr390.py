@@ -1,26 +1,47 @@
-import smbus2
 from time import sleep
+from .read_planner import ReadPlanner
 
 class LTR390Sensor:
-    def __init__(self, bus, address):
+    # Measures continuously, so no conversion wait is needed
+    CONVERSION_TIME = 0.0
+    # Time the device needs after configuration before its first valid reading
+    SETTLE_TIME = 0.1
+
+    def __init__(self, bus, address, settle=True):
         self.bus = bus
         self.address = address
+        self.planner = ReadPlanner(bus, address)
         try:
             self.initialize()
+            # With settle=False the caller waits SETTLE_TIME and calls settled(), see sensors.bring_up
+            if settle:
+                sleep(self.SETTLE_TIME)
+                self.settled()
         except Exception as e:
             raise Exception(f"Failed to initialize LTR390: {str(e)}")
 
     def initialize(self):
         # Enable UV measurement
-        self.bus.write_byte_data(self.address, 0x00, 0x0A)
+        self.planner.write_byte(0x00, 0x0A)
         # Set gain and resolution
-        self.bus.write_byte_data(self.address, 0x04, 0x02)
-        sleep(0.1)
+        self.planner.write_byte(0x04, 0x02)
+
+    def settled(self):
+        # Nothing to read back once the device has settled
+        pass
 
     def read(self):
+        self.trigger()
+        return self.collect()
+
+    def trigger(self):
+        # Sensor runs continuously in active mode, nothing to start
+        pass
+
+    def collect(self):
         try:
             # Read UV data
-            data = self.bus.read_i2c_block_data(self.address, 0x0C, 3)
+            data, = self.planner.read((0x0C, 3))
             uv_raw = (data[2] << 16) | (data[1] << 8) | data[0]
             
             # Calculate UV index
@@ -1,11 +1,17 @@
 import random
-from time import time
+from clock import SystemClock
 from config import DEVICE_ID, LATITUDE, LONGITUDE
 
 class MockSensor:
+    # Sensors present in every mock reading
+    SENSORS = ('bme280', 'tsl2591', 'ltr390', 'icm20948', 'sgp40')
+
+    def __init__(self, clock=None):
+        self.clock = clock or SystemClock()
+
     def get_mock_data(self):
         return {
-            'timestamp': time(),
+            'timestamp': self.clock.time(),
             'device_id': DEVICE_ID,
             'location': {
                 'latitude': LATITUDE,
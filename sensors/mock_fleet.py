@@ -0,0 +1,70 @@
+import numpy as np
+
+from config import LATITUDE, LONGITUDE
+from uplink.encoding import unflatten_reading
+
+# Every MockSensor field and its range, as (path, low, high)
+FIELDS = (
+    ('bme280.temperature', 20.0, 30.0),
+    ('bme280.pressure', 980.0, 1020.0),
+    ('bme280.humidity', 30.0, 70.0),
+    ('tsl2591.visible_light', 100, 1000),
+    ('tsl2591.ir_light', 50, 500),
+    ('tsl2591.lux', 0, 1000),
+    ('ltr390.uv_raw', 0, 10000),
+    ('ltr390.uv_index', 0, 11),
+    ('icm20948.accelerometer.x', -4.0, 4.0),
+    ('icm20948.accelerometer.y', -4.0, 4.0),
+    ('icm20948.accelerometer.z', -4.0, 4.0),
+    ('icm20948.gyroscope.x', -2000, 2000),
+    ('icm20948.gyroscope.y', -2000, 2000),
+    ('icm20948.gyroscope.z', -2000, 2000),
+    ('sgp40.voc_raw', 0, 65535),
+    ('sgp40.voc_index', 0, 500),
+)
+
+class MockFleet:
+    """MockSensor for many simulated devices at once.
+
+    Each device gets its own device ID and coordinates scattered around the
+    configured location. values(tick) draws every device's readings for one
+    reporting tick in a single NumPy call, seeded by (seed, tick) so a run
+    can be reproduced exactly.
+    """
+
+    def __init__(self, count, seed=0, prefix='sim', latitude=LATITUDE, longitude=LONGITUDE, spread=0.5):
+        rng = np.random.default_rng(seed)
+        self.seed = seed
+        self.device_ids = [f"{prefix}-{i:05d}" for i in range(count)]
+        self.latitudes = (latitude + rng.uniform(-spread, spread, count)).tolist()
+        self.longitudes = (longitude + rng.uniform(-spread, spread, count)).tolist()
+        self.low = np.array([low for _, low, _ in FIELDS], dtype=np.float64)
+        self.high = np.array([high for _, _, high in FIELDS], dtype=np.float64)
+        self._ticks = {}
+
+    def __len__(self):
+        return len(self.device_ids)
+
+    def values(self, tick):
+        """(devices, fields) array of readings for a tick, the same for every call with this seed."""
+        values = self._ticks.get(tick)
+        if values is None:
+            rng = np.random.default_rng((self.seed, tick))
+            values = rng.uniform(self.low, self.high, (len(self.device_ids), len(FIELDS)))
+            self._ticks[tick] = values
+            self._ticks.pop(tick - 2, None)  # devices are at most one tick apart
+        return values
+
+    def reading(self, device, tick, timestamp):
+        """A MockSensor-shaped reading for one device."""
+        values = self.values(tick)[device].tolist()
+        reading = unflatten_reading({path: value for (path, _, _), value in zip(FIELDS, values)})
+        return {
+            'timestamp': timestamp,
+            'device_id': self.device_ids[device],
+            'location': {
+                'latitude': self.latitudes[device],
+                'longitude': self.longitudes[device]
+            },
+            **reading
+        }
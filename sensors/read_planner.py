@@ -0,0 +1,83 @@
+import threading
+
+class ReadPlanner:
+    """Register access for one I2C device, shared by the sensor drivers.
+
+    Static registers (calibration data, chip IDs) are read once with
+    cache_static() and then served from memory. read() takes the register
+    ranges a driver needs and merges adjacent or overlapping ones into burst
+    reads of at most MAX_BURST bytes, so one contiguous block costs one bus
+    transaction however the driver splits it. Every transaction and byte that
+    goes through the planner is counted.
+
+    `lock` is the bus's lock when the bus is a LockedBus, otherwise one of
+    the planner's own. Hold it around transactions that must not be
+    interleaved with other traffic on the bus.
+    """
+
+    MAX_BURST = 32  # SMBus block transfers are limited to 32 bytes
+
+    def __init__(self, bus, address, max_gap=0):
+        self.bus = bus
+        self.address = address
+        self.max_gap = max_gap  # unused registers worth reading through to save a transaction
+        self.lock = getattr(bus, 'lock', None) or threading.RLock()
+        self.static = {}
+        self.transactions = 0
+        self.bytes = 0
+        self._plans = {}
+
+    def cache_static(self, reg, length):
+        """Read a register block that never changes and keep it."""
+        self.static[reg] = self._read_block(reg, length)
+        return self.static[reg]
+
+    def plan(self, ranges):
+        """Merge (register, length) ranges into the bursts that cover them."""
+        plan = self._plans.get(ranges)
+        if plan is None:
+            plan = []
+            for reg, length in sorted(ranges):
+                if plan:
+                    start, burst_length = plan[-1]
+                    end = max(start + burst_length, reg + length)
+                    if reg <= start + burst_length + self.max_gap and end - start <= self.MAX_BURST:
+                        plan[-1] = (start, end - start)
+                        continue
+                plan.append((reg, length))
+            self._plans[ranges] = plan
+        return plan
+
+    def read(self, *ranges):
+        """Read each (register, length) range, returning their data in the same order."""
+        blocks = [(start, self._read_block(start, length)) for start, length in self.plan(ranges)]
+        results = []
+        for reg, length in ranges:
+            for start, data in blocks:
+                if start <= reg and reg + length <= start + len(data):
+                    results.append(data[reg - start:reg - start + length])
+                    break
+        return results
+
+    def read_stream(self, reg, length, chunk=MAX_BURST):
+        """Read length bytes from a FIFO data register, which does not auto-increment, in chunks."""
+        data = []
+        while len(data) < length:
+            data.extend(self._read_block(reg, min(chunk, length - len(data))))
+        return data
+
+    def _read_block(self, reg, length):
+        data = self.bus.read_i2c_block_data(self.address, reg, length)
+        self.transactions += 1
+        self.bytes += length
+        return data
+
+    def write_byte(self, reg, value):
+        self.bus.write_byte_data(self.address, reg, value)
+        self.transactions += 1
+        self.bytes += 1
+
+    def write_block(self, reg, data):
+        self.bus.write_i2c_block_data(self.address, reg, data)
+        self.transactions += 1
+        self.bytes += len(data)
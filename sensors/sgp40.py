@@ -1,27 +1,48 @@
-import smbus2
 from time import sleep
+from .read_planner import ReadPlanner
 
 class SGP40Sensor:
-    def __init__(self, bus, address):
+    # Time the SGP40 needs between a measure command and a valid result
+    CONVERSION_TIME = 0.05
+    # Time the SGP40 needs after its init command
+    SETTLE_TIME = 0.1
+
+    def __init__(self, bus, address, settle=True):
         self.bus = bus
         self.address = address
+        self.planner = ReadPlanner(bus, address)
         try:
             self.initialize()
+            # With settle=False the caller waits SETTLE_TIME and calls settled(), see sensors.bring_up
+            if settle:
+                sleep(self.SETTLE_TIME)
+                self.settled()
         except Exception as e:
             raise Exception(f"Failed to initialize SGP40: {str(e)}")
 
     def initialize(self):
         # Initialize SGP40
-        self.bus.write_i2c_block_data(self.address, 0x20, [0x03])
-        sleep(0.1)
+        self.planner.write_block(0x20, [0x03])
+
+    def settled(self):
+        # Nothing to read back once the device has settled
+        pass
 
     def read(self):
+        self.trigger()
+        sleep(self.CONVERSION_TIME)
+        return self.collect()
+
+    def trigger(self):
         try:
-            # Measure VOC
-            self.bus.write_i2c_block_data(self.address, 0x26, [0x0F])
-            sleep(0.05)
-            
-            data = self.bus.read_i2c_block_data(self.address, 0x00, 3)
+            # Start a VOC measurement
+            self.planner.write_block(0x26, [0x0F])
+        except Exception as e:
+            raise Exception(f"Failed to read SGP40: {str(e)}")
+
+    def collect(self):
+        try:
+            data, = self.planner.read((0x00, 3))
             voc_raw = (data[0] << 8) | data[1]
             
             return {
@@ -0,0 +1,34 @@
+from time import perf_counter, sleep
+
+def bring_up(bus, devices):
+    """Initialise sensors with their settle times overlapped.
+
+    `devices` maps name -> (sensor class, address). Every sensor's
+    configuration writes go out first, then there is a single wait until the
+    slowest one has settled, so five 100 ms settle times cost 100 ms rather
+    than 500 ms. Returns ({name: sensor}, {name: exception}) for the sensors
+    that came up and the ones that failed.
+    """
+    started = {}
+    failed = {}
+    for name, (sensor_class, address) in devices.items():
+        try:
+            sensor = sensor_class(bus, address, settle=False)
+            # Settling starts with the last configuration write, once the constructor returns
+            started[name] = (sensor, perf_counter())
+        except Exception as e:
+            failed[name] = e
+
+    ready_at = max((configured + sensor.SETTLE_TIME for sensor, configured in started.values()), default=0.0)
+    delay = ready_at - perf_counter()
+    if delay > 0:
+        sleep(delay)
+
+    sensors = {}
+    for name, (sensor, _) in started.items():
+        try:
+            sensor.settled()
+            sensors[name] = sensor
+        except Exception as e:
+            failed[name] = e
+    return sensors, failed
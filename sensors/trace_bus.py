@@ -0,0 +1,176 @@
+import logging
+import struct
+import threading
+import time
+from collections import defaultdict
+
+# Trace file layout (little-endian):
+#   header: b'NVI2C' | version (B) | recording start, epoch seconds (d)
+#   records: offset from start in s (d) | call duration in s (f) | op (B) | addr (B) | reg (B) | data length (B) | data
+# For writes the data is what was written, for reads it is what the device returned.
+TRACE_MAGIC = b'NVI2C'
+TRACE_VERSION = 1
+_HEADER = struct.Struct('<5sBd')
+_RECORD = struct.Struct('<dfBBBB')
+
+WRITE_BYTE_DATA = 1
+WRITE_I2C_BLOCK_DATA = 2
+READ_BYTE_DATA = 3
+READ_I2C_BLOCK_DATA = 4
+OP_NAMES = {
+    WRITE_BYTE_DATA: 'write_byte_data',
+    WRITE_I2C_BLOCK_DATA: 'write_i2c_block_data',
+    READ_BYTE_DATA: 'read_byte_data',
+    READ_I2C_BLOCK_DATA: 'read_i2c_block_data',
+}
+
+class RecordingBus:
+    """Drop-in SMBus wrapper that records every transaction to a binary trace file.
+
+    The file is flushed every flush_records records or flush_interval seconds,
+    whichever comes first, so a node that crashes or loses power leaves a
+    trace covering all but its last moments.
+    """
+
+    def __init__(self, bus, path, flush_records=100, flush_interval=1.0):
+        self.bus = bus
+        self.path = path
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._file = open(path, 'wb')
+        self._file.write(_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, time.time()))
+        self._file.flush()
+        self._unflushed = 0
+        self._flushed_at = self._start
+        logging.info(f"Recording I2C traffic to {path}")
+
+    def _record(self, op, addr, reg, data, started):
+        duration = time.perf_counter() - started
+        data = bytes(data)
+        with self._lock:
+            self._file.write(_RECORD.pack(started - self._start, duration, op, addr, reg, len(data)) + data)
+            self._unflushed += 1
+            now = started + duration
+            if self._unflushed >= self.flush_records or now - self._flushed_at >= self.flush_interval:
+                self._file.flush()
+                self._unflushed = 0
+                self._flushed_at = now
+
+    def write_byte_data(self, addr, reg, value):
+        started = time.perf_counter()
+        self.bus.write_byte_data(addr, reg, value)
+        self._record(WRITE_BYTE_DATA, addr, reg, [value], started)
+
+    def write_i2c_block_data(self, addr, reg, data):
+        started = time.perf_counter()
+        self.bus.write_i2c_block_data(addr, reg, data)
+        self._record(WRITE_I2C_BLOCK_DATA, addr, reg, data, started)
+
+    def read_byte_data(self, addr, reg):
+        started = time.perf_counter()
+        value = self.bus.read_byte_data(addr, reg)
+        self._record(READ_BYTE_DATA, addr, reg, [value], started)
+        return value
+
+    def read_i2c_block_data(self, addr, reg, length):
+        started = time.perf_counter()
+        data = self.bus.read_i2c_block_data(addr, reg, length)
+        self._record(READ_I2C_BLOCK_DATA, addr, reg, data, started)
+        return data
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+        if hasattr(self.bus, 'close'):
+            self.bus.close()
+
+def read_trace(path):
+    """Return (start epoch, [(offset, duration, op, addr, reg, data), ...]) from a trace file."""
+    with open(path, 'rb') as f:
+        body = f.read()
+    magic, version, start = _HEADER.unpack_from(body, 0)
+    if magic != TRACE_MAGIC or version != TRACE_VERSION:
+        raise ValueError(f"{path} is not a version {TRACE_VERSION} I2C trace")
+    records = []
+    offset = _HEADER.size
+    while offset + _RECORD.size <= len(body):
+        at, duration, op, addr, reg, length = _RECORD.unpack_from(body, offset)
+        offset += _RECORD.size
+        if offset + length > len(body):
+            break  # cut short by a crash while recording
+        records.append((at, duration, op, addr, reg, list(body[offset:offset + length])))
+        offset += length
+    return start, records
+
+def trace_summary(path):
+    """Per-device transaction counts, bytes and bus time from a trace, for profiling."""
+    _, records = read_trace(path)
+    summary = defaultdict(lambda: {'transactions': 0, 'bytes': 0, 'bus_time': 0.0})
+    for _, duration, op, addr, reg, data in records:
+        device = summary[f"0x{addr:02x}"]
+        device['transactions'] += 1
+        device['bytes'] += len(data)
+        device['bus_time'] += duration
+    return dict(summary)
+
+class ReplayMismatch(Exception):
+    pass
+
+class ReplayBus:
+    """Drop-in SMBus replacement that answers from a recorded trace.
+
+    Transactions are matched per (operation, address, register), so the order
+    of calls to different devices may differ from the recording. With
+    realtime=True each call takes as long as it did on the real bus; otherwise
+    the trace is served as fast as possible. With loop=True a device whose
+    recorded transactions are used up starts again from its first one.
+    """
+
+    def __init__(self, path, realtime=False, loop=True):
+        self.realtime = realtime
+        self.loop = loop
+        self.start, records = read_trace(path)
+        self._records = defaultdict(list)
+        for _, duration, op, addr, reg, data in records:
+            self._records[(op, addr, reg)].append((duration, data))
+        self._cursors = defaultdict(int)
+        self._lock = threading.Lock()
+        logging.info(f"Replaying {len(records)} I2C transactions from {path}")
+
+    def _next(self, op, addr, reg):
+        key = (op, addr, reg)
+        with self._lock:
+            entries = self._records.get(key)
+            if not entries:
+                raise ReplayMismatch(f"No recorded {OP_NAMES[op]} for device 0x{addr:02x} register 0x{reg:02x}")
+            index = self._cursors[key]
+            if index >= len(entries):
+                if not self.loop:
+                    raise ReplayMismatch(f"Trace exhausted for {OP_NAMES[op]} on device 0x{addr:02x}")
+                index = 0
+            self._cursors[key] = index + 1
+        duration, data = entries[index]
+        if self.realtime:
+            time.sleep(duration)
+        return data
+
+    def write_byte_data(self, addr, reg, value):
+        self._next(WRITE_BYTE_DATA, addr, reg)
+
+    def write_i2c_block_data(self, addr, reg, data):
+        self._next(WRITE_I2C_BLOCK_DATA, addr, reg)
+
+    def read_byte_data(self, addr, reg):
+        return self._next(READ_BYTE_DATA, addr, reg)[0]
+
+    def read_i2c_block_data(self, addr, reg, length):
+        data = self._next(READ_I2C_BLOCK_DATA, addr, reg)
+        if len(data) != length:
+            raise ReplayMismatch(f"Recorded read of {len(data)} bytes from device 0x{addr:02x} "
+                                 f"register 0x{reg:02x}, {length} requested")
+        return list(data)
+
+    def close(self):
+        pass
@@ -1,26 +1,47 @@
-import smbus2
 from time import sleep
+from .read_planner import ReadPlanner
 
 class TSL2591Sensor:
-    def __init__(self, bus, address):
+    # Measures continuously, so no conversion wait is needed
+    CONVERSION_TIME = 0.0
+    # Time the device needs after configuration before its first valid reading
+    SETTLE_TIME = 0.1
+
+    def __init__(self, bus, address, settle=True):
         self.bus = bus
         self.address = address
+        self.planner = ReadPlanner(bus, address)
         try:
             self.initialize()
+            # With settle=False the caller waits SETTLE_TIME and calls settled(), see sensors.bring_up
+            if settle:
+                sleep(self.SETTLE_TIME)
+                self.settled()
         except Exception as e:
             raise Exception(f"Failed to initialize TSL2591: {str(e)}")
 
     def initialize(self):
         # Enable the device
-        self.bus.write_byte_data(self.address, 0xA0, 0x03)
+        self.planner.write_byte(0xA0, 0x03)
         # Set gain and integration time
-        self.bus.write_byte_data(self.address, 0xA1, 0x12)
-        sleep(0.1)
+        self.planner.write_byte(0xA1, 0x12)
+
+    def settled(self):
+        # Nothing to read back once the device has settled
+        pass
 
     def read(self):
+        self.trigger()
+        return self.collect()
+
+    def trigger(self):
+        # Sensor runs continuously with the ALS enabled, nothing to start
+        pass
+
+    def collect(self):
         try:
             # Read visible + IR channel
-            data = self.bus.read_i2c_block_data(self.address, 0xB4, 4)
+            data, = self.planner.read((0xB4, 4))
             ch0 = (data[1] << 8) | data[0]
             ch1 = (data[3] << 8) | data[2]
 
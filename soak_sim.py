@@ -0,0 +1,143 @@
+"""Soak-test the control loop over a simulated year in seconds of real time.
+
+Runs the real reading loop (SensorManager in mock mode), the panel scheduler
+with a mock stepper and the background uploader together on a VirtualClock,
+which jumps straight from one scheduled wake-up to the next. Readings are
+uploaded to an in-process ingest stand-in. The run reports the steps the
+panel moved, the readings produced, what the uploader sent and what the
+stand-in received, and how much faster than real time it ran.
+
+Usage: python soak_sim.py [--days 365] [--start 2025-01-01] [--interval 60]
+                          [--sample-interval SECONDS] [--batch 500] [--encoding json]
+                          [--quantum 1] [--output soak_results.json]
+"""
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+import main
+from benchmarks.standin import IngestStandIn
+from clock import VirtualClock
+from config import READ_INTERVAL, PAYLOAD_ENCODING, PANEL_STEP_QUANTUM
+from motor import StepperController, PanelScheduler
+from uplink import BackgroundUploader, HTTPTransport, PayloadEncoder
+
+def configure(args):
+    """Point main's configuration at a mock node before the SensorManager is built.
+
+    Returns the settings it replaced, for restore().
+    """
+    settings = {
+        'USE_MOCK': True,
+        'READ_INTERVAL': args.interval,
+        'SAMPLE_INTERVAL': args.sample_interval or args.interval,
+        'ARCHIVE_DIR': '',
+        'METRICS_PORT': None,
+        'METRICS_SOCKET': '',
+    }
+    saved = {name: getattr(main, name) for name in settings}
+    restore(settings)
+    return saved
+
+def restore(settings):
+    for name, value in settings.items():
+        setattr(main, name, value)
+
+def start_time(text):
+    start = datetime.fromisoformat(text)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    return start.timestamp()
+
+def run_soak(args, endpoint):
+    """Run args.days of simulated operation and return the summary."""
+    saved = configure(args)
+    try:
+        return _run(args, endpoint)
+    finally:
+        restore(saved)
+
+def _run(args, endpoint):
+    start = start_time(args.start)
+    end = start + args.days * 86400
+    clock = VirtualClock(start)
+    stop = threading.Event()
+
+    transport = HTTPTransport(endpoint, PayloadEncoder(args.encoding))
+    uploader = BackgroundUploader(transport.send, max_queue=args.batch * 4, max_batch=args.batch, linger=0.05)
+    readings = 0
+
+    def sink(reading):
+        nonlocal readings
+        if clock.time() >= end:
+            stop.set()
+            return
+        readings += 1
+        # Block instead of dropping: simulated time runs far ahead of the uploads
+        uploader.queue.put(reading)
+
+    manager = main.SensorManager(sink=sink, motor=False, stop_event=stop, clock=clock)
+    stepper = StepperController(mock_mode=True, clock=clock)
+    scheduler = PanelScheduler(manager.sun_predictor, stepper, quantum=args.quantum, clock=clock)
+
+    clock.attach()  # this thread runs the reading loop; attach before the scheduler can move time on
+    wall = time.perf_counter()
+    uploader.start()
+    scheduler.start()
+    try:
+        manager.run()
+    finally:
+        scheduler.stop()
+        clock.detach()
+        uploader.stop(timeout=60)
+        stepper.cleanup()
+        transport.close()
+    wall = time.perf_counter() - wall
+
+    return {
+        'simulated_days': args.days,
+        'wall_seconds': wall,
+        'speedup': (clock.time() - start) / wall,
+        'steps_moved': stepper.steps_moved,
+        'panel_moves': scheduler.moves,
+        'readings': readings,
+        'uploaded_readings': uploader.sent,
+        'upload_failures': uploader.failures,
+        'upload_dropped': uploader.dropped,
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=float, default=365.0, help='simulated days to run')
+    parser.add_argument('--start', default='2025-01-01', help='simulated start, ISO 8601 (UTC unless an offset is given)')
+    parser.add_argument('--interval', type=float, default=READ_INTERVAL, help='seconds between reports')
+    parser.add_argument('--sample-interval', type=float, help='seconds between samples (default: --interval)')
+    parser.add_argument('--batch', type=int, default=500, help='readings per upload')
+    parser.add_argument('--encoding', default=PAYLOAD_ENCODING)
+    parser.add_argument('--quantum', type=int, default=PANEL_STEP_QUANTUM, help='panel step quantum')
+    parser.add_argument('--log-level', default='WARNING', help='log level during the run')
+    parser.add_argument('--output', help='also write the summary to this JSON file')
+    return parser.parse_args(argv)
+
+def main_cli(argv=None):
+    args = parse_args(argv)
+    logging.getLogger().setLevel(args.log_level.upper())
+    print(f"Simulating {args.days:g} days from {args.start}, reporting every {args.interval:g}s")
+    with IngestStandIn() as standin:
+        summary = run_soak(args, standin.url)
+    summary['upload_requests'] = standin.requests
+    summary['standin_readings'] = standin.readings
+
+    for key, value in summary.items():
+        print(f"{key:<24}{value:.2f}" if isinstance(value, float) else f"{key:<24}{value}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
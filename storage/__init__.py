@@ -0,0 +1,4 @@
+from .ring_buffer import ReadingBuffer
+from .archive import Archive, parse_precision
+
+__all__ = ['ReadingBuffer', 'Archive', 'parse_precision']
@@ -0,0 +1,343 @@
+import logging
+import os
+import struct
+import zlib
+from datetime import datetime, timezone, timedelta
+
+import numpy as np
+
+from uplink.encoding import META_KEYS, flatten_reading
+
+# Segment files hold one UTC day each, named YYYY-MM-DD.nva, as a sequence of blocks (little-endian):
+#   block header: b'NVA' | version (B) | reading count (I) | first timestamp (d) | last timestamp (d) | body length (I)
+#   body: field count (H), then per field: name length (B) | name (UTF-8) | kind (c) | scale (d) | data length (I)
+#         then timestamp data length (I) | timestamp data, then each field's data in the same order
+# Timestamps are whole milliseconds stored as delta-of-delta. Column kinds:
+#   'x' float64, XORed with the previous value (missing values are NaN)
+#   'q' float quantised to multiples of scale, delta encoded (only used when no value is missing)
+#   'i' int64, delta encoded
+# Integer streams are zigzag encoded, and every stream is byte-shuffled and zlib compressed.
+# A day is written as hourly-ish blocks while it is current and compacted into one block afterwards.
+MAGIC = b'NVA'
+VERSION = 1
+_BLOCK = struct.Struct('<3sBIddI')
+_FIELD = struct.Struct('<cdI')
+SUFFIX = '.nva'
+
+def parse_precision(spec):
+    """Parse 'bme280.temperature=0.01,bme280.pressure=0.01' into {path: step}."""
+    precision = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        try:
+            path, step = (part.strip() for part in item.split('='))
+            precision[path] = float(step)
+        except ValueError:
+            logging.error(f"Ignoring invalid archive precision '{item}'")
+    return precision
+
+def _shuffle(values):
+    return np.ascontiguousarray(values.astype('<u8').view(np.uint8).reshape(-1, 8).T).tobytes()
+
+def _unshuffle(data, count):
+    return np.frombuffer(data, np.uint8).reshape(8, count).T.copy().view('<u8').ravel()
+
+def _pack_ints(values):
+    values = values.astype(np.int64)
+    zigzag = ((values << 1) ^ (values >> 63)).view(np.uint64)
+    return zlib.compress(_shuffle(zigzag), 6)
+
+def _unpack_ints(data, count):
+    zigzag = _unshuffle(zlib.decompress(data), count)
+    return (zigzag >> np.uint64(1)).view(np.int64) ^ -(zigzag & np.uint64(1)).view(np.int64)
+
+def _column_array(values):
+    """int64 array when every value is an int, otherwise float64 with NaN for missing values."""
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+        return np.array(values, dtype=np.int64)
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+def encode_block(timestamps, columns, precision=None):
+    """Encode (timestamps, {path: array}) as one block, header included."""
+    precision = precision or {}
+    millis = np.round(np.asarray(timestamps) * 1000).astype(np.int64)
+    deltas = np.diff(millis, prepend=0)
+    fields = []
+    for path, values in columns.items():
+        if values.dtype.kind == 'i':
+            fields.append((path, b'i', 0.0, _pack_ints(np.diff(values, prepend=0))))
+        elif path in precision and np.isfinite(values).all():
+            quantised = np.round(values / precision[path]).astype(np.int64)
+            fields.append((path, b'q', precision[path], _pack_ints(np.diff(quantised, prepend=0))))
+        else:
+            bits = values.astype('<f8').view('<u8')
+            previous = np.concatenate((np.zeros(1, dtype='<u8'), bits[:-1]))
+            fields.append((path, b'x', 0.0, zlib.compress(_shuffle(bits ^ previous), 6)))
+
+    time_data = _pack_ints(np.diff(deltas, prepend=0))
+    parts = [struct.pack('<H', len(fields))]
+    for path, kind, scale, data in fields:
+        name = path.encode()
+        parts.append(struct.pack('<B', len(name)) + name + _FIELD.pack(kind, scale, len(data)))
+    parts.append(struct.pack('<I', len(time_data)) + time_data)
+    parts.extend(data for _, _, _, data in fields)
+    body = b''.join(parts)
+    header = _BLOCK.pack(MAGIC, VERSION, len(millis), millis[0] / 1000, millis[-1] / 1000, len(body))
+    return header + body
+
+def decode_block(body, count, fields=None):
+    """Decode a block body into (timestamps, {path: array}), optionally only some fields."""
+    (field_count,) = struct.unpack_from('<H', body, 0)
+    offset = 2
+    layout = []
+    for _ in range(field_count):
+        (length,) = struct.unpack_from('<B', body, offset)
+        path = body[offset + 1:offset + 1 + length].decode()
+        offset += 1 + length
+        kind, scale, size = _FIELD.unpack_from(body, offset)
+        offset += _FIELD.size
+        layout.append((path, kind, scale, size))
+    (time_size,) = struct.unpack_from('<I', body, offset)
+    offset += 4
+    timestamps = np.cumsum(np.cumsum(_unpack_ints(body[offset:offset + time_size], count))) / 1000
+    offset += time_size
+
+    columns = {}
+    for path, kind, scale, size in layout:
+        data = body[offset:offset + size]
+        offset += size
+        if fields is not None and path not in fields:
+            continue
+        if kind == b'x':
+            columns[path] = np.bitwise_xor.accumulate(_unshuffle(zlib.decompress(data), count)).view('<f8')
+        elif kind == b'q':
+            steps = np.cumsum(_unpack_ints(data, count))
+            inverse = round(1 / scale)
+            # Dividing by an integral inverse gives 50.12 rather than 50.120000000000005
+            columns[path] = steps / inverse if abs(inverse * scale - 1) < 1e-12 else steps * scale
+        else:
+            columns[path] = np.cumsum(_unpack_ints(data, count))
+    return timestamps, columns
+
+def _merge(parts):
+    """Concatenate decoded (timestamps, columns) parts, filling fields a part lacks with NaN."""
+    if not parts:
+        return np.empty(0), {}
+    paths = list(dict.fromkeys(path for _, columns in parts for path in columns))
+    timestamps = np.concatenate([t for t, _ in parts])
+    merged = {}
+    for path in paths:
+        arrays = [columns.get(path) for _, columns in parts]
+        if all(a is not None and a.dtype.kind == 'i' for a in arrays):
+            merged[path] = np.concatenate(arrays)
+        else:
+            merged[path] = np.concatenate([np.full(len(t), np.nan) if a is None else a.astype(np.float64)
+                                           for a, (t, _) in zip(arrays, parts)])
+    return timestamps, merged
+
+def downsample(timestamps, columns, start, step):
+    """Average each column over step-second buckets counted from start, ignoring NaN."""
+    if not len(timestamps):
+        return timestamps, columns
+    buckets = ((timestamps - start) // step).astype(np.int64)
+    starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+    result = {}
+    for path, values in columns.items():
+        values = values.astype(np.float64)
+        present = ~np.isnan(values)
+        totals = np.add.reduceat(np.where(present, values, 0.0), starts)
+        counts = np.add.reduceat(present.astype(np.int64), starts)
+        with np.errstate(invalid='ignore'):
+            result[path] = totals / counts
+    return start + buckets[starts] * step, result
+
+class Archive:
+    """On-device history of readings in compressed daily columnar segments.
+
+    Readings are buffered in memory and written as a block every block_size
+    readings (or when the UTC day changes), so at most block_size readings
+    are lost in a crash. A block torn by a crash is cut off the end of its
+    segment before anything more is written to it. When a day is over its
+    blocks are compacted into one. Range queries use the block headers as a time index and decode only
+    the blocks and fields they need. Only numeric fields are archived; fields
+    listed in precision are stored as multiples of that step, the rest
+    losslessly.
+    """
+
+    def __init__(self, path, block_size=60, precision=None):
+        self.path = path
+        self.block_size = block_size
+        self.precision = precision or {}
+        self._pending = []
+        self._pending_day = None
+        self._repaired = set()  # days whose segment tail was checked before this process wrote to it
+        self._index = {}  # file -> (size, [(first, last, body offset, count, body length)])
+        os.makedirs(path, exist_ok=True)
+        self._compact_past_days()
+
+    def _file(self, day):
+        return os.path.join(self.path, day.isoformat() + SUFFIX)
+
+    @staticmethod
+    def _day(timestamp):
+        return datetime.fromtimestamp(timestamp, timezone.utc).date()
+
+    def days(self):
+        return sorted(datetime.strptime(name[:-len(SUFFIX)], '%Y-%m-%d').date()
+                      for name in os.listdir(self.path) if name.endswith(SUFFIX))
+
+    def append(self, reading):
+        timestamp = reading['timestamp']
+        day = self._day(timestamp)
+        if self._pending_day is not None and day != self._pending_day:
+            finished = self._pending_day
+            self.flush()
+            self._pending_day = day
+            try:
+                self.compact(finished)
+            except Exception as e:
+                logging.error(f"Failed to compact archive for {finished}: {str(e)}")
+        self._pending_day = day
+        self._pending.append((timestamp, flatten_reading(
+            {k: v for k, v in reading.items() if k != 'timestamp' and k not in META_KEYS})))
+        if len(self._pending) >= self.block_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered readings to their day's segment as one block."""
+        if not self._pending:
+            return
+        timestamps = [t for t, _ in self._pending]
+        paths = dict.fromkeys(path for _, flat in self._pending for path, value in flat.items()
+                              if isinstance(value, (int, float)) and not isinstance(value, bool))
+        columns = {path: _column_array([flat.get(path) for _, flat in self._pending]) for path in paths}
+        block = encode_block(timestamps, columns, self.precision)
+        self._repair(self._pending_day)
+        with open(self._file(self._pending_day), 'ab') as f:
+            f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        self._pending = []
+
+    def close(self):
+        self.flush()
+
+    def _repair(self, day):
+        """Cut a block torn by a crash off the end of a day's segment, once per process.
+
+        Appending after a partial block would otherwise make its length
+        field swallow the new blocks, and the day would no longer decode.
+        """
+        if day in self._repaired:
+            return
+        path = self._file(day)
+        blocks = self.blocks(day)
+        end = blocks[-1][2] + blocks[-1][4] if blocks else 0
+        if blocks:
+            first, last, offset, count, length = blocks[-1]
+            try:
+                with open(path, 'rb') as f:
+                    f.seek(offset)
+                    decode_block(f.read(length), count)
+            except Exception as e:
+                logging.warning(f"Last archive block in {path} does not decode ({str(e)}), dropping it")
+                end = offset - _BLOCK.size
+        if os.path.exists(path) and os.path.getsize(path) > end:
+            logging.warning(f"Truncating {path} to {end} bytes after an incomplete block")
+            with open(path, 'r+b') as f:
+                f.truncate(end)
+            self._index.pop(path, None)
+        self._repaired.add(day)
+
+    def blocks(self, day):
+        """Block index of a day's segment: [(first, last, body offset, count, body length)]."""
+        path = self._file(day)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return []
+        cached = self._index.get(path)
+        if cached and cached[0] == size:
+            return cached[1]
+        blocks = []
+        with open(path, 'rb') as f:
+            offset = 0
+            while offset + _BLOCK.size <= size:
+                f.seek(offset)
+                magic, version, count, first, last, length = _BLOCK.unpack(f.read(_BLOCK.size))
+                if magic != MAGIC or version != VERSION:
+                    logging.error(f"Corrupt archive block in {path} at byte {offset}, ignoring the rest")
+                    break
+                if offset + _BLOCK.size + length > size:
+                    break  # block still being written
+                blocks.append((first, last, offset + _BLOCK.size, count, length))
+                offset += _BLOCK.size + length
+        self._index[path] = (size, blocks)
+        return blocks
+
+    def _read_day(self, day, start=None, end=None, fields=None):
+        parts = []
+        blocks = self.blocks(day)
+        if not blocks:
+            return parts
+        with open(self._file(day), 'rb') as f:
+            for first, last, offset, count, length in blocks:
+                if (start is not None and last < start) or (end is not None and first >= end):
+                    continue
+                f.seek(offset)
+                timestamps, columns = decode_block(f.read(length), count, fields)
+                lo = 0 if start is None else np.searchsorted(timestamps, start, side='left')
+                hi = len(timestamps) if end is None else np.searchsorted(timestamps, end, side='left')
+                parts.append((timestamps[lo:hi], {path: values[lo:hi] for path, values in columns.items()}))
+        return parts
+
+    def query(self, start, end, fields=None, step=None):
+        """(timestamps, {path: values}) for readings with start <= timestamp < end.
+
+        With step, values are averaged over step-second buckets and the
+        timestamps are the bucket starts. Readings not yet flushed are not
+        included.
+        """
+        fields = set(fields) if fields else None
+        parts = []
+        day, last_day = self._day(start), self._day(end)
+        while day <= last_day:
+            parts.extend(self._read_day(day, start, end, fields))
+            day += timedelta(days=1)
+        timestamps, columns = _merge(parts)
+        if step:
+            return downsample(timestamps, columns, start, step)
+        return timestamps, columns
+
+    def compact(self, day):
+        """Rewrite a finished day's segment as a single block."""
+        self._repair(day)
+        blocks = self.blocks(day)
+        if len(blocks) < 2:
+            return
+        timestamps, columns = _merge(self._read_day(day))
+        path = self._file(day)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(encode_block(timestamps, columns, self.precision))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+        self._index.pop(path, None)
+        logging.info(f"Compacted {len(blocks)} archive blocks for {day}")
+
+    def _compact_past_days(self):
+        today = self._day(datetime.now(timezone.utc).timestamp())
+        for day in self.days():
+            if day < today:
+                try:
+                    self.compact(day)
+                except Exception as e:
+                    logging.error(f"Failed to compact archive for {day}: {str(e)}")
+
+    def info(self):
+        """Per-day readings, blocks and bytes on disk."""
+        return [{
+            'day': day.isoformat(),
+            'readings': sum(block[3] for block in self.blocks(day)),
+            'blocks': len(self.blocks(day)),
+            'bytes': os.path.getsize(self._file(day))
+        } for day in self.days()]
@@ -0,0 +1,90 @@
+import math
+import warnings
+
+import numpy as np
+
+from uplink.encoding import META_KEYS, flatten_reading, unflatten_reading
+
+STATIC_KEYS = ('timestamp',) + META_KEYS
+
+def _numeric(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+class ReadingBuffer:
+    """Columnar ring buffer of recent readings with vectorised window statistics.
+
+    Every numeric field (by its flatten_reading path) gets its own
+    preallocated float64 column sized for the retention period, so once a
+    field has been seen, append() only stores into existing arrays. Missing,
+    null and non-numeric values are kept as NaN and left out of the
+    statistics. Window queries assume readings are appended in time order.
+    """
+
+    def __init__(self, retention, interval, percentiles=(50, 95)):
+        self.capacity = max(2, math.ceil(retention / interval) + 1)
+        self.percentiles = percentiles
+        self.timestamps = np.full(self.capacity, np.nan)
+        self.columns = {}  # field path -> values
+        self.total = 0  # readings ever appended
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def append(self, reading):
+        index = self.total % self.capacity
+        flat = flatten_reading({k: v for k, v in reading.items() if k not in STATIC_KEYS})
+        for path, value in flat.items():
+            if path not in self.columns and _numeric(value):
+                self.columns[path] = np.full(self.capacity, np.nan)
+        for path, column in self.columns.items():
+            value = flat.get(path)
+            column[index] = value if _numeric(value) else np.nan
+        self.timestamps[index] = reading['timestamp']
+        self.total += 1
+
+    def _rows(self, seconds, now):
+        """Ring indexes of the readings from the last `seconds` before `now`, oldest first."""
+        count = len(self)
+        rows = np.arange(self.total - count, self.total) % self.capacity
+        if now is None:
+            now = self.timestamps[rows[-1]] if count else 0.0
+        start = np.searchsorted(self.timestamps[rows], now - seconds, side='left')
+        return rows[start:]
+
+    def window(self, seconds, now=None):
+        """(timestamps, {path: values}) for the readings in the window."""
+        rows = self._rows(seconds, now)
+        return self.timestamps[rows], {path: column[rows] for path, column in self.columns.items()}
+
+    def stats(self, seconds, now=None):
+        """{path: {'mean', 'min', 'max', 'p50', 'p95', 'count'}} over the window, skipping empty fields."""
+        rows = self._rows(seconds, now)
+        if not len(rows) or not self.columns:
+            return {}
+        paths = list(self.columns)
+        block = np.vstack([self.columns[path][rows] for path in paths])
+        counts = np.count_nonzero(~np.isnan(block), axis=1)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN fields, dropped below
+            mean = np.nanmean(block, axis=1)
+            low = np.nanmin(block, axis=1)
+            high = np.nanmax(block, axis=1)
+            ranks = np.nanpercentile(block, self.percentiles, axis=1)
+        result = {}
+        for i, path in enumerate(paths):
+            if not counts[i]:
+                continue
+            stats = {'mean': float(mean[i]), 'min': float(low[i]), 'max': float(high[i]), 'count': int(counts[i])}
+            for p, values in zip(self.percentiles, ranks):
+                stats[f"p{p}"] = float(values[i])
+            result[path] = stats
+        return result
+
+    def report(self, latest, seconds):
+        """A reading carrying window means in the usual fields and the other aggregates under 'window'."""
+        static = {key: latest[key] for key in STATIC_KEYS if key in latest}
+        stats = self.stats(seconds, now=latest.get('timestamp'))
+        window = {'seconds': seconds, 'samples': len(self._rows(seconds, latest.get('timestamp')))}
+        for name in ('min', 'max') + tuple(f"p{p}" for p in self.percentiles):
+            window[name] = unflatten_reading({path: s[name] for path, s in stats.items()})
+        return {**static, **unflatten_reading({path: s['mean'] for path, s in stats.items()}), 'window': window}
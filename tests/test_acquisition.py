@@ -0,0 +1,169 @@
+"""Tests for sensor acquisition on the shared I2C bus."""
+import sys
+from os.path import dirname, abspath
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+import time
+
+from sensors import (AcquisitionEngine, BME280Sensor, TSL2591Sensor, LTR390Sensor,
+                     ICM20948Sensor, SGP40Sensor, RecordingBus, ReplayBus, SensorHealth, bring_up)
+from sensors import startup
+from sensors.read_planner import ReadPlanner
+from sensors.trace_bus import read_trace, trace_summary
+from config import BME280_ADDR, TSL2591_ADDR, LTR390_ADDR, ICM20948_ADDR, SGP40_ADDR
+
+class FakeBus:
+    """Minimal SMBus stand-in that records the order of transactions."""
+    def __init__(self):
+        self.calls = []
+
+    def write_byte_data(self, addr, reg, value):
+        self.calls.append(('write', addr, reg))
+
+    def write_i2c_block_data(self, addr, reg, data):
+        self.calls.append(('write', addr, reg))
+
+    def read_i2c_block_data(self, addr, reg, length):
+        self.calls.append(('read', addr, reg))
+        return [0] * length
+
+def make_sensors(bus):
+    return {
+        'bme280': BME280Sensor(bus, BME280_ADDR),
+        'tsl2591': TSL2591Sensor(bus, TSL2591_ADDR),
+        'ltr390': LTR390Sensor(bus, LTR390_ADDR),
+        'icm20948': ICM20948Sensor(bus, ICM20948_ADDR),
+        'sgp40': SGP40Sensor(bus, SGP40_ADDR)
+    }
+
+def test_bring_up_overlaps_settle_times(monkeypatch):
+    """All init writes go out before one shared settle wait, and a failing sensor is reported."""
+    bus = FakeBus()
+    devices = {
+        'tsl2591': (TSL2591Sensor, TSL2591_ADDR),
+        'ltr390': (LTR390Sensor, LTR390_ADDR),
+        'icm20948': (ICM20948Sensor, ICM20948_ADDR),
+        'sgp40': (SGP40Sensor, SGP40_ADDR),
+        'missing': (BME280Sensor, None)
+    }
+    bus.read_i2c_block_data = lambda addr, reg, length: (
+        FakeBus.read_i2c_block_data(bus, addr, reg, length) if addr else 1 / 0)
+
+    delays = []
+    monkeypatch.setattr(startup, 'sleep', delays.append)
+    sensors, failed = bring_up(bus, devices)
+
+    assert list(sensors) == ['tsl2591', 'ltr390', 'icm20948', 'sgp40']
+    assert list(failed) == ['missing']
+    assert len(delays) == 1 and 0.05 < delays[0] <= 0.1  # one settle time, not four
+    # The ICM20948 chip ID is only read once every device has been configured
+    assert bus.calls[-1] == ('read', ICM20948_ADDR, 0x00)
+
+def test_reads_overlap_sgp40_conversion():
+    """Other sensors are read between the SGP40 trigger and its collect."""
+    bus = FakeBus()
+    sensors = make_sensors(bus)
+    engine = AcquisitionEngine(sensors)
+    bus.calls.clear()
+
+    readings = engine.run_cycle()
+
+    assert list(readings) == list(sensors)
+    assert all(readings[name] is not None for name in sensors)
+    # The SGP40 measure command goes out first and its result is fetched last
+    assert bus.calls[0] == ('write', SGP40_ADDR, 0x26)
+    assert bus.calls[-1] == ('read', SGP40_ADDR, 0x00)
+    assert engine.last_timing['cycle'] >= SGP40Sensor.CONVERSION_TIME
+    assert set(engine.last_timing['sensors']) == set(sensors)
+
+def test_failed_sensor_does_not_block_cycle():
+    """A sensor that raises is reported as None without affecting the rest."""
+    bus = FakeBus()
+    sensors = make_sensors(bus)
+
+    def broken():
+        raise Exception("bus timeout")
+    sensors['tsl2591'].collect = broken
+
+    readings = AcquisitionEngine(sensors).run_cycle()
+    assert readings['tsl2591'] is None
+    assert readings['sgp40'] is not None
+
+def test_circuit_breaker_skips_and_reprobes_sensor():
+    """A sensor that keeps failing is skipped until a background probe finds it again."""
+    bus = FakeBus()
+    sensors = make_sensors(bus)
+    tsl_reads = []
+    bus.read_i2c_block_data = lambda addr, reg, length: (
+        tsl_reads.append(reg) or 1 / 0 if addr == TSL2591_ADDR else FakeBus.read_i2c_block_data(bus, addr, reg, length))
+    probe_results = [Exception("no ACK"), Exception("no ACK"), 'sensor']
+
+    def probe():
+        result = probe_results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return TSL2591Sensor(bus, TSL2591_ADDR)
+
+    health = SensorHealth({'tsl2591': probe, 'sgp40': probe}, failure_threshold=3, backoff=10, max_backoff=15)
+    engine = AcquisitionEngine(sensors, health=health)
+    for _ in range(5):
+        readings = engine.run_cycle()
+        assert readings['tsl2591'] is None and readings['sgp40'] is not None
+    assert len(tsl_reads) == 3  # skipped once the breaker opened
+    assert health.report() == {'tsl2591': 'down', 'sgp40': 'ok'}
+
+    # The first probe comes after 10 seconds, later ones 15 apart (doubling, capped)
+    now = time.monotonic()
+    assert health.probe_due(now + 5) == [] and len(probe_results) == 3
+    assert health.probe_due(now + 11) == []
+    assert health.probe_due(now + 20) == [] and len(probe_results) == 2
+    assert health.probe_due(now + 26) == []
+    assert health.probe_due(now + 41) == ['tsl2591']
+    del bus.read_i2c_block_data
+
+    readings = engine.run_cycle()
+    assert readings['tsl2591'] is not None
+    assert health.report()['tsl2591'] == 'ok' and health.recoveries['tsl2591'] == 1
+
+def test_record_and_replay_bus(tmp_path):
+    """Readings taken through a recorded trace replay identically without hardware."""
+    path = str(tmp_path / 'trace.bin')
+    bus = FakeBus()
+    bus.read_i2c_block_data = lambda addr, reg, length: [(addr + reg + i) & 0xFF for i in range(length)]
+    recorder = RecordingBus(bus, path)
+    recorded = AcquisitionEngine(make_sensors(recorder)).run_cycle()
+    recorder.close()
+
+    replayed = AcquisitionEngine(make_sensors(ReplayBus(path))).run_cycle()
+    assert replayed == recorded
+    assert trace_summary(path)['0x59']['transactions'] == 3  # SGP40 init, trigger and collect
+
+def test_recording_bus_flushes_while_running(tmp_path):
+    """The trace is readable before close(), every flush_records records."""
+    path = str(tmp_path / 'trace.bin')
+    recorder = RecordingBus(FakeBus(), path, flush_records=4, flush_interval=3600)
+    for reg in range(6):
+        recorder.write_byte_data(0x29, reg, reg)
+    _, records = read_trace(path)
+    assert [record[4] for record in records] == [0, 1, 2, 3]
+    recorder.close()
+    assert len(read_trace(path)[1]) == 6
+
+def test_read_planner_merges_and_caches():
+    """Contiguous ranges become one burst and calibration is only read at initialisation."""
+    bus = FakeBus()
+    sensors = make_sensors(bus)
+    engine = AcquisitionEngine(sensors)
+    bus.calls.clear()
+    engine.run_cycle()
+
+    reads = [call for call in bus.calls if call[0] == 'read']
+    assert ('read', BME280_ADDR, 0x88) not in reads
+    assert [call for call in reads if call[1] == ICM20948_ADDR] == [('read', ICM20948_ADDR, 0x2D)]
+    # One read per sensor, plus the SGP40 measure command
+    assert engine.last_timing['transactions'] == 6
+    assert engine.last_timing['bytes'] == 8 + 4 + 3 + 12 + 1 + 3
+
+    planner = ReadPlanner(bus, 0x10)
+    assert planner.plan(((0x00, 20), (0x14, 20))) == [(0x00, 20), (0x14, 20)]  # would exceed 32 bytes
+    assert planner.plan(((0x10, 2), (0x12, 4), (0x11, 2))) == [(0x10, 6)]
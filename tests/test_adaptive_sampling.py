@@ -0,0 +1,83 @@
+"""Tests for adaptive per-sensor sampling."""
+import math
+import sys
+from datetime import timezone
+from os.path import dirname, abspath
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+import main
+from clock import VirtualClock
+from sensors import AdaptiveSampler, MockSensor
+from uplink import parse_thresholds
+
+THRESHOLDS = parse_thresholds('bme280.temperature=0.1,tsl2591.lux=5%')
+
+class FixedSun:
+    timezone = timezone.utc
+
+    def __init__(self, sunrise, sunset):
+        self.times = (sunrise, (sunrise + sunset) / 2, sunset)
+
+    def get_sun_times(self, day):
+        return self.times
+
+def run(sampler, start, end, temperature, lux):
+    """Drive the sampler like the main loop does and count the samples per sensor."""
+    now = start
+    merged = None
+    while now < end:
+        due = sampler.due(now)
+        readings = {name: {'temperature': temperature(now)} if name == 'bme280' else {'lux': lux(now)}
+                    for name in due}
+        merged = sampler.update(readings, now)
+        now = max(sampler.next_due(), now + 1)
+    return merged
+
+def test_intervals_follow_rate_of_change():
+    """A steady sensor backs off to the maximum interval while a fast-changing one is sampled often."""
+    sampler = AdaptiveSampler(['bme280', 'tsl2591'], THRESHOLDS, min_interval=5, max_interval=600,
+                              initial_interval=60)
+    merged = run(sampler, 0, 6 * 3600,
+                 temperature=lambda t: 21.0,
+                 lux=lambda t: 500 + 400 * math.sin(t / 600))
+    assert sampler.intervals['bme280'] == 600
+    assert sampler.intervals['tsl2591'] < 60
+    assert sampler.reads['bme280'] < 50
+    assert sampler.reads['tsl2591'] > 6 * 3600 / 60
+    # Every merged reading still carries both sensors
+    assert merged['bme280'] == {'temperature': 21.0} and 'lux' in merged['tsl2591']
+
+    # The interval tightens on the first sample after the steady sensor starts moving
+    sampler.update({'bme280': {'temperature': 23.0}}, sampler.next_due() + 600)
+    assert sampler.intervals['bme280'] < 120
+
+def test_light_sensors_boosted_around_sunrise():
+    """Within the twilight window the light sensors run at the minimum interval even when dark and still."""
+    sunrise, sunset = 6 * 3600, 18 * 3600
+    sampler = AdaptiveSampler(['bme280', 'tsl2591'], THRESHOLDS, min_interval=5, max_interval=600,
+                              sun_predictor=FixedSun(sunrise, sunset), twilight=1800)
+    run(sampler, 0, sunrise - 1800, temperature=lambda t: 15.0, lux=lambda t: 0.0)
+    night_reads = sampler.reads['tsl2591']
+    run(sampler, sunrise - 1800, sunrise + 1800, temperature=lambda t: 15.0, lux=lambda t: 0.0)
+    assert night_reads < 40
+    assert sampler.reads['tsl2591'] - night_reads >= 3600 / 5 - 120
+    assert sampler.reads['bme280'] < 2 * 40
+
+def test_held_values_are_uploaded_but_not_buffered_or_archived(monkeypatch):
+    """Sensors that were not due carry their last value in the upload, but only fresh values are recorded."""
+    for name, value in {'USE_MOCK': True, 'ARCHIVE_DIR': '', 'METRICS_PORT': None, 'METRICS_SOCKET': ''}.items():
+        monkeypatch.setattr(main, name, value)
+    clock = VirtualClock(start=1000.0)
+    manager = main.SensorManager(sink=lambda reading: None, motor=False, clock=clock)
+    manager.sampler = AdaptiveSampler(MockSensor.SENSORS, THRESHOLDS, min_interval=5, max_interval=600,
+                                      initial_interval=60)
+    manager.sampler.intervals['bme280'] = 600
+
+    first, fresh = manager._read_adaptive()
+    assert fresh['bme280'] == first['bme280']
+    clock.sleep(60)
+    second, fresh = manager._read_adaptive()
+    assert second['timestamp'] == fresh['timestamp'] == 1060.0
+    assert second['bme280'] == first['bme280']
+    assert 'bme280' not in fresh
+    assert fresh['tsl2591'] == second['tsl2591']
@@ -0,0 +1,27 @@
+"""Tests for the fleet simulator."""
+import asyncio
+import sys
+from os.path import dirname, abspath
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from benchmarks.standin import IngestStandIn
+from fleet_sim import parse_args, run_simulation
+from sensors.mock_fleet import MockFleet
+
+def test_fleet_readings_are_seeded_per_device():
+    fleet = MockFleet(50, seed=7)
+    first = fleet.reading(3, 0, 1000.0)
+    assert first['device_id'] == 'sim-00003'
+    assert 20.0 <= first['bme280']['temperature'] <= 30.0
+    assert MockFleet(50, seed=7).reading(3, 0, 1000.0) == first
+    assert fleet.reading(4, 0, 1000.0)['location'] != first['location']
+    assert fleet.reading(3, 1, 1000.0)['bme280'] != first['bme280']
+
+def test_simulated_fleet_posts_to_standin():
+    with IngestStandIn() as standin:
+        args = parse_args(['--devices', '200', '--interval', '0.5', '--duration', '1.0',
+                           '--batch', '2', '--encoding', 'columnar', '--endpoint', standin.url])
+        summary = asyncio.run(run_simulation(args))
+    assert summary['error_rate'] == 0.0
+    assert summary['requests'] == 200
+    assert summary['readings'] == standin.readings == 400
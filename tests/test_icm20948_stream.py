@@ -0,0 +1,168 @@
+"""Tests for ICM20948 FIFO streaming. Needs NumPy (the analysis extra)."""
+import sys
+from os.path import dirname, abspath
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from sensors import AcquisitionEngine, BME280Sensor, ICM20948Sensor, LockedBus, SensorHealth, SGP40Sensor
+from sensors.icm20948_stream import ICM20948Stream, SampleRing
+from uplink import DeadbandFilter, parse_thresholds
+from config import BME280_ADDR, ICM20948_ADDR, SGP40_ADDR
+
+class FifoBus:
+    """Minimal SMBus stand-in whose ICM20948 FIFO holds the queued sample records."""
+    def __init__(self):
+        self.calls = []
+        self.fifo = bytearray()
+
+    def write_byte_data(self, addr, reg, value):
+        self.calls.append(('write', addr, reg))
+
+    def write_i2c_block_data(self, addr, reg, data):
+        self.calls.append(('write', addr, reg))
+
+    def push(self, accel, gyro):
+        raw = [round(v * 32768 / 4.0) for v in accel] + [round(v * 32768 / 2000.0) for v in gyro]
+        self.fifo += b''.join(value.to_bytes(2, 'big', signed=True) for value in raw)
+
+    def read_i2c_block_data(self, addr, reg, length):
+        self.calls.append(('read', addr, reg))
+        if reg == 0x70:
+            return [len(self.fifo) >> 8, len(self.fifo) & 0xFF]
+        if reg == 0x72:
+            data, self.fifo = self.fifo[:length], self.fifo[length:]
+            return list(data)
+        return [0] * length
+
+def test_icm20948_stream_window_summary():
+    """FIFO samples are drained in bursts and summarised per report window."""
+    bus = FifoBus()
+    stream = ICM20948Stream(ICM20948Sensor(bus, ICM20948_ADDR), rate=500)
+    for i in range(30):
+        bus.push((0.0, 0.0, 3.0 if i == 10 else 1.0), (0.0, 0.0, 10.0))
+    bus.calls.clear()
+
+    assert stream.drain() == 30
+    # FIFO count, then 15 reads of two records each
+    assert bus.calls.count(('read', ICM20948_ADDR, 0x72)) == 15
+
+    reading = stream.collect()
+    window = reading['window']
+    assert window['samples'] == 30
+    assert abs(reading['accelerometer']['z'] - (29 + 3) / 30) < 1e-3
+    assert abs(window['accelerometer']['z']['p2p'] - 2.0) < 1e-3
+    assert window['accelerometer']['z']['crossings'] == 1
+    assert window['events'] == 1
+    assert abs(reading['gyroscope']['z'] - 10.0) < 0.1
+
+    # An empty window falls back to a register snapshot with the same fields
+    assert stream.collect()['window']['samples'] == 1
+
+def test_stream_summary_under_deadband_sends_only_real_changes():
+    """Window timing changes every report, but on its own it does not make the deadband send a delta."""
+    bus = FifoBus()
+    stream = ICM20948Stream(ICM20948Sensor(bus, ICM20948_ADDR), rate=500)
+    deadband = DeadbandFilter(parse_thresholds('icm20948.accelerometer.z=0.5'), keyframe_interval=3600)
+
+    def report(count, spike=False):
+        for i in range(count):
+            bus.push((0.0, 0.0, 3.0 if spike and i == 5 else 1.0), (0.0, 0.0, 10.0))
+        time.sleep(0.01)
+        return deadband.apply({'timestamp': time.time(), 'icm20948': stream.collect()})
+
+    assert report(30)['keyframe']
+    assert report(31) is None  # a sample more and a slightly longer window
+    delta = report(30, spike=True)['icm20948']['window']
+    assert delta['events'] == 1
+    assert delta['first_event'] is not None and 'seconds' in delta  # context rides along with the change
+
+def test_sample_ring_wraps():
+    ring = SampleRing(4, 1)
+    ring.extend([[1], [2], [3]])
+    ring.extend([[4], [5], [6]])
+    assert ring.since(0).ravel().tolist() == [3, 4, 5, 6]
+    assert ring.since(4).ravel().tolist() == [5, 6]
+
+class AddressingBus(FifoBus):
+    """Selects the device and then transfers in two steps, like smbus2, counting transfers to the wrong device."""
+    def __init__(self):
+        super().__init__()
+        self.selected = None
+        self.misdirected = 0
+
+    def _select(self, addr):
+        self.selected = addr
+        time.sleep(0)  # let another thread in between, as the two ioctls do
+
+    def _transfer(self, addr):
+        if self.selected != addr:
+            self.misdirected += 1
+
+    def write_byte_data(self, addr, reg, value):
+        self._select(addr)
+        self._transfer(addr)
+        super().write_byte_data(addr, reg, value)
+
+    def write_i2c_block_data(self, addr, reg, data):
+        self._select(addr)
+        self._transfer(addr)
+        super().write_i2c_block_data(addr, reg, data)
+
+    def read_i2c_block_data(self, addr, reg, length):
+        self._select(addr)
+        self._transfer(addr)
+        return super().read_i2c_block_data(addr, reg, length)
+
+def test_fifo_drain_and_reading_cycle_share_the_bus_safely():
+    """With a LockedBus, drains on another thread never split another sensor's transaction."""
+    fake = AddressingBus()
+    bus = LockedBus(fake)
+    stream = ICM20948Stream(ICM20948Sensor(bus, ICM20948_ADDR), rate=500)
+    engine = AcquisitionEngine({'bme280': BME280Sensor(bus, BME280_ADDR), 'sgp40': SGP40Sensor(bus, SGP40_ADDR)})
+    stop = threading.Event()
+
+    def drain():
+        while not stop.is_set():
+            with bus.lock:
+                for _ in range(4):
+                    fake.push((0.0, 0.0, 1.0), (0.0, 0.0, 0.0))
+            stream.drain()
+
+    thread = threading.Thread(target=drain)
+    thread.start()
+    try:
+        for _ in range(5):
+            assert all(reading is not None for reading in engine.run_cycle().values())
+    finally:
+        stop.set()
+        thread.join()
+    assert fake.calls.count(('read', ICM20948_ADDR, 0x72)) > 0
+    assert fake.misdirected == 0
+
+def test_reprobed_icm20948_is_reattached_on_the_reading_thread():
+    """A recovered ICM20948 only reconfigures the stream's FIFO when the reading loop takes it back."""
+    bus = LockedBus(FifoBus())
+    stream = ICM20948Stream(ICM20948Sensor(bus, ICM20948_ADDR), rate=500)
+    health = SensorHealth({'icm20948': lambda: ICM20948Sensor(bus, ICM20948_ADDR)}, backoff=1)
+    engine = AcquisitionEngine({'icm20948': stream}, health=health)
+    configured = []
+    configure_fifo = stream.configure_fifo
+    stream.configure_fifo = lambda: configured.append(threading.current_thread()) or configure_fifo()
+
+    health.mark_down('icm20948', Exception("no ACK"))
+    prober = threading.Thread(target=health.probe_due, args=(time.monotonic() + 2,))
+    prober.start()
+    prober.join()
+    assert configured == []  # the probe thread only built the driver
+
+    old_sensor = stream.sensor
+    assert engine.run_cycle()['icm20948'] is not None
+    assert engine.sensors['icm20948'] is stream
+    assert stream.sensor is not old_sensor
+    assert configured == [threading.current_thread()]
@@ -0,0 +1,50 @@
+"""Tests for the queued, rotated and rate-limited log setup."""
+import gzip
+import logging
+import queue
+import sys
+from os.path import dirname, abspath
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from log_setup import DeferredQueueHandler, RateLimitFilter, file_handler
+
+def make_record(lineno, created, msg='Error reading %s', args=('sgp40',)):
+    record = logging.LogRecord('root', logging.ERROR, 'main.py', lineno, msg, args, None)
+    record.created = created
+    return record
+
+def test_rate_limit_per_call_site():
+    """A repeating call site is cut off after the burst and reports how much it held back."""
+    limit = RateLimitFilter(burst=3, window=60)
+    passed = [limit.filter(make_record(10, t)) for t in range(10)]
+    assert passed == [True] * 3 + [False] * 7
+    assert limit.filter(make_record(20, 5))  # other call sites are unaffected
+
+    record = make_record(10, 61)
+    assert limit.filter(record)
+    assert record.getMessage() == 'Error reading sgp40 (7 similar messages suppressed)'
+    assert limit.suppressed == 7
+
+def test_queue_handler_defers_formatting_and_never_blocks():
+    """Records are queued unformatted, and dropped rather than blocking when the queue is full."""
+    handler = DeferredQueueHandler(queue.Queue(2))
+    for i in range(3):
+        handler.handle(make_record(10, i))
+    record = handler.queue.get_nowait()
+    assert record.args == ('sgp40',) and record.msg == 'Error reading %s'
+    assert handler.dropped == 1
+
+def test_rotated_logs_are_compressed(tmp_path):
+    path = tmp_path / 'sensor_app.log'
+    handler = file_handler(str(path), max_bytes=500, backup_count=2)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    for i in range(100):
+        handler.handle(make_record(10, i, msg='reading %d', args=(i,)))
+    handler.close()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['sensor_app.log', 'sensor_app.log.1.gz', 'sensor_app.log.2.gz']
+    # The newest backup ends where the live file starts
+    current = path.read_text().splitlines()
+    with gzip.open(tmp_path / 'sensor_app.log.1.gz', 'rt') as f:
+        rotated = f.read().splitlines()
+    assert int(rotated[-1].split()[1]) + 1 == int(current[0].split()[1])
@@ -0,0 +1,44 @@
+"""Tests for the metrics registry and scrape endpoint."""
+import socket
+import sys
+import urllib.request
+from os.path import dirname, abspath
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from metrics import Registry, MetricsServer, instrument
+
+class Sensor:
+    def collect(self):
+        return {'temperature': 21.5}
+
+def test_instrumented_method_renders_histogram():
+    """Wrapped calls land in the histogram and render as Prometheus text."""
+    registry = Registry()
+    sensor = Sensor()
+    instrument(sensor, 'collect', registry.histogram('sensor_read_seconds', 'Sensor read', {'sensor': 'bme280'}))
+    depth = [3]
+    registry.observe('upload_queue_depth', 'Queued readings', lambda: depth[0])
+
+    assert sensor.collect() == {'temperature': 21.5}
+    sensor.collect()
+    depth[0] = 7
+
+    text = registry.render()
+    assert '# TYPE sensor_read_seconds histogram' in text
+    assert 'sensor_read_seconds_bucket{sensor="bme280",le="+Inf"} 2' in text
+    assert 'sensor_read_seconds_count{sensor="bme280"} 2' in text
+    assert 'upload_queue_depth 7' in text
+
+def test_metrics_server_serves_registry():
+    registry = Registry()
+    registry.counter('stepper_steps_total', 'Steps moved').inc(42)
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    server = MetricsServer(registry, port=port)
+    server.start()
+    try:
+        body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read().decode()
+    finally:
+        server.stop()
+    assert 'stepper_steps_total 42' in body
@@ -0,0 +1,44 @@
+"""Tests for the in-memory reading buffer."""
+import sys
+from os.path import dirname, abspath
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from storage import ReadingBuffer
+
+def reading(timestamp, temperature, lux=None):
+    return {
+        'timestamp': timestamp,
+        'device_id': 'pi-0001',
+        'bme280': {'temperature': temperature, 'status': 'ok'},
+        'tsl2591': {'lux': lux}
+    }
+
+def test_window_stats_and_wraparound():
+    buffer = ReadingBuffer(retention=10, interval=1)
+    for t in range(30):
+        buffer.append(reading(1000.0 + t, float(t), lux=100.0 if t % 2 else None))
+
+    assert len(buffer) == buffer.capacity == 11
+    stats = buffer.stats(4)  # readings at t = 25..29
+    assert stats['bme280.temperature']['mean'] == 27.0
+    assert stats['bme280.temperature']['min'] == 25.0
+    assert stats['bme280.temperature']['max'] == 29.0
+    assert stats['bme280.temperature']['p50'] == 27.0
+    assert stats['tsl2591.lux']['count'] == 3  # nulls at even t are skipped
+    assert 'bme280.status' not in stats
+
+    # Windows longer than the retention only see what is kept
+    assert buffer.stats(1000)['bme280.temperature']['count'] == 11
+
+def test_report_carries_window_aggregates():
+    buffer = ReadingBuffer(retention=60, interval=1)
+    for t in range(10):
+        buffer.append(reading(2000.0 + t, 20.0 + t))
+    report = buffer.report(reading(2009.0, 29.0), 4)
+
+    assert report['timestamp'] == 2009.0
+    assert report['device_id'] == 'pi-0001'
+    assert report['bme280']['temperature'] == 27.0
+    assert report['window']['samples'] == 5
+    assert report['window']['max']['bme280']['temperature'] == 29.0
+    assert report['window']['p95']['bme280']['temperature'] > 28.0
@@ -0,0 +1,70 @@
+"""Tests for the multi-process runtime: the shared-memory ring and worker supervision."""
+import multiprocessing
+import sys
+import time
+from os.path import dirname, abspath
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from runtime import SharedRing, Supervisor
+
+def push_messages(ring_name, lock, count):
+    ring = SharedRing(lock, slots=8, slot_size=64, name=ring_name)
+    for i in range(count):
+        ring.push(f"reading {i}".encode())
+    ring.close()
+
+def crash_once(stop, starts):
+    with starts.get_lock():
+        starts.value += 1
+        first = starts.value == 1
+    if first:
+        sys.exit(3)
+    stop.wait()
+
+def test_shared_ring_hands_messages_between_processes():
+    """Messages pushed in another process arrive in order, and a full ring drops the oldest."""
+    context = multiprocessing.get_context('spawn')
+    lock = context.Lock()
+    ring = SharedRing(lock, slots=8, slot_size=64)
+    try:
+        producer = context.Process(target=push_messages, args=(ring.name, lock, 5))
+        producer.start()
+        producer.join()
+        assert len(ring) == 5
+        assert ring.pop(limit=2) == [b'reading 0', b'reading 1']
+        assert ring.pop() == [b'reading 2', b'reading 3', b'reading 4']
+        assert ring.pop() == []
+
+        producer = context.Process(target=push_messages, args=(ring.name, lock, 11))
+        producer.start()
+        producer.join()
+        assert ring.dropped == 3
+        assert ring.pop() == [f"reading {i}".encode() for i in range(3, 11)]
+
+        try:
+            ring.push(b'x' * 61)
+            assert False, "oversized message accepted"
+        except ValueError:
+            pass
+    finally:
+        ring.close()
+
+def test_supervisor_restarts_crashed_worker():
+    """A worker that exits on its own is restarted after the backoff and stopped cleanly with the rest."""
+    context = multiprocessing.get_context('spawn')
+    starts = context.Value('i', 0)
+    supervisor = Supervisor(context, backoff=0.1, max_backoff=0.2)
+    supervisor.add('flaky', crash_once, (starts,))
+    supervisor.start()
+    try:
+        deadline = time.monotonic() + 30
+        while starts.value < 2 and time.monotonic() < deadline:
+            supervisor.check()
+            time.sleep(0.05)
+        assert starts.value == 2
+        assert supervisor.restarts['flaky'] == 1
+    finally:
+        supervisor.stop()
+    process = supervisor.workers['flaky']['process']
+    assert not process.is_alive()
+    assert process.exitcode == 0
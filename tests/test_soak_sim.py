@@ -0,0 +1,54 @@
+"""Tests for the virtual clock and the soak simulation built on it."""
+import sys
+import threading
+import time
+from os.path import dirname, abspath
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+import config
+import main
+from benchmarks.standin import IngestStandIn
+from clock import VirtualClock
+from motor import StepperController
+from soak_sim import parse_args, run_soak
+
+def test_virtual_clock_runs_threads_in_simulated_order():
+    """Attached threads wake in deadline order, and simulated hours pass without real waiting."""
+    clock = VirtualClock(start=1000.0)
+    wakeups = []
+
+    def tick(name, period, count):
+        for _ in range(count):
+            clock.sleep(period)
+            wakeups.append((clock.time(), name))
+        clock.detach()
+
+    threads = [threading.Thread(target=tick, args=('fast', 600, 6)),
+               threading.Thread(target=tick, args=('slow', 1500, 2))]
+    started = time.perf_counter()
+    for thread in threads:
+        clock.attach()  # all of them before any starts, or the first would run ahead
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert time.perf_counter() - started < 5
+    assert clock.time() == 4600.0
+    assert sorted(wakeups) == [(1600.0, 'fast'), (2200.0, 'fast'), (2500.0, 'slow'), (2800.0, 'fast'),
+                               (3400.0, 'fast'), (4000.0, 'fast'), (4000.0, 'slow'), (4600.0, 'fast')]
+    # Nothing runs ahead of a thread that is still due
+    assert [t for t, _ in wakeups] == sorted(t for t, _ in wakeups)
+
+def test_soak_run_accounts_for_every_reading_and_step():
+    """Two simulated days: every reading arrives at the stand-in and the panel sweeps out and back daily."""
+    args = parse_args(['--days', '2', '--start', '2025-06-01', '--interval', '60', '--quantum', '1', '--batch', '200'])
+    with IngestStandIn() as standin:
+        summary = run_soak(args, standin.url)
+    assert summary['readings'] == 2 * 1440
+    assert summary['uploaded_readings'] == standin.readings == summary['readings']
+    assert summary['upload_dropped'] == summary['upload_failures'] == 0
+    assert summary['steps_moved'] == 2 * 2 * (StepperController.TOTAL_STEPS - 1)
+    assert summary['speedup'] > 1000
+    # The run leaves main's configuration as it found it
+    assert main.USE_MOCK == config.USE_MOCK and main.ARCHIVE_DIR == config.ARCHIVE_DIR
@@ -1,4 +1,5 @@
 """Test routine for solar tracking system."""
+import json
 import logging
 import time
 import sys
@@ -7,7 +8,8 @@ from os.path import dirname, abspath, join
 from zoneinfo import ZoneInfo
 sys.path.append(dirname(dirname(abspath(__file__))))
 
-from motor import SunPredictor, StepperController
+from clock import VirtualClock
+from motor import SunPredictor, StepperController, PanelScheduler
 from config import LATITUDE, LONGITUDE
 
 def test_solar_tracking():
@@ -123,6 +125,113 @@ def test_production_mode():
     else:
         logging.warning("Production mode test skipped - Astral library not available")
 
+def test_batch_sun_positions():
+    """Vectorised batch positions agree with the per-call path and with Astral."""
+    import pytest
+    np = pytest.importorskip("numpy")
+
+    sun_predictor = SunPredictor(LATITUDE, LONGITUDE)
+    start = datetime(2025, 3, 28, tzinfo=timezone.utc).timestamp()  # spans the clock change
+    timestamps = np.arange(start, start + 4 * 86400, 600.0)
+    result = sun_predictor.get_sun_positions(timestamps)
+
+    assert result.shape == (len(timestamps), 3)
+    for ts, (position, azimuth, elevation) in zip(timestamps[::7], result[::7]):
+        expected = sun_predictor.get_sun_position(datetime.fromtimestamp(ts, timezone.utc))
+        assert abs(position - expected) < 1e-9
+
+    if not sun_predictor.use_mock:
+        from astral.sun import elevation as astral_elevation
+        for ts, (_, _, elevation) in zip(timestamps[::25], result[::25]):
+            when = datetime.fromtimestamp(ts, timezone.utc)
+            assert abs(elevation - astral_elevation(sun_predictor.location.observer, when, with_refraction=False)) < 0.01
+
+    # Azimuth mode stays east at night and moves west through the day
+    tracked = sun_predictor.get_sun_positions(timestamps[:144], mode='azimuth')[:, 0]
+    assert tracked[0] == 0.0
+    assert tracked.max() > 0.8
+
+def test_panel_scheduler_events():
+    """Scheduled moves land on step boundaries during daylight and none fall at night."""
+    sun_predictor = SunPredictor(LATITUDE, LONGITUDE)
+    stepper = StepperController(mock_mode=True)
+    scheduler = PanelScheduler(sun_predictor, stepper, quantum=4)
+
+    day = datetime(2025, 6, 21).date()
+    sunrise, _, sunset = sun_predictor.get_sun_times(day)
+    times, targets = scheduler.events_for_day(day)
+
+    assert len(times) == len(range(4, stepper.TOTAL_STEPS, 4)) + 1
+    assert times == sorted(times) and sunrise < times[0] and times[-1] == sunset
+    assert targets[-1] == 0  # back east at sunset
+    for when, steps in zip(times[:-1:10], targets[:-1:10]):
+        assert scheduler.target_steps(when + 1) == steps
+
+    # After sunset the next wakeup is the first move of the following morning
+    when, steps = scheduler.next_event(sunset + 60)
+    next_sunrise = sun_predictor.get_sun_times(day + timedelta(days=1))[0]
+    assert next_sunrise < when < next_sunrise + 3600 and steps == 4
+    stepper.cleanup()
+
+def count_computations(sun_predictor):
+    """Record the days SunPredictor actually computes, as opposed to serving from its cache or table."""
+    computed = []
+    compute = sun_predictor._compute_sun_times
+
+    def counting(day):
+        computed.append(day)
+        return compute(day)
+
+    sun_predictor._compute_sun_times = counting
+    return computed
+
+def test_sun_times_cache_hits_and_evictions():
+    """Repeated days come from the LRU cache, and the least recently used day is evicted first."""
+    sun_predictor = SunPredictor(LATITUDE, LONGITUDE, cache_size=2)
+    computed = count_computations(sun_predictor)
+    d1, d2, d3 = (datetime(2025, 6, day).date() for day in (1, 2, 3))
+
+    first = sun_predictor.get_sun_times(d1)
+    sun_predictor.get_sun_times(d2)
+    assert sun_predictor.get_sun_times(d1) == first  # hit, and now the most recently used
+    sun_predictor.get_sun_times(d3)  # evicts d2
+    sun_predictor.get_sun_times(d1)
+    sun_predictor.get_sun_times(d2)
+    assert computed == [d1, d2, d3, d2]
+
+def test_ephemeris_table_reloads_identically(tmp_path):
+    """A saved table is loaded without recomputing and gives exactly the times it was built with."""
+    path = str(tmp_path / 'ephemeris.json')
+    clock = VirtualClock(datetime(2025, 6, 1, tzinfo=timezone.utc).timestamp())
+    table = SunPredictor(LATITUDE, LONGITUDE, clock=clock).build_ephemeris_table(2025, path)
+
+    sun_predictor = SunPredictor(LATITUDE, LONGITUDE, clock=clock)
+    computed = count_computations(sun_predictor)
+    sun_predictor.load_ephemeris_table(path)
+    for day in (datetime(2025, 1, 1).date(), datetime(2025, 3, 30).date(), datetime(2025, 12, 31).date()):
+        assert sun_predictor.get_sun_times(day) == table[day]
+    assert computed == []
+
+def test_stale_or_foreign_ephemeris_table_is_rebuilt(tmp_path):
+    """A table for another year or another site is replaced by one for this year and site."""
+    path = str(tmp_path / 'ephemeris.json')
+    clock = VirtualClock(datetime(2025, 6, 1, tzinfo=timezone.utc).timestamp())
+    SunPredictor(LATITUDE, LONGITUDE, clock=clock).build_ephemeris_table(2024, path)
+
+    sun_predictor = SunPredictor(LATITUDE, LONGITUDE, clock=clock)
+    computed = count_computations(sun_predictor)
+    sun_predictor.load_ephemeris_table(path)
+    assert len(computed) == 365 and computed[0] == datetime(2025, 1, 1).date()
+    with open(path) as f:
+        assert '2025-01-01' in json.load(f)['days']
+
+    elsewhere = SunPredictor(LATITUDE + 1.0, LONGITUDE, clock=clock)
+    computed = count_computations(elsewhere)
+    elsewhere.load_ephemeris_table(path)
+    assert len(computed) == 365
+    with open(path) as f:
+        assert json.load(f)['latitude'] == LATITUDE + 1.0
+
 if __name__ == "__main__":
     # Set up logging
     logging.basicConfig(
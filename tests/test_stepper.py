@@ -0,0 +1,72 @@
+"""Tests for the stepper motion engine."""
+import sys
+import threading
+from os.path import dirname, abspath
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from motor import StepperController
+from motor.motion import trapezoidal_profile
+from motor.position_journal import PositionJournal
+
+def test_trapezoidal_profile_ramps_symmetrically():
+    """Moves ramp up to the top speed and back down, and short moves stay triangular."""
+    intervals = trapezoidal_profile(516, start_rate=300, max_rate=1200, acceleration=3000)
+    assert len(intervals) == 516
+    assert intervals == intervals[::-1]
+    assert abs(intervals[0] - 1 / 300) < 1e-9
+    assert abs(min(intervals) - 1 / 1200) < 1e-9
+    assert sum(intervals) < 516 * 0.002
+
+    short = trapezoidal_profile(10, start_rate=300, max_rate=1200, acceleration=3000)
+    assert min(short) > 1 / 1200
+
+def test_async_move_reports_completion():
+    """Background moves resolve their future and call back with the final position."""
+    stepper = StepperController(mock_mode=True, simulate_motion=True)
+    done = threading.Event()
+    future = stepper.move_to_position_async(0.5, callback=lambda f: done.set())
+    assert future.result(timeout=5) == StepperController.TOTAL_STEPS // 2
+    assert done.wait(1)
+    assert stepper.current_position == StepperController.TOTAL_STEPS // 2
+    stepper.cleanup()
+
+def test_position_survives_restart(tmp_path):
+    """A new controller resumes from the journalled step count instead of assuming east."""
+    journal = str(tmp_path / 'stepper.json')
+    stepper = StepperController(mock_mode=True, journal_path=journal)
+    stepper.move_to_position(0.75)
+    stepper.cleanup()
+
+    restarted = StepperController(mock_mode=True, journal_path=journal)
+    assert restarted.current_position == int(0.75 * StepperController.TOTAL_STEPS)
+    restarted.cleanup()
+
+def test_interrupted_move_is_detected(tmp_path):
+    """A journal left mid-move is not trusted as a clean position."""
+    journal = PositionJournal(str(tmp_path / 'stepper.json'))
+    journal.save(100, moving=True, target=300)
+    assert PositionJournal(journal.path).load() == (100, False)
+    journal.save(300)
+    assert PositionJournal(journal.path).load() == (300, True)
+
+def test_failed_homing_falls_back_to_journal(tmp_path):
+    """A home switch that never closes leaves the controller usable at the journalled position."""
+    class NoSwitchStepper(StepperController):
+        def setup_gpio(self):
+            self.pulser = self
+            self.pulses = 0
+
+        def run(self, intervals, forward):
+            self.pulses += len(intervals)
+
+        def at_home(self):
+            return False
+
+    journal = PositionJournal(str(tmp_path / 'stepper.json'))
+    journal.save(100, moving=True, target=300)
+    stepper = NoSwitchStepper(journal_path=journal.path, home_switch_pin=5)
+    assert stepper.pulses == StepperController.TOTAL_STEPS + StepperController.HOMING_MARGIN
+    assert stepper.current_position == 100
+    assert PositionJournal(journal.path).load() == (100, True)
+    stepper.mock_mode = True  # no GPIO to release
+    stepper.cleanup()
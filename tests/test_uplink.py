@@ -0,0 +1,210 @@
+"""Tests for the upload pipeline."""
+import json
+import random
+import sys
+import time
+import threading
+from os.path import dirname, abspath
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from sensors import MockSensor
+from uplink import (BackgroundUploader, Outbox, PayloadEncoder, decode_payload, DeadbandFilter,
+                    DeadbandReconstructor, parse_thresholds, StreamTransport)
+from benchmarks.standin import StreamStandIn
+
+def test_uploader_batches_readings():
+    """Readings submitted together are sent as one batch without blocking the caller."""
+    batches = []
+    sent = threading.Event()
+
+    def send_batch(batch):
+        batches.append(batch)
+        sent.set()
+        return True
+
+    uploader = BackgroundUploader(send_batch, max_queue=100, max_batch=10, linger=0.2)
+    uploader.start()
+    start = time.monotonic()
+    for i in range(25):
+        uploader.submit({'seq': i})
+    assert time.monotonic() - start < 0.1
+    uploader.stop()
+
+    assert [len(b) for b in batches] == [10, 10, 5]
+    assert [r['seq'] for b in batches for r in b] == list(range(25))
+
+def test_uploader_drops_oldest_when_full():
+    """A full queue keeps the newest readings."""
+    uploader = BackgroundUploader(lambda batch: True, max_queue=3)
+    for i in range(5):
+        uploader.submit({'seq': i})
+    assert uploader.dropped == 2
+    assert [uploader.queue.get_nowait()['seq'] for _ in range(3)] == [2, 3, 4]
+
+def test_outbox_survives_restart_and_evicts_oldest(tmp_path):
+    """Synced readings are still there after reopening, capped at max_readings."""
+    path = str(tmp_path / 'outbox.db')
+    outbox = Outbox(path, max_readings=5, sync_batch=100)
+    outbox.append([{'seq': i} for i in range(8)])
+    outbox.close()
+
+    outbox = Outbox(path, max_readings=5)
+    assert outbox.count == 5
+    rows = outbox.peek(3)
+    assert [r['seq'] for _, r in rows] == [3, 4, 5]
+    outbox.ack(rows[-1][0])
+    outbox.close()
+    assert [r['seq'] for _, r in Outbox(path).peek(10)] == [6, 7]
+
+def test_uploader_replays_outbox_after_outage(tmp_path):
+    """Readings buffered while the endpoint is down are sent in large batches later."""
+    online = threading.Event()
+    batches = []
+
+    def send_batch(batch):
+        if not online.is_set():
+            return False
+        batches.append(batch)
+        return True
+
+    outbox = Outbox(str(tmp_path / 'outbox.db'))
+    uploader = BackgroundUploader(send_batch, max_batch=10, linger=0.05, outbox=outbox,
+                                  replay_batch=100, retry_min=0.1, retry_max=0.1)
+    uploader.start()
+    for i in range(150):
+        uploader.submit({'seq': i})
+    time.sleep(0.3)
+    assert not batches and outbox.count == 150
+
+    online.set()
+    time.sleep(0.5)
+    uploader.stop()
+    assert [len(b) for b in batches] == [100, 50]
+    assert [r['seq'] for b in batches for r in b] == list(range(150))
+
+def test_uploader_stop_waits_for_send_in_flight(tmp_path):
+    """stop() outlasting its timeout finishes the send under way and keeps later readings in the outbox."""
+    sending = threading.Event()
+
+    def send_batch(batch):
+        sending.set()
+        time.sleep(0.5)
+        return True
+
+    path = str(tmp_path / 'outbox.db')
+    uploader = BackgroundUploader(send_batch, max_batch=10, linger=0.05, outbox=Outbox(path), retry_min=0.1)
+    uploader.start()
+    for i in range(5):
+        uploader.submit({'seq': i})
+    assert sending.wait(5)
+    for i in range(5, 8):
+        uploader.submit({'seq': i})
+    uploader.stop(timeout=0.1)
+
+    assert uploader.sent == 5
+    assert [r['seq'] for _, r in Outbox(path).peek(10)] == [5, 6, 7]
+
+def test_uploader_stop_gives_up_on_stuck_send():
+    """A send stuck past send_timeout does not hold up shutdown."""
+    release = threading.Event()
+    uploader = BackgroundUploader(lambda batch: release.wait(10), linger=0.01, send_timeout=0.2)
+    uploader.start()
+    uploader.submit({'seq': 0})
+    time.sleep(0.1)
+    start = time.monotonic()
+    uploader.stop(timeout=0.1)
+    assert time.monotonic() - start < 1
+    release.set()
+
+def test_columnar_payload_round_trip():
+    """Columnar batches decode back to the original readings, metadata included."""
+    random.seed(3)
+    readings = [MockSensor().get_mock_data() for _ in range(5)]
+    readings[2]['sgp40'] = None
+    body, headers = PayloadEncoder('columnar+gzip').encode(readings)
+    decoded = decode_payload(body, headers)
+
+    assert len(body) < len(json.dumps(readings)) / 2
+    for original, result in zip(readings, decoded):
+        assert result['device_id'] == original['device_id']
+        assert result['location'] == original['location']
+        assert result['timestamp'] == original['timestamp']
+        assert result['bme280'] == original['bme280']  # floats are not rounded on the wire
+    assert decoded[2]['sgp40'] is None
+
+def test_columnar_payload_keeps_long_strings_and_large_floats():
+    """JSON values over 64 KiB and floats beyond the float32 range survive the columnar layout."""
+    readings = [{'timestamp': i, 'note': 'x' * 70000, 'energy': 1e39 * (i + 1), 'lux': 10.5} for i in range(3)]
+    decoded = decode_payload(*PayloadEncoder('columnar').encode(readings))
+    assert [r['note'] for r in decoded] == [r['note'] for r in readings]
+    assert [r['energy'] for r in decoded] == [r['energy'] for r in readings]
+    assert decoded[0]['lux'] == 10.5
+
+    # An integer column with a gap is sent as floats, without rounding large values
+    counters = [{'timestamp': 0, 'count': 2 ** 24 + 1}, {'timestamp': 1, 'count': None}, {'timestamp': 2, 'count': 2 ** 31 + 3}]
+    decoded = decode_payload(*PayloadEncoder('columnar').encode(counters))
+    assert [r.get('count') for r in decoded] == [2 ** 24 + 1, None, 2 ** 31 + 3]
+
+def test_deadband_reconstruction_stays_within_band():
+    """A slowly drifting series sends few readings and rebuilds to within each threshold."""
+    thresholds = parse_thresholds('bme280.temperature=0.5,tsl2591.lux=10%')
+    deadband = DeadbandFilter(thresholds, keyframe_interval=600)
+    rebuild = DeadbandReconstructor()
+
+    sent = 0
+    for minute in range(120):
+        reading = {
+            'timestamp': 60.0 * minute,
+            'device_id': 'pi-test',
+            'bme280': {'temperature': 20 + minute * 0.01},
+            'tsl2591': {'lux': 500 + minute}
+        }
+        update = deadband.apply(reading)
+        if update is not None:
+            sent += 1
+            result = rebuild.apply(update)
+            assert result['device_id'] == 'pi-test'
+        # Between updates the server carries the last values forward
+        assert abs(result['bme280']['temperature'] - reading['bme280']['temperature']) <= 0.5
+        assert abs(result['tsl2591']['lux'] - reading['tsl2591']['lux']) <= 0.1 * result['tsl2591']['lux']
+    assert sent < 30
+
+def test_stream_transport_resumes_without_duplicates():
+    """Frames lost with a dropped connection are resent after reconnecting, and none arrive twice."""
+    readings = [{'timestamp': i, 'bme280': {'temperature': 20.0 + i}} for i in range(10)]
+    with StreamStandIn(drop_after=2) as standin:
+        transport = StreamTransport(standin.url, PayloadEncoder('columnar+gzip'), 'node-1',
+                                    frame_readings=2, timeout=2, backoff=0.01)
+        assert transport.send(readings)
+        assert transport.retries == 2  # 5 frames, the connection drops after every 2
+        assert [r['timestamp'] for r in standin.received] == list(range(10))
+        assert standin.duplicates == 0
+        transport.close()
+
+        # A restarted device carries on from the server's sequence number
+        standin.drop_after = None
+        restarted = StreamTransport(standin.url, PayloadEncoder('json'), 'node-1', timeout=2)
+        assert restarted.send({'timestamp': 10})
+        assert standin.last_seq['node-1'] == 6
+        assert len(standin.received) == 11
+        restarted.close()
+
+    # With the server gone the batch fails, so the uploader keeps it for later
+    assert not transport.send(readings[:1])
+
+def test_stream_transport_retry_of_failed_batch_is_idempotent():
+    """A batch that failed part way is stored once when the uploader sends it again."""
+    readings = [{'timestamp': i, 'bme280': {'temperature': 20.0 + i}} for i in range(10)]
+    with StreamStandIn(drop_after=2) as standin:
+        transport = StreamTransport(standin.url, PayloadEncoder('json'), 'node-1',
+                                    frame_readings=2, timeout=2, reconnect_attempts=0, backoff=0.01)
+        assert not transport.send(readings)
+        assert standin.readings == 4
+
+        # The outbox replays the same batch, now with newer readings behind it
+        standin.drop_after = None
+        more = readings + [{'timestamp': 10}, {'timestamp': 11}]
+        assert transport.send(more)
+        assert [r['timestamp'] for r in standin.received] == list(range(12))
+        assert standin.readings == 12
+        transport.close()
@@ -0,0 +1,19 @@
+from .uploader import BackgroundUploader
+from .outbox import Outbox
+from .encoding import PayloadEncoder, decode_payload
+from .transport import HTTPTransport, StreamTransport, create_transport, max_send_time
+from .deadband import DeadbandFilter, DeadbandReconstructor, parse_thresholds
+
+__all__ = [
+    'BackgroundUploader',
+    'Outbox',
+    'PayloadEncoder',
+    'decode_payload',
+    'HTTPTransport',
+    'StreamTransport',
+    'create_transport',
+    'max_send_time',
+    'DeadbandFilter',
+    'DeadbandReconstructor',
+    'parse_thresholds'
+]
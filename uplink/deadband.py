@@ -0,0 +1,102 @@
+import logging
+
+from .encoding import META_KEYS, flatten_reading, unflatten_reading
+
+# Window bookkeeping that differs in every report (see ICM20948Stream.summarize and
+# ReadingBuffer.report). It goes out with any other change but never triggers a send itself.
+CONTEXT_FIELDS = ('window.seconds', 'window.samples', 'window.first_event')
+
+def parse_thresholds(spec):
+    """Parse 'bme280.temperature=0.2,tsl2591.lux=5%' into {path: (absolute, relative)}.
+
+    A value ending in % is relative to the last reported value; list a field
+    twice to give it both kinds, in which case the wider band applies.
+    """
+    thresholds = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        try:
+            path, value = (part.strip() for part in item.split('='))
+            absolute, relative = thresholds.get(path, (0.0, 0.0))
+            if value.endswith('%'):
+                relative = float(value[:-1]) / 100
+            else:
+                absolute = float(value)
+            thresholds[path] = (absolute, relative)
+        except ValueError:
+            logging.error(f"Ignoring invalid deadband threshold '{item}'")
+    return thresholds
+
+class DeadbandFilter:
+    """Reduces readings to the fields that moved past their deadband.
+
+    Each field is compared with the value last reported for it. A field is
+    reported when it differs by more than max(absolute, relative * |last|),
+    so the server's carried-forward value never drifts further than that band
+    from the true one. Fields without a threshold are reported whenever they
+    change at all. A full keyframe, marked 'keyframe': True, goes out every
+    keyframe_interval seconds and whenever the set of fields changes (e.g. a
+    sensor failing). Fields ending in one of context_fields are only sent
+    alongside another change. apply() returns None when nothing needs to be sent.
+    """
+
+    def __init__(self, thresholds, keyframe_interval=3600, context_fields=CONTEXT_FIELDS):
+        self.thresholds = thresholds
+        self.keyframe_interval = keyframe_interval
+        self.context_fields = context_fields
+        self._context = {}  # path -> whether it is a context field
+        self._reported = None
+        self._last_keyframe = None
+
+    def apply(self, reading):
+        static = {key: reading[key] for key in ('timestamp',) + META_KEYS if key in reading}
+        flat = flatten_reading({k: v for k, v in reading.items() if k not in static})
+        timestamp = reading.get('timestamp', 0)
+
+        if (self._reported is None or flat.keys() != self._reported.keys()
+                or timestamp - self._last_keyframe >= self.keyframe_interval):
+            self._reported = flat
+            self._last_keyframe = timestamp
+            return {**reading, 'keyframe': True}
+
+        changed = {}
+        context = {}
+        for path, value in flat.items():
+            last = self._reported[path]
+            if self._exceeds(path, value, last):
+                (context if self._is_context(path) else changed)[path] = value
+        if not changed:
+            return None
+        changed.update(context)
+        self._reported.update(changed)
+        return {**static, **unflatten_reading(changed)}
+
+    def _is_context(self, path):
+        context = self._context.get(path)
+        if context is None:
+            context = self._context[path] = any(path == field or path.endswith('.' + field)
+                                                for field in self.context_fields)
+        return context
+
+    def _exceeds(self, path, value, last):
+        if value is None or last is None or isinstance(value, str) or isinstance(last, str):
+            return value != last
+        absolute, relative = self.thresholds.get(path, (0.0, 0.0))
+        return abs(value - last) > max(absolute, relative * abs(last))
+
+class DeadbandReconstructor:
+    """Server-side helper that rebuilds full readings from a deadband stream."""
+
+    def __init__(self):
+        self._state = None
+
+    def apply(self, reading):
+        """Return the full reading for a keyframe or delta, or None before the first keyframe."""
+        static = {key: reading[key] for key in ('timestamp',) + META_KEYS if key in reading}
+        flat = flatten_reading({k: v for k, v in reading.items() if k not in static and k != 'keyframe'})
+        if reading.get('keyframe'):
+            self._state = flat
+        elif self._state is None:
+            return None
+        else:
+            self._state.update(flat)
+        return {**static, **unflatten_reading(self._state)}
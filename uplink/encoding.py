@@ -0,0 +1,212 @@
+import gzip
+import json
+from array import array
+import logging
+import math
+import struct
+
+# Columnar payload layout (all integers little-endian):
+#   b'NVC' | schema version (B)
+#   metadata length (I) | metadata JSON (fields shared by every reading in the batch)
+#   reading count (I) | field count (H)
+#   per field: name length (B) | name (UTF-8) | type code (c)
+#   per field: presence bitmap (1 bit per reading) | values of the readings that have the field
+# Type codes: 'i' int32, 'f' float32, 'd' float64, 'n' always null, 'j' JSON with a length
+# prefix (I; H in schema version 1). Float columns store null as NaN. A column is only sent as
+# float32 when every value survives the round trip exactly; otherwise it is float64, so no value
+# is rounded on the wire (this includes integers above 2**24 in a column with gaps).
+MAGIC = b'NVC'
+SCHEMA_VERSION = 2
+JSON_LENGTH = {1: '<H', 2: '<I'}  # length prefix of 'j' values per schema version
+COLUMNAR_CONTENT_TYPE = 'application/x-nv-columnar'
+META_KEYS = ('device_id', 'location')
+ENCODINGS = ('json', 'json+gzip', 'columnar', 'columnar+gzip', 'columnar+zstd')
+
+def flatten_reading(reading, prefix=''):
+    """Flatten nested sensor dicts into dotted paths, e.g. 'bme280.temperature'."""
+    flat = {}
+    for key, value in reading.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_reading(value, path + '.'))
+        else:
+            flat[path] = value
+    return flat
+
+def unflatten_reading(flat):
+    """Inverse of flatten_reading."""
+    reading = {}
+    for path, value in flat.items():
+        node = reading
+        *parents, leaf = path.split('.')
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = value
+    return reading
+
+def _exact_in_float32(values):
+    try:
+        return array('f', values).tolist() == [float(v) for v in values]
+    except OverflowError:
+        return False
+
+def _column_type(name, values, float_type):
+    present = [v for v in values if v is not None]
+    if not present:
+        return 'n'
+    if name.endswith('timestamp'):
+        return 'd'
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+        if len(present) == len(values) and all(-2**31 <= v < 2**31 for v in present):
+            return 'i'
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        if float_type == 'f' and not _exact_in_float32(present):
+            return 'd'
+        return float_type
+    return 'j'
+
+def encode_columnar(readings, float_type='f'):
+    """Pack a list of readings into the schema-versioned columnar layout."""
+    first = readings[0]
+    meta = {key: first[key] for key in META_KEYS
+            if key in first and all(r.get(key) == first[key] for r in readings)}
+
+    rows = [flatten_reading({k: v for k, v in r.items() if k not in meta}) for r in readings]
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    count = len(rows)
+
+    meta_json = json.dumps(meta, separators=(',', ':')).encode()
+    parts = [MAGIC, struct.pack('<BI', SCHEMA_VERSION, len(meta_json)), meta_json,
+             struct.pack('<IH', count, len(names))]
+    columns = []
+    for name in names:
+        present = [i for i, row in enumerate(rows) if name in row]
+        values = [rows[i][name] for i in present]
+        code = _column_type(name, values, float_type)
+        encoded_name = name.encode()
+        parts.append(struct.pack('<B', len(encoded_name)) + encoded_name + code.encode())
+        columns.append((present, values, code))
+
+    for present, values, code in columns:
+        bitmap = bytearray((count + 7) // 8)
+        for i in present:
+            bitmap[i >> 3] |= 1 << (i & 7)
+        parts.append(bytes(bitmap))
+        if code in 'ifd':
+            if code != 'i':
+                values = [math.nan if v is None else v for v in values]
+            parts.append(struct.pack(f'<{len(values)}{code}', *values))
+        elif code == 'j':
+            for value in values:
+                data = json.dumps(value, separators=(',', ':')).encode()
+                parts.append(struct.pack('<I', len(data)) + data)
+    return b''.join(parts)
+
+def decode_columnar(body):
+    """Unpack a columnar payload back into a list of nested readings."""
+    if body[:3] != MAGIC:
+        raise ValueError("Not a columnar payload")
+    version, meta_len = struct.unpack_from('<BI', body, 3)
+    if version not in JSON_LENGTH:
+        raise ValueError(f"Unsupported columnar schema version {version}")
+    length_format = JSON_LENGTH[version]
+    length_size = struct.calcsize(length_format)
+    offset = 8
+    meta = json.loads(body[offset:offset + meta_len])
+    offset += meta_len
+    count, field_count = struct.unpack_from('<IH', body, offset)
+    offset += 6
+
+    fields = []
+    for _ in range(field_count):
+        name_len = body[offset]
+        name = body[offset + 1:offset + 1 + name_len].decode()
+        code = chr(body[offset + 1 + name_len])
+        fields.append((name, code))
+        offset += 2 + name_len
+
+    rows = [{} for _ in range(count)]
+    for name, code in fields:
+        bitmap = body[offset:offset + (count + 7) // 8]
+        offset += len(bitmap)
+        present = [i for i in range(count) if bitmap[i >> 3] & (1 << (i & 7))]
+        if code in 'ifd':
+            values = struct.unpack_from(f'<{len(present)}{code}', body, offset)
+            offset += struct.calcsize(f'<{len(present)}{code}')
+            if code != 'i':
+                values = [None if math.isnan(v) else v for v in values]
+        elif code == 'j':
+            values = []
+            for _ in present:
+                (length,) = struct.unpack_from(length_format, body, offset)
+                values.append(json.loads(body[offset + length_size:offset + length_size + length]))
+                offset += length_size + length
+        else:
+            values = [None] * len(present)
+        for i, value in zip(present, values):
+            rows[i][name] = value
+
+    readings = []
+    for row in rows:
+        reading = unflatten_reading(row)
+        reading.update(meta)
+        readings.append(reading)
+    return readings
+
+class PayloadEncoder:
+    """Turns a reading or batch of readings into an HTTP body and headers.
+
+    encoding is one of ENCODINGS: 'json' is the original uncompressed JSON,
+    the 'columnar' variants send batches in the compact layout above with
+    device metadata sent once per batch. zstd needs the optional zstandard
+    package and falls back to gzip without it.
+    """
+
+    def __init__(self, encoding='json'):
+        if encoding not in ENCODINGS:
+            logging.error(f"Unknown payload encoding '{encoding}', using json")
+            encoding = 'json'
+        self.format, _, self.compression = encoding.partition('+')
+        self._zstd = None
+        if self.compression == 'zstd':
+            try:
+                import zstandard
+                self._zstd = zstandard.ZstdCompressor(level=9)
+            except ImportError:
+                logging.warning("zstandard is not installed, compressing payloads with gzip")
+                self.compression = 'gzip'
+        self.encoding = f"{self.format}+{self.compression}" if self.compression else self.format
+
+    def content_headers(self):
+        """The Content-Type and Content-Encoding headers every body from this encoder carries."""
+        headers = {'Content-Type': COLUMNAR_CONTENT_TYPE if self.format == 'columnar' else 'application/json'}
+        if self.compression:
+            headers['Content-Encoding'] = self.compression
+        return headers
+
+    def encode(self, data):
+        """Encode a reading (dict) or batch (list). Returns (body, headers)."""
+        if self.format == 'columnar':
+            body = encode_columnar(data if isinstance(data, list) else [data])
+        else:
+            body = json.dumps(data).encode()
+
+        if self.compression == 'gzip':
+            body = gzip.compress(body, compresslevel=6)
+        elif self.compression == 'zstd':
+            body = self._zstd.compress(body)
+        return body, self.content_headers()
+
+def decode_payload(body, headers):
+    """Server-side counterpart of PayloadEncoder.encode. Always returns a list of readings."""
+    content_encoding = headers.get('Content-Encoding', '')
+    if content_encoding == 'gzip':
+        body = gzip.decompress(body)
+    elif content_encoding == 'zstd':
+        import zstandard
+        body = zstandard.ZstdDecompressor().decompress(body)
+
+    if headers.get('Content-Type', '').startswith(COLUMNAR_CONTENT_TYPE):
+        return decode_columnar(body)
+    data = json.loads(body)
+    return data if isinstance(data, list) else [data]
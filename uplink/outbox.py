@@ -0,0 +1,102 @@
+import json
+import logging
+import sqlite3
+import time
+
+class Outbox:
+    """Crash-safe store-and-forward buffer for readings, backed by SQLite in WAL mode.
+
+    Readings are appended as JSON rows and removed once the endpoint has
+    accepted them. Writes are grouped into one transaction (and one fsync)
+    per sync_batch readings or sync_interval seconds, whichever comes first,
+    to keep SD card wear down. The oldest readings are evicted once the
+    outbox holds more than max_readings or they are older than max_age seconds.
+    """
+
+    def __init__(self, path, max_readings=100000, max_age=7 * 86400, sync_batch=20, sync_interval=60.0):
+        self.path = path
+        self.max_readings = max_readings
+        self.max_age = max_age
+        self.sync_batch = sync_batch
+        self.sync_interval = sync_interval
+
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS readings ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "created REAL NOT NULL, "
+            "payload TEXT NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS readings_created ON readings (created)")
+        self.count = self.conn.execute("SELECT COUNT(*) FROM readings").fetchone()[0]
+
+        self._in_transaction = False
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        if self.count:
+            logging.info(f"Outbox {path} holds {self.count} unsent readings")
+
+    def _begin(self):
+        if not self._in_transaction:
+            self.conn.execute("BEGIN")
+            self._in_transaction = True
+
+    def append(self, readings):
+        """Store readings. They become durable at the next sync."""
+        if not readings:
+            return
+        self._begin()
+        now = time.time()
+        self.conn.executemany(
+            "INSERT INTO readings (created, payload) VALUES (?, ?)",
+            [(now, json.dumps(reading)) for reading in readings]
+        )
+        self.count += len(readings)
+        self._unsynced += len(readings)
+        if (self._unsynced >= self.sync_batch
+                or time.monotonic() - self._last_sync >= self.sync_interval):
+            self.sync()
+
+    def peek(self, limit):
+        """Return up to limit of the oldest readings as (id, reading) pairs."""
+        rows = self.conn.execute(
+            "SELECT id, payload FROM readings ORDER BY id LIMIT ?", (limit,)
+        ).fetchall()
+        return [(row_id, json.loads(payload)) for row_id, payload in rows]
+
+    def ack(self, last_id):
+        """Remove every reading up to and including last_id once it has been delivered.
+
+        The delete is committed with the next sync; if the process dies first the
+        readings are simply sent again.
+        """
+        self._begin()
+        deleted = self.conn.execute("DELETE FROM readings WHERE id <= ?", (last_id,)).rowcount
+        self.count -= deleted
+
+    def sync(self):
+        """Evict readings over the caps and commit everything pending to disk."""
+        self._begin()
+        cutoff = time.time() - self.max_age
+        expired = self.conn.execute("DELETE FROM readings WHERE created < ?", (cutoff,)).rowcount
+        excess = self.count - expired - self.max_readings
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM readings WHERE id IN (SELECT id FROM readings ORDER BY id LIMIT ?)",
+                (excess,)
+            )
+        else:
+            excess = 0
+        self.conn.execute("COMMIT")
+        self._in_transaction = False
+        self.count -= expired + excess
+        if expired or excess:
+            logging.warning(f"Outbox evicted {expired + excess} oldest readings")
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        self.sync()
+        self.conn.close()
@@ -0,0 +1,258 @@
+import json
+import logging
+import socket
+import struct
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Stream protocol: length-prefixed frames over one long-lived TCP connection (little-endian)
+#   frame: body length (I) | frame type (B) | body
+#   HELLO    client -> server  JSON {"device_id": ..., "headers": {...}}, the sender and its payload headers
+#   WELCOME  server -> client  highest sequence number already accepted from this device (Q)
+#   DATA     client -> server  sequence number (Q) | payload exactly as PayloadEncoder produced it
+#   ACK      server -> client  highest sequence number accepted so far (Q), cumulative
+# Sequence numbers are per device and only ever increase. A server accepts each once and
+# acks a repeat without processing it again, so frames resent after a reconnect are not
+# duplicated.
+HELLO, WELCOME, DATA, ACK = 1, 2, 3, 4
+_FRAME = struct.Struct('<IB')
+_SEQ = struct.Struct('<Q')
+MAX_FRAME = 16 * 1024 * 1024
+
+class ProtocolError(Exception):
+    pass
+
+def pack_frame(kind, body):
+    return _FRAME.pack(len(body), kind) + body
+
+def read_frame(stream):
+    """Read one (type, body) frame from a binary file object, e.g. socket.makefile('rb')."""
+    header = stream.read(_FRAME.size)
+    if len(header) < _FRAME.size:
+        raise ConnectionError("connection closed")
+    length, kind = _FRAME.unpack(header)
+    if length > MAX_FRAME:
+        raise ProtocolError(f"frame of {length} bytes is too large")
+    body = stream.read(length)
+    if len(body) < length:
+        raise ConnectionError("connection closed mid-frame")
+    return kind, body
+
+def pack_seq(seq):
+    return _SEQ.pack(seq)
+
+def unpack_seq(body):
+    return _SEQ.unpack_from(body, 0)[0]
+
+class HTTPTransport:
+    """POSTs each reading or batch to the endpoint through a requests session with retries."""
+
+    RETRIES = 3
+    BACKOFF = 1  # seconds before the first retry, doubling after each
+
+    def __init__(self, url, encoder, timeout=10):
+        self.url = url
+        self.encoder = encoder
+        self.timeout = timeout
+        self.retries = 0  # HTTP retries made by urllib3
+        self._session = None  # created on the first upload, keeping requests off the startup path
+
+    @classmethod
+    def send_budget(cls, timeout=10):
+        """Roughly the longest one send can take: every attempt timing out, plus the backoff between them."""
+        return (cls.RETRIES + 1) * timeout + cls.BACKOFF * (2 ** cls.RETRIES - 1)
+
+    @property
+    def max_send_time(self):
+        return self.send_budget(self.timeout)
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = self._setup_session()
+        return self._session
+
+    def _setup_session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        transport = self
+
+        class CountingRetry(Retry):
+            """urllib3 Retry that counts every retry it makes, for the metrics endpoint."""
+            def increment(self, *args, **kwargs):
+                transport.retries += 1
+                return super().increment(*args, **kwargs)
+
+        session = requests.Session()
+        retry_strategy = CountingRetry(
+            total=self.RETRIES,
+            backoff_factor=self.BACKOFF,  # wait 1, 2, 4 seconds between retries
+            status_forcelist=[408, 429, 500, 502, 503, 504]  # HTTP status codes to retry on
+        )
+        adapter = HTTPAdapter(max_retries=retry_strategy)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def send(self, data):
+        """POST a reading, or a list of readings. Returns True once the endpoint accepted it."""
+        import requests
+        try:
+            body, headers = self.encoder.encode(data)
+            response = self.session.post(
+                self.url,
+                data=body,
+                headers=headers,
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            count = len(data) if isinstance(data, list) else 1
+            logging.info("Data sent successfully to %s (%d readings)", self.url, count)
+            return True
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Failed to send data to endpoint: {str(e)}")
+            return False
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+class StreamTransport:
+    """Sends readings as sequenced frames over one persistent TCP connection.
+
+    A batch is split into frames of up to frame_readings readings, which are
+    written back to back and acknowledged together, so a batch costs one
+    round trip and a few bytes of framing per frame instead of an HTTP
+    request each. If the connection drops part way through, the transport
+    reconnects, learns from the server's WELCOME which frames already
+    arrived and resends only the rest. After reconnect_attempts failed
+    reconnects the batch fails and the uploader retries it later. The frames
+    of a failed batch are kept, and when the uploader sends the same readings
+    again (possibly followed by more, as an outbox replay does) they go out
+    under their original sequence numbers, so the server drops the ones it
+    already stored.
+    """
+
+    def __init__(self, url, encoder, device_id, frame_readings=50, timeout=10.0, reconnect_attempts=3, backoff=0.5):
+        parts = urlsplit(url if '://' in url else f"tcp://{url}")
+        self.url = url
+        self.address = (parts.hostname, parts.port)
+        self.encoder = encoder
+        self.device_id = device_id
+        self.frame_readings = frame_readings
+        self.timeout = timeout
+        self.reconnect_attempts = reconnect_attempts
+        self.backoff = backoff  # seconds before the first reconnect, doubling after each
+        self.retries = 0  # reconnects after a lost connection
+        self._sock = None
+        self._reader = None
+        self._next_seq = 1
+        self._acked = 0
+        self._pending = None  # (readings, {seq: frame}) of the last batch that failed
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def send_budget(timeout=10.0, reconnect_attempts=3, backoff=0.5):
+        """Roughly the longest one send can take: a timeout to connect and one waiting for acks per attempt, plus backoff."""
+        waits = sum(min(backoff * 2 ** attempt, 5.0) for attempt in range(reconnect_attempts))
+        return (reconnect_attempts + 1) * 2 * timeout + waits
+
+    @property
+    def max_send_time(self):
+        return self.send_budget(self.timeout, self.reconnect_attempts, self.backoff)
+
+    def _connect(self):
+        sock = socket.create_connection(self.address, timeout=self.timeout)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            reader = sock.makefile('rb')
+            hello = {'device_id': self.device_id, 'headers': self.encoder.content_headers()}
+            sock.sendall(pack_frame(HELLO, json.dumps(hello).encode()))
+            kind, body = read_frame(reader)
+            if kind != WELCOME:
+                raise ProtocolError(f"expected WELCOME, got frame type {kind}")
+        except BaseException:
+            sock.close()
+            raise
+        # Carry on from the server's sequence number, e.g. after this process restarted
+        self._acked = unpack_seq(body)
+        self._next_seq = max(self._next_seq, self._acked + 1)
+        self._sock, self._reader = sock, reader
+        logging.info(f"Connected to stream endpoint {self.url} (resuming after frame {self._acked})")
+
+    def _disconnect(self):
+        if self._sock is not None:
+            try:
+                self._reader.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = self._reader = None
+
+    def send(self, data):
+        """Send a reading, or a list of readings. Returns True once every frame was acknowledged."""
+        readings = data if isinstance(data, list) else [data]
+        with self._lock:
+            frames = {}
+            done = 0
+            if self._pending is not None and readings[:len(self._pending[0])] == self._pending[0]:
+                # A retry: resend the failed batch's frames under their original numbers
+                done, frames = len(self._pending[0]), dict(self._pending[1])
+            self._pending = None
+            bodies = [self.encoder.encode(readings[start:start + self.frame_readings])[0]
+                      for start in range(done, len(readings), self.frame_readings)]
+            numbered = not bodies
+            attempts = 0
+            while True:
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    if not numbered:
+                        # Numbered only once connected, so they follow what the server already has
+                        for body in bodies:
+                            frames[self._next_seq] = pack_frame(DATA, pack_seq(self._next_seq) + body)
+                            self._next_seq += 1
+                        numbered = True
+                    last = max(frames, default=self._acked)
+                    # Pipeline every frame the server does not have yet, then collect the acks
+                    unacked = [frame for seq, frame in frames.items() if seq > self._acked]
+                    if unacked:
+                        self._sock.sendall(b''.join(unacked))
+                    while self._acked < last:
+                        kind, body = read_frame(self._reader)
+                        if kind != ACK:
+                            raise ProtocolError(f"expected ACK, got frame type {kind}")
+                        self._acked = max(self._acked, unpack_seq(body))
+                    logging.info("Data sent successfully to %s (%d readings in %d frames)", self.url, len(readings), len(frames))
+                    return True
+                except (OSError, ProtocolError) as e:
+                    self._disconnect()
+                    if attempts >= self.reconnect_attempts:
+                        logging.error(f"Failed to send data to stream endpoint: {str(e)}")
+                        if frames:
+                            self._pending = (readings if numbered else readings[:done], frames)
+                        return False
+                    attempts += 1
+                    self.retries += 1
+                    logging.warning(f"Stream connection lost ({str(e)}), reconnecting "
+                                    f"({attempts}/{self.reconnect_attempts})")
+                    time.sleep(min(self.backoff * 2 ** (attempts - 1), 5.0))
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+def max_send_time(kind):
+    """max_send_time of the transport create_transport(kind, ...) builds, without building one."""
+    return StreamTransport.send_budget() if kind == 'stream' else HTTPTransport.send_budget()
+
+def create_transport(kind, encoder, http_url, stream_url, device_id):
+    """The transport named by kind ('http' or 'stream')."""
+    if kind == 'stream':
+        return StreamTransport(stream_url, encoder, device_id)
+    if kind != 'http':
+        logging.error(f"Unknown uplink transport '{kind}', using http")
+    return HTTPTransport(http_url, encoder)
@@ -0,0 +1,147 @@
+import logging
+import queue
+import threading
+import time
+
+class BackgroundUploader:
+    """Uploads readings in batches from a worker thread.
+
+    The main loop hands readings to submit(), which never blocks: readings go
+    into a bounded queue and, if that is full, the oldest queued reading is
+    dropped. The worker gathers up to max_batch readings, waiting at most
+    linger seconds after the first one arrives, and passes each batch to
+    send_batch, which should return True once the batch was accepted.
+
+    With an outbox, every gathered batch is first written to disk and sending
+    always works from the head of the outbox. Failed sends back off
+    exponentially between retry_min and retry_max seconds, and a backlog left
+    by an outage is replayed back to back in batches of replay_batch readings.
+
+    send_timeout is the longest one send_batch call can take, such as the
+    transport's max_send_time; stop() waits no longer than that for a send
+    under way.
+    """
+
+    def __init__(self, send_batch, max_queue=1000, max_batch=50, linger=5.0,
+                 outbox=None, replay_batch=500, retry_min=5.0, retry_max=300.0, send_timeout=None):
+        self.send_batch = send_batch
+        self.send_timeout = send_timeout
+        self.max_batch = max_batch
+        self.linger = linger
+        self.outbox = outbox
+        self.replay_batch = replay_batch
+        self.retry_min = retry_min
+        self.retry_max = retry_max
+        self._retry_delay = retry_min
+        self._retry_at = 0.0
+        self._stop_by = None  # no send starts after this monotonic time once stopping
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.sent = 0  # readings accepted by the endpoint
+        self.failures = 0  # batches that failed to send
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._worker, name='uploader', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        logging.info(f"Background uploader started (batch size {self.max_batch}, linger {self.linger}s)")
+
+    def submit(self, reading):
+        """Queue a reading for upload without blocking."""
+        while True:
+            try:
+                self.queue.put_nowait(reading)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                    logging.warning("Upload queue full, dropped oldest reading (%d dropped so far)", self.dropped)
+                except queue.Empty:
+                    pass
+
+    def stop(self, timeout=10.0):
+        """Stop the worker after it has tried to send whatever is still queued.
+
+        No send starts more than timeout seconds after stop() is called; what is
+        left then stays in the outbox, or is dropped without one. A send already
+        under way is waited for, up to send_timeout, so the outbox is acked and
+        closed on the worker thread rather than abandoned mid-transaction at exit.
+        """
+        self._stop_by = time.monotonic() + timeout
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(None if self.send_timeout is None else timeout + self.send_timeout)
+            if self._thread.is_alive():
+                logging.error(f"Upload still under way {timeout + self.send_timeout:.0f}s after stopping, abandoning it")
+
+    def _out_of_time(self):
+        return self._stop_by is not None and time.monotonic() >= self._stop_by
+
+    def _next_batch(self):
+        """Block until a reading arrives, then gather more until the batch is full or lingered."""
+        try:
+            batch = [self.queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.linger
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop.is_set():
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        # Take anything already waiting without further delay
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _send(self, batch):
+        try:
+            ok = self.send_batch(batch)
+        except Exception as e:
+            logging.error(f"Error in upload worker: {str(e)}")
+            ok = False
+        if ok:
+            self.sent += len(batch)
+        else:
+            self.failures += 1
+        return ok
+
+    def _drain_outbox(self):
+        """Send from the head of the outbox until it is empty or a send fails."""
+        if time.monotonic() < self._retry_at or self._out_of_time():
+            return
+        while self.outbox.count:
+            rows = self.outbox.peek(self.replay_batch)
+            if not self._send([reading for _, reading in rows]):
+                logging.error(f"Failed to upload {len(rows)} readings, "
+                              f"{self.outbox.count} kept in outbox, retrying in {self._retry_delay:.0f}s")
+                self._retry_at = time.monotonic() + self._retry_delay
+                self._retry_delay = min(self._retry_delay * 2, self.retry_max)
+                return
+            self.outbox.ack(rows[-1][0])
+            self._retry_delay = self.retry_min
+            if self._stop.is_set():
+                return
+
+    def _worker(self):
+        while not (self._stop.is_set() and self.queue.empty()):
+            batch = self._next_batch()
+            if self.outbox is not None:
+                self.outbox.append(batch)
+                self._drain_outbox()
+            elif batch and self._out_of_time():
+                self.dropped += len(batch)
+                logging.warning(f"Uploader stopping, dropped {len(batch)} unsent readings")
+            elif batch and not self._send(batch):
+                logging.error(f"Failed to upload batch of {len(batch)} readings")
+        if self.outbox is not None:
+            self.outbox.close()